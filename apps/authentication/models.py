@@ -27,6 +27,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=True)
     is_active = models.BooleanField(default=True)
     is_superuser = models.BooleanField(default=False)
+    # pages showing the user's name include it in their change stamp
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = UserManager()
 
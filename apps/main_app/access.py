@@ -0,0 +1,117 @@
+"""
+Object-level access to projects and tasks.
+
+A user reaches a project they created or collaborate on, and a task they
+created, are assigned to or collaborate on, or that belongs to one of those
+projects. Superusers reach everything. Views apply this as queryset filters
+(visible_projects / visible_tasks), so list pages stay one query and an
+object out of reach is a plain 404.
+
+The user's project ids are cached for ACCESS_CACHE_SECONDS and dropped by the
+receivers below when the user's project memberships change. With several
+processes, point CACHES at a shared backend so every process sees the drop.
+
+Receivers are connected from TasksConfig.ready().
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import ArchivedTask, Project, Task, User
+
+
+def cache_key(user_id):
+    return f'access:projects:{user_id}'
+
+
+def accessible_project_ids(user):
+    """Ids of the live projects `user` created or collaborates on, from the cache when possible"""
+    key = cache_key(user.pk)
+    project_ids = cache.get(key)
+    if project_ids is None:
+        project_ids = frozenset(
+            Project.objects.filter(Q(creator=user) | Q(collaborators=user)).values_list('pk', flat=True)
+        )
+        cache.set(key, project_ids, settings.ACCESS_CACHE_SECONDS)
+    return project_ids
+
+
+def forget_access(user_ids):
+    cache.delete_many([cache_key(user_id) for user_id in user_ids if user_id is not None])
+
+
+def visible_projects(user, queryset=None):
+    queryset = Project.objects.all() if queryset is None else queryset
+    if user.is_superuser:
+        return queryset
+    return queryset.filter(pk__in=accessible_project_ids(user))
+
+
+def task_access(user, model=Task):
+    """Q for the rows of `model` (Task or ArchivedTask) `user` may see; subqueries, so no duplicate rows"""
+    own = f'{model._meta.model_name}_id'
+    projects = Project.tasks.through if model is Task else model.projects.through
+    return (
+        Q(creator=user)
+        | Q(assignee=user)
+        | Q(pk__in=model.collaborators.through.objects.filter(user_id=user.pk).values(own))
+        | Q(pk__in=projects.objects.filter(project_id__in=accessible_project_ids(user)).values(own))
+    )
+
+
+def visible_tasks(user, queryset=None, model=Task):
+    queryset = model.objects.all() if queryset is None else queryset
+    if user.is_superuser:
+        return queryset
+    return queryset.filter(task_access(user, model))
+
+
+def visible_archived_tasks(user, queryset=None):
+    return visible_tasks(user, queryset, model=ArchivedTask)
+
+
+def project_member_ids(project_ids):
+    return {
+        *Project.all_objects.filter(pk__in=project_ids).values_list('creator_id', flat=True),
+        *Project.collaborators.through.objects.filter(project_id__in=project_ids).values_list('user_id', flat=True),
+    }
+
+
+@receiver(post_save, sender=User)
+def forget_access_on_new_user(sender, instance, created, raw=False, **kwargs):
+    # a reused id (SQLite can hand out a deleted user's id again) must not inherit a cached set
+    if created:
+        forget_access([instance.pk])
+
+
+@receiver(post_save, sender=Project)
+def forget_access_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # a new project reaches its creator; a soft-deleted one (purge.py) leaves everyone's set
+    if created:
+        forget_access([instance.creator_id])
+    elif update_fields and 'deleted_at' in update_fields:
+        forget_access(project_member_ids([instance.pk]))
+
+
+@receiver(pre_delete, sender=Project)
+def forget_access_on_delete(sender, instance, **kwargs):
+    # before the cascade takes the collaborator rows with it
+    forget_access(project_member_ids([instance.pk]))
+
+
+@receiver(m2m_changed, sender=Project.collaborators.through)
+def forget_access_on_collaborators(sender, instance, action, reverse, pk_set, **kwargs):
+    # project.collaborators.* changes pk_set users; user.collaborating_projects.* changes one user
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            forget_access([instance.pk])
+        return
+
+    if action == 'pre_clear':
+        instance._cleared_collaborator_ids = list(instance.collaborators.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        forget_access(instance.__dict__.pop('_cleared_collaborator_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        forget_access(pk_set)
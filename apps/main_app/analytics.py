@@ -0,0 +1,178 @@
+"""
+Cycle-time analytics over the status history (StatusTransition).
+
+For tasks finished in the window, one grouped query reduces their transitions
+to a row per task: lead time (created -> last Done) and cycle time (first In
+progress -> last Done). Percentiles per assignee and per project are then
+computed with NumPy over those arrays, for all groups at once (one sort, no
+per-group loop), the same way on SQLite and PostgreSQL. A report only covers
+the tasks its reader may see (access.py), so it is cached per user (superusers
+share one) for ANALYTICS_CACHE_SECONDS: percentiles over weeks of history do
+not need to be recomputed on every page view.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import FloatField, Func, Max, Min, Q
+from django.utils import timezone
+
+from .access import visible_archived_tasks, visible_tasks
+from .models import ArchivedTask, Project, Status, StatusTransition
+
+User = get_user_model()
+
+PERCENTILES = (50, 75, 90)
+DAY = 86400
+
+
+class Seconds(Func):
+    """Seconds from `start` to `end`, computed by the database itself"""
+    arg_joiner = ' - '
+    template = 'EXTRACT(EPOCH FROM (%(expressions)s))'
+    output_field = FloatField()
+
+    def __init__(self, end, start):
+        super().__init__(end, start)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Django's own datetime subtraction on SQLite is a Python function parsing both timestamps per row
+        return self.as_sql(
+            compiler, connection,
+            template='((julianday(%(expressions)s)) * 86400.0)', arg_joiner=') - julianday(',
+            **extra_context,
+        )
+
+
+def finished_tasks(since, user=None):
+    transitions = StatusTransition.objects.filter(to_status=Status.DONE, changed_at__gte=since)
+    if user is not None and not user.is_superuser:
+        # live or archived: a task id is in one table or the other
+        transitions = transitions.filter(
+            Q(task_id__in=visible_tasks(user).values('pk'))
+            | Q(task_id__in=visible_archived_tasks(user).values('pk'))
+        )
+    return transitions.values('task_id')
+
+
+def task_durations(finished):
+    """(task ids, assignee ids, lead seconds, cycle seconds) arrays, sorted by task id; NaN if unknown"""
+    done = Max('changed_at', filter=Q(to_status=Status.DONE))
+    queryset = (
+        StatusTransition.objects
+        .filter(task_id__in=finished)
+        .values('task_id')
+        .annotate(
+            assignee=Max('assignee_id', filter=Q(to_status=Status.DONE)),
+            lead=Seconds(done, Min('changed_at', filter=Q(from_status__isnull=True))),
+            cycle=Seconds(done, Min('changed_at', filter=Q(to_status=Status.IN_PROGRESS))),
+        )
+        .order_by('task_id')
+        .values_list('task_id', 'assignee', 'lead', 'cycle')
+    )
+    # all numbers: fetch the rows straight into an array, without the per-row converters
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    # None -> NaN; ids stay exact in float64 up to 2**53
+    table = np.array(rows, dtype=float).reshape(-1, 4)
+    task_ids = table[:, 0].astype(np.int64)
+    assignee_ids = np.nan_to_num(table[:, 1]).astype(np.int64)
+    return task_ids, assignee_ids, table[:, 2], table[:, 3]
+
+
+def group_percentiles(keys, values, percentiles=PERCENTILES):
+    """{key: {'count': n, 'p50': days, ...}} for every key, ignoring NaN values"""
+    keep = ~np.isnan(values)
+    keys, values = keys[keep], values[keep]
+    if not len(keys):
+        return {}
+
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    unique, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    stats = {'count': counts}
+    for p in percentiles:
+        # linear interpolation between closest ranks, as numpy.percentile / PERCENTILE_CONT do
+        position = starts + (counts - 1) * (p / 100)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        stats[f'p{p}'] = (values[low] + (values[high] - values[low]) * (position - low)) / DAY
+
+    return {
+        int(key): {name: column[i].item() for name, column in stats.items()}
+        for i, key in enumerate(unique)
+    }
+
+
+def project_links(finished):
+    """(task ids, project ids) arrays of the project memberships, live and archived"""
+    links = []
+    for through, task_column in ((Project.tasks.through, 'task_id'), (ArchivedTask.projects.through, 'archivedtask_id')):
+        links += through.objects.filter(**{f'{task_column}__in': finished}).values_list(task_column, 'project_id')
+    if not links:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.array(links, dtype=np.int64).T
+
+
+def display_name(user):
+    if user is None:
+        return "Unassigned"
+    return " ".join(filter(None, [user.first_name, user.last_name])) or user.email
+
+
+def merge(cycle, lead):
+    """{key: {'cycle': stats, 'lead': stats}} for every key in either"""
+    rows = {}
+    for key in cycle.keys() | lead.keys():
+        empty = dict.fromkeys(['count', *(f'p{p}' for p in PERCENTILES)])
+        rows[key] = {
+            'cycle': cycle.get(key, {**empty, 'count': 0}),
+            'lead': lead.get(key, {**empty, 'count': 0}),
+        }
+    return rows
+
+
+def cycle_time_report(days=90, now=None, user=None):
+    """Percentiles over the tasks finished in the last `days`; only those `user` may see, if given"""
+    now = now or timezone.now()
+    finished = finished_tasks(now - timedelta(days=days), user)
+    task_ids, assignee_ids, lead, cycle = task_durations(finished)
+
+    link_tasks, link_projects = project_links(finished)
+    # task_ids is sorted: find each link's task row without a Python loop
+    rows = np.searchsorted(task_ids, link_tasks)
+
+    by_assignee = merge(group_percentiles(assignee_ids, cycle), group_percentiles(assignee_ids, lead))
+    by_project = merge(group_percentiles(link_projects, cycle[rows]), group_percentiles(link_projects, lead[rows]))
+
+    names = dict(Project.objects.filter(pk__in=list(by_project)).values_list('pk', 'project_name'))
+    users = {user.pk: user for user in User.objects.filter(pk__in=list(by_assignee))}
+    return {
+        'days': days,
+        'finished': len(task_ids),
+        # deleted projects are left out
+        'projects': sorted(
+            ({'id': pk, 'name': names[pk], **stats} for pk, stats in by_project.items() if pk in names),
+            key=lambda row: row['name'],
+        ),
+        'assignees': sorted(
+            ({'id': pk, 'name': display_name(users.get(pk)), **stats} for pk, stats in by_assignee.items()),
+            key=lambda row: (row['id'] == 0, row['name']),
+        ),
+    }
+
+
+def cached_cycle_time_report(days=90, user=None):
+    key = f'cycle-time:{days}' if user is None or user.is_superuser else f'cycle-time:{days}:{user.pk}'
+    report = cache.get(key)
+    if report is None:
+        report = cycle_time_report(days, user=user)
+        cache.set(key, report, settings.ANALYTICS_CACHE_SECONDS)
+    return report
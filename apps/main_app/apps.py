@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.main_app'
+
+    def ready(self):
+        from . import access  # noqa: F401  connects the access cache receivers
+        from . import changes  # noqa: F401  connects the change tracking receivers
+        from . import history  # noqa: F401  connects the status history receiver
@@ -0,0 +1,83 @@
+"""
+Hot/cold split for finished tasks.
+
+Done tasks untouched for ARCHIVE_DONE_AFTER_DAYS are copied, with their project
+and collaborator links, into ArchivedTask and removed from the Task table, one
+chunk per transaction. Project.task_count keeps counting them.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .changes import record_changes
+from .models import ArchivedTask, ChangeAction, Project, Status, Task
+
+ARCHIVED_FIELDS = (
+    'id', 'task_name', 'task_description', 'status', 'priority', 'due_date',
+    'creator_id', 'assignee_id', 'created_at', 'updated_at',
+)
+
+
+def archivable_tasks(older_than_days=None, now=None):
+    days = settings.ARCHIVE_DONE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Task.objects.filter(status=Status.DONE, updated_at__lt=cutoff)
+
+
+@transaction.atomic
+def archive_chunk(task_ids, now=None):
+    """Move the given Done tasks into the archive; returns the number moved"""
+    now = now or timezone.now()
+    # locked until commit (PostgreSQL), so nobody reopens a task while it is being moved
+    rows = list(
+        Task.objects.select_for_update().filter(pk__in=task_ids, status=Status.DONE).values(*ARCHIVED_FIELDS)
+    )
+    if not rows:
+        return 0
+    ids = [row['id'] for row in rows]
+
+    project_links = list(
+        Project.tasks.through.objects.filter(task_id__in=ids).values_list('project_id', 'task_id')
+    )
+    collaborator_links = list(
+        Task.collaborators.through.objects.filter(task_id__in=ids).values_list('task_id', 'user_id')
+    )
+
+    ArchivedTask.objects.bulk_create([ArchivedTask(**row, archived_at=now) for row in rows])
+    ArchivedTask.projects.through.objects.bulk_create([
+        ArchivedTask.projects.through(archivedtask_id=task_id, project_id=project_id)
+        for project_id, task_id in project_links
+    ])
+    ArchivedTask.collaborators.through.objects.bulk_create([
+        ArchivedTask.collaborators.through(archivedtask_id=task_id, user_id=user_id)
+        for task_id, user_id in collaborator_links
+    ])
+
+    # the links go first, then the tasks in one plain DELETE: nothing else references a
+    # task, and Task's pre/post_delete receivers (project recount, change log) would run
+    # once per task, so their work is done for the whole chunk below instead
+    Project.tasks.through.objects.filter(task_id__in=ids).delete()
+    Task.collaborators.through.objects.filter(task_id__in=ids).delete()
+    table = connection.ops.quote_name(Task._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+
+    project_ids = sorted({project_id for project_id, _ in project_links})
+    Project.objects.recount_tasks(project_ids)
+    record_changes(Task, ids, ChangeAction.DELETE)
+    record_changes(Project, project_ids, ChangeAction.UPDATE)
+    return len(ids)
+
+
+def archive_done_tasks(older_than_days=None, batch_size=500):
+    """Archive every archivable task, `batch_size` per transaction; returns the total moved"""
+    moved = 0
+    while True:
+        ids = list(
+            archivable_tasks(older_than_days).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return moved
+        moved += archive_chunk(ids)
@@ -0,0 +1,107 @@
+"""
+Kanban board: a project's tasks in one column per Status, in the order people put them.
+
+The board is one query: the project's ProjectTask rows joined to their tasks,
+sorted by status then rank. Moving a card gives it a rank between its new
+neighbours (ranks.py) and so updates that one row; a move to another column
+also changes the task's status, through Task.save() so the status history,
+overdue flag and change feed follow. When a column's keys have grown past
+BOARD_RANK_MAX_LENGTH, a job rewrites the column with short keys in batches.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .models import Priorities, ProjectTask, Status
+from .ranks import rank_between, spread_ranks
+
+COLUMNS = ('id', 'task_name', 'priority', 'due_date', 'is_overdue', 'assignee')
+
+
+class StaleBoard(Exception):
+    """The neighbours a client sent are no longer next to each other: it should reload the board"""
+
+
+def board_columns(project):
+    """[(status, [card, ...]), ...] for every Status in order; cards are dicts of COLUMNS"""
+    columns = {status: [] for status in Status}
+    for pk, name, priority, due_date, is_overdue, status, first_name, email in (
+        ProjectTask.objects
+        .filter(project=project)
+        .order_by('task__status', 'rank', 'task_id')
+        .values_list(
+            'task_id', 'task__task_name', 'task__priority', 'task__due_date', 'task__is_overdue',
+            'task__status', 'task__assignee__first_name', 'task__assignee__email',
+        )
+    ):
+        columns[Status(status)].append({
+            'id': pk,
+            'task_name': name,
+            'priority': Priorities(priority).label,
+            'due_date': due_date,
+            'is_overdue': is_overdue,
+            'assignee': first_name or email,
+        })
+    return list(columns.items())
+
+
+def column_ranks(project, task, status, *task_ids):
+    """{task id: rank} of the given cards, if they are in the `status` column besides `task`"""
+    ranks = dict(
+        ProjectTask.objects
+        .filter(project=project, task_id__in=[pk for pk in task_ids if pk is not None])
+        .filter(task__status=status)
+        .exclude(task=task)
+        .values_list('task_id', 'rank')
+    )
+    if any(pk is not None and pk not in ranks for pk in task_ids):
+        raise StaleBoard("the card's neighbours are not in that column any more")
+    return ranks
+
+
+def is_tie(ranks, before_id, after_id):
+    return before_id is not None and after_id is not None and ranks[before_id] == ranks[after_id]
+
+
+def move_card(project, task, status, before_id=None, after_id=None):
+    """
+    Put `task` in the `status` column of `project`'s board, between the cards of
+    tasks `before_id` (above) and `after_id` (below); None is the column's top / bottom.
+    Returns the card's new rank.
+    """
+    neighbours = column_ranks(project, task, status, before_id, after_id)
+    if is_tie(neighbours, before_id, after_id):
+        # cards added by two processes in the same microsecond share a key: spread the column out first
+        rebalance_column(project.pk, status, force=True)
+        neighbours = column_ranks(project, task, status, before_id, after_id)
+    try:
+        rank = rank_between(neighbours.get(before_id), neighbours.get(after_id))
+    except ValueError as error:
+        raise StaleBoard(str(error)) from error
+
+    ProjectTask.objects.filter(project=project, task=task).update(rank=rank)
+    if task.status != status:
+        task.status = status
+        task.save(update_fields=['status'])
+
+    if len(rank) > settings.BOARD_RANK_MAX_LENGTH:
+        from .jobs import enqueue
+        enqueue('rebalance_board', {'project_id': project.pk, 'status': status})
+    return rank
+
+
+def rebalance_column(project_id, status, batch_size=1000, force=False):
+    """Rewrite one column's ranks with evenly spaced short keys, keeping the card order"""
+    with transaction.atomic():
+        cards = list(
+            ProjectTask.objects
+            .filter(project_id=project_id, task__status=status)
+            .order_by('rank', 'task_id')
+            .only('pk', 'rank')
+        )
+        if not force and all(len(card.rank) <= settings.BOARD_RANK_MAX_LENGTH for card in cards):
+            # another move already queued a rebalance that ran first
+            return 0
+        for card, rank in zip(cards, spread_ranks(len(cards))):
+            card.rank = rank
+        ProjectTask.objects.bulk_update(cards, ['rank'], batch_size=batch_size)
+    return len(cards)
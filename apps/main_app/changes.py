@@ -0,0 +1,132 @@
+"""
+Change tracking for Task and Project.
+
+Every create, update, delete and M2M change appends a ChangeLogEntry holding
+a compact snapshot of the object's current state (M2M memberships included),
+so a polling client only needs the newest entry per object to be in sync.
+The same receivers keep updated_at current on both ends of M2M changes.
+
+Receivers are connected from TasksConfig.ready().
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ChangeAction, ChangeLogEntry, Priorities, Project, Status, Task
+from .saved_views import forget_saved_view_pages
+
+SNAPSHOT_FIELDS = {
+    Task: (
+        'task_name', 'status', 'priority', 'due_date', 'assignee_id', 'creator_id', 'is_overdue', 'updated_at',
+    ),
+    Project: (
+        'project_name', 'status', 'priority', 'task_count', 'creator_id', 'updated_at',
+    ),
+}
+
+# snapshot key -> (through model, column pointing at the object, column pointing at the member)
+SNAPSHOT_M2M = {
+    Task: {
+        'project_ids': (Project.tasks.through, 'task_id', 'project_id'),
+        'collaborator_ids': (Task.collaborators.through, 'task_id', 'user_id'),
+    },
+    Project: {
+        'collaborator_ids': (Project.collaborators.through, 'project_id', 'user_id'),
+    },
+}
+
+
+# integer-coded columns go out as their labels, as they did when the labels were stored
+LABELS = {'status': Status, 'priority': Priorities}
+
+
+def kind_of(model):
+    return model._meta.model_name
+
+
+def snapshots(model, pks):
+    """Return {pk: snapshot} for the given objects, one query per table"""
+    rows = {row.pop('id'): row for row in model.objects.filter(pk__in=pks).values('id', *SNAPSHOT_FIELDS[model])}
+    for row in rows.values():
+        for field, choices in LABELS.items():
+            row[field] = choices(row[field]).label
+
+    for key, (through, own, other) in SNAPSHOT_M2M[model].items():
+        for row in rows.values():
+            row[key] = []
+        members = through.objects.filter(**{f'{own}__in': list(rows)}).order_by(own, other).values_list(own, other)
+        for own_id, other_id in members:
+            rows[own_id][key].append(other_id)
+
+    return rows
+
+
+def record_changes(model, pks, action):
+    """Append one log entry per object; deleted objects get a tombstone without data"""
+    pks = list(pks)
+    if not pks:
+        return []
+    now = timezone.now()
+    data = {} if action == ChangeAction.DELETE else snapshots(model, pks)
+    if model is Task:
+        # deleted tasks only leave views, which drop them when loading their rows
+        forget_saved_view_pages(data.values())
+    return ChangeLogEntry.objects.bulk_create([
+        ChangeLogEntry(kind=kind_of(model), object_id=pk, action=action, data=data.get(pk), changed_at=now)
+        for pk in pks
+        if action == ChangeAction.DELETE or pk in data
+    ])
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Project)
+def log_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    record_changes(sender, [instance.pk], ChangeAction.CREATE if created else ChangeAction.UPDATE)
+
+
+@receiver(pre_delete, sender=Project)
+def remember_project_tasks(sender, instance, **kwargs):
+    # tasks lose this project through the cascade, without an m2m_changed signal
+    instance._deleted_with_task_ids = list(instance.tasks.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Project)
+def log_delete(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk], ChangeAction.DELETE)
+
+    if sender is Task:
+        record_changes(Project, instance.__dict__.get('_deleted_from_project_ids', []), ChangeAction.UPDATE)
+    else:
+        record_changes(Task, instance.__dict__.pop('_deleted_with_task_ids', []), ChangeAction.UPDATE)
+
+
+def _through_fk(through, model):
+    for field in through._meta.fields:
+        if field.is_relation and field.related_model is model:
+            return field.attname
+
+
+@receiver(m2m_changed, sender=Project.tasks.through)
+@receiver(m2m_changed, sender=Project.collaborators.through)
+@receiver(m2m_changed, sender=Task.collaborators.through)
+def track_m2m_change(sender, instance, action, model, pk_set, **kwargs):
+    # an M2M change modifies both ends: bump updated_at and log a fresh snapshot of each
+    cleared_key = f'_cleared_{sender._meta.model_name}'
+    if action == 'pre_clear':
+        instance.__dict__[cleared_key] = list(
+            sender.objects.filter(**{_through_fk(sender, type(instance)): instance.pk})
+            .values_list(_through_fk(sender, model), flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    other_pks = instance.__dict__.pop(cleared_key, []) if action == 'post_clear' else pk_set
+    now = timezone.now()
+    for cls, pks in ((type(instance), [instance.pk]), (model, other_pks)):
+        if cls in (Task, Project) and pks:
+            cls.objects.filter(pk__in=pks).touch(now)
+            record_changes(cls, pks, ChangeAction.M2M)
@@ -0,0 +1,160 @@
+"""
+Live task/project events for Server-Sent Events clients.
+
+One pump per process tails the change log (ChangeLogEntry) with a single
+indexed query per poll interval, whatever the number of open connections, and
+fans every entry out in-process to the subscribed connections. Each
+connection has a bounded buffer: a client that falls too far behind gets one
+"resync" event instead of an ever-growing queue.
+"""
+import asyncio
+import json
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+
+from .access import accessible_project_ids, task_access
+from .models import ChangeAction, ChangeLogEntry, Task
+
+RESYNC = object()
+
+
+class Subscription:
+    def __init__(self, loop, buffer_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        # the broadcaster's pump has read its starting point (Broadcaster.started)
+        self.started = None
+
+    def offer(self, event):
+        # runs on the subscriber's event loop
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Broadcaster:
+    def __init__(self, buffer_size=None, poll_interval=None):
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.pump = None
+        # set once the pump knows where the change log ends: it publishes every entry after it
+        self.started = None
+
+    def subscribe(self):
+        """Register a connection; must be called from inside its event loop"""
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(loop, self.buffer_size or settings.EVENTS_BUFFER_SIZE)
+        with self.lock:
+            self.subscribers.add(subscription)
+        if self.pump is None or self.pump.done():
+            self.started = asyncio.Event()
+            self.pump = loop.create_task(self.run_pump(self.started))
+        subscription.started = self.started
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+            idle = not self.subscribers
+        if idle and self.pump is not None:
+            # nobody listens any more: stop polling the change log
+            self.pump.get_loop().call_soon_threadsafe(self.pump.cancel)
+            self.pump = None
+
+    def publish(self, event):
+        """Hand an event to every subscriber; safe to call from any thread"""
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.offer, event)
+
+    async def run_pump(self, started):
+        last_seq = await sync_to_async(latest_seq)()
+        started.set()
+        while self.subscribers:
+            entries = await sync_to_async(entries_after)(last_seq)
+            for entry in entries:
+                self.publish(entry)
+                last_seq = entry.seq
+            if len(entries) < settings.CHANGE_FEED_PAGE_SIZE:
+                await asyncio.sleep(self.poll_interval or settings.EVENTS_POLL_INTERVAL)
+
+
+broadcaster = Broadcaster()
+
+
+def settled_entries():
+    """
+    The change log without its last CHANGE_FEED_SETTLE_SECONDS: on PostgreSQL a lower seq can
+    commit after a higher one, and a reader that moved past the higher one would never see it
+    """
+    entries = ChangeLogEntry.objects.all()
+    if settings.CHANGE_FEED_SETTLE_SECONDS:
+        entries = entries.filter(changed_at__lte=timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS))
+    return entries
+
+
+def latest_seq():
+    return settled_entries().aggregate(seq=Max('seq'))['seq'] or 0
+
+
+def entries_after(seq, limit=None):
+    return list(settled_entries().filter(seq__gt=seq).order_by('seq')[:limit or settings.CHANGE_FEED_PAGE_SIZE])
+
+
+class EventScope:
+    """Decides which change events a user may see"""
+
+    def __init__(self, user_id, project_ids, task_ids):
+        self.user_id = user_id
+        self.project_ids = set(project_ids)
+        self.task_ids = set(task_ids)
+
+    @classmethod
+    def for_user(cls, user):
+        # the same reach as the views (access.py), superusers included: a stream follows memberships
+        project_ids = accessible_project_ids(user)
+        task_ids = Task.objects.filter(task_access(user)).values_list('pk', flat=True)
+        return cls(user.pk, project_ids, task_ids)
+
+    def allows(self, entry):
+        known = self.project_ids if entry.kind == 'project' else self.task_ids
+        if entry.action == ChangeAction.DELETE:
+            if entry.object_id in known:
+                known.discard(entry.object_id)
+                return True
+            return False
+
+        data = entry.data or {}
+        people = {data.get('creator_id'), data.get('assignee_id'), *data.get('collaborator_ids', [])}
+        member = self.user_id in people or bool(self.project_ids.intersection(data.get('project_ids', [])))
+        was_known = entry.object_id in known
+
+        # memberships change: start following the object, or send this last event and stop
+        if member:
+            known.add(entry.object_id)
+        else:
+            known.discard(entry.object_id)
+        return member or was_known
+
+
+def format_event(entry):
+    payload = json.dumps(
+        {'id': entry.object_id, 'action': entry.action, 'data': entry.data},
+        cls=DjangoJSONEncoder, separators=(',', ':'),
+    )
+    return f"id: {entry.seq}\nevent: {entry.kind}\ndata: {payload}\n\n"
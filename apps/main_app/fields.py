@@ -0,0 +1,55 @@
+"""
+Integer-coded choice columns.
+
+Status and priority are stored as small integers whose numeric order is their
+semantic order (Backlog < To do < In progress < Done, Low < ... < Urgent), so
+the database sorts and compares them directly. People never see the codes:
+forms post the labels, templates show them and the filter parameters take
+them, exactly as when the labels were the stored values.
+"""
+from django import forms
+from django.db import models
+
+
+class CodedChoices(models.IntegerChoices):
+    @classmethod
+    def parse(cls, value):
+        """The member for a label (any case) or a code, e.g. "done", "Done", "4" or 4; None if neither"""
+        if isinstance(value, cls):
+            return value
+        text = str(value).strip()
+        for member in cls:
+            if text.lower() == member.label.lower() or text == str(member.value):
+                return member
+        return None
+
+
+class LabelChoiceField(forms.TypedChoiceField):
+    """A select whose options are the labels; cleans to the integer code"""
+
+    def __init__(self, *, choices=(), coerce=None, **kwargs):
+        self.codes = {str(label): value for value, label in choices if value != ''}
+        super().__init__(
+            choices=[(str(label) if value != '' else '', label) for value, label in choices],
+            coerce=self.codes.__getitem__,
+            **kwargs,
+        )
+
+    def code_to_label(self, value):
+        for label, code in self.codes.items():
+            if str(value).strip().lower() in (label.lower(), str(code)):
+                return label
+        return value
+
+    def to_python(self, value):
+        # also accept the code itself, and any letter case
+        return self.code_to_label(super().to_python(value))
+
+    def prepare_value(self, value):
+        # an instance's code shows as its selected label
+        return self.code_to_label(value) if value not in self.empty_values else value
+
+
+class ChoiceCodeField(models.PositiveSmallIntegerField):
+    def formfield(self, **kwargs):
+        return super().formfield(**{'choices_form_class': LabelChoiceField, **kwargs})
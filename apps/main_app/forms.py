@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from .models import Task, Project
+from .fields import LabelChoiceField
+from .models import Priorities, Status, Task, Project
+from .saved_views import page_sorts
 from django import forms
 
 User = get_user_model()
@@ -25,6 +27,18 @@ class TaskCreationForm(forms.ModelForm):
         self.fields['collaborators'].queryset = User.objects.all()
         self.fields['collaborators'].required = False
 
+
+class TaskImportForm(TaskCreationForm):
+    """TaskCreationForm's rules for one imported row; people and projects are resolved by the importer"""
+
+    class Meta(TaskCreationForm.Meta):
+        fields = ['task_name', 'task_description', 'status', 'priority', 'due_date']
+
+    def __init__(self, *args, **kwargs):
+        # no user fields here: skip TaskCreationForm's querysets for them
+        forms.ModelForm.__init__(self, *args, **kwargs)
+
+
 class ProjectCreationForm(forms.ModelForm):
     class Meta:
         model = Project
@@ -36,3 +50,26 @@ class ProjectCreationForm(forms.ModelForm):
         self.fields['collaborators'].queryset = User.objects.all()
         self.fields['tasks'].required = False
         self.fields['collaborators'].required = False
+
+
+class SavedViewForm(forms.Form):
+    """A page's filters and sort under a name; spec() is what SavedView stores"""
+    name = forms.CharField(max_length=100)
+    status = LabelChoiceField(choices=[('', 'All statuses'), *Status.choices], required=False)
+    priority = LabelChoiceField(choices=[('', 'All priorities'), *Priorities.choices], required=False)
+    overdue = forms.BooleanField(required=False)
+    sort = forms.ChoiceField(required=False)
+
+    def __init__(self, *args, project_id=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the sorts the page the view opens on understands
+        self.fields['sort'].choices = [('', 'Default'), *((sort, sort) for sort in page_sorts(project_id))]
+
+    def spec(self):
+        data = self.cleaned_data
+        return {
+            'status': data['status'] or None,
+            'priority': data['priority'] or None,
+            'overdue': data['overdue'],
+            'sort': data['sort'] or None,
+        }
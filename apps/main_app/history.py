@@ -0,0 +1,37 @@
+"""
+Task status history.
+
+Every status change of a task, its creation included, appends one
+StatusTransition. Saves through the ORM are recorded by the post_save receiver
+below (Task.from_db remembers the status a task was loaded with); code that
+changes statuses in bulk calls record_transitions() itself.
+
+Receivers are connected from TasksConfig.ready().
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import StatusTransition, Task
+
+
+def record_transitions(rows, now=None):
+    """Append (task id, from status, to status, assignee id) rows in one INSERT"""
+    now = now or timezone.now()
+    return StatusTransition.objects.bulk_create([
+        StatusTransition(
+            task_id=task_id, from_status=from_status, to_status=to_status,
+            assignee_id=assignee_id, changed_at=now,
+        )
+        for task_id, from_status, to_status, assignee_id in rows
+    ])
+
+
+@receiver(post_save, sender=Task)
+def log_status_change(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance.__dict__.get('_loaded_status')
+    if created or (previous is not None and previous != instance.status):
+        record_transitions([(instance.pk, previous, instance.status, instance.assignee_id)])
+    instance._loaded_status = instance.status
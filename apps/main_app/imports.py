@@ -0,0 +1,224 @@
+"""
+Bulk task import from CSV or JSON Lines.
+
+Rows are streamed one at a time, checked against TaskCreationForm's rules
+(TaskImportForm) and inserted `batch_size` at a time: one bulk INSERT for the
+tasks and one per link table, in one transaction per batch. Assignees and
+collaborators (by email) and projects (by name) are resolved through dicts
+loaded with one query each before the first row. Rows that fail go to a
+reject file, in the input format, with their line number and the reasons.
+
+Columns / keys: task_name, task_description, status, priority, due_date,
+assignee, collaborators, projects. In CSV, collaborators and projects are
+separated by ";"; in JSON Lines they may also be lists.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .access import visible_projects
+from .changes import record_changes
+from .forms import TaskImportForm
+from .history import record_transitions
+from .jobs import report_progress
+from .models import ChangeAction, Project, Task
+
+User = get_user_model()
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+COLUMNS = (
+    'task_name', 'task_description', 'status', 'priority', 'due_date', 'assignee', 'collaborators', 'projects',
+)
+LIST_SEPARATOR = ';'
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported file type {extension or filename!r}, expected .csv or .jsonl")
+    return FORMATS[extension]
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row) from a binary stream without reading it whole; bad JSON lines yield the raw text"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, line.rstrip('\r\n')
+
+
+def split_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(LIST_SEPARATOR)
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+class RejectWriter:
+    """Writes rejected rows in the input format, with their line number and errors"""
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        self.count = 0
+        if fmt == 'csv':
+            self.writer = csv.DictWriter(stream, fieldnames=['line', *COLUMNS, 'errors'], extrasaction='ignore')
+            self.writer.writeheader()
+
+    def write(self, line, row, errors):
+        self.count += 1
+        if not isinstance(row, dict):
+            row = {'raw': row}
+        if self.fmt == 'csv':
+            self.writer.writerow({**row, 'line': line, 'errors': '; '.join(errors)})
+        else:
+            self.stream.write(json.dumps({'line': line, **row, 'errors': errors}, default=str) + '\n')
+
+
+class TaskImporter:
+    def __init__(self, creator=None, batch_size=None):
+        self.creator = creator
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.imported = 0
+        self.rejected = 0
+
+        self.users = {email.lower(): pk for pk, email in User.objects.values_list('pk', 'email')}
+        # a name shared by several projects is ambiguous: None; an uploader only files tasks into their projects
+        projects = visible_projects(creator) if creator is not None else Project.objects.all()
+        self.projects = {}
+        for pk, name in projects.values_list('pk', 'project_name'):
+            self.projects[name] = None if name in self.projects else pk
+
+    def run(self, rows, rejects=None):
+        """Import (line number, row) pairs; returns the counts"""
+        batch = []
+        for line, row in rows:
+            entry, errors = self.build(row)
+            if errors:
+                self.rejected += 1
+                if rejects is not None:
+                    rejects.write(line, row, errors)
+                continue
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        self.flush(batch)
+        return {'imported': self.imported, 'rejected': self.rejected}
+
+    def build(self, row):
+        """Return ((task, collaborator ids, project ids), errors) for one row"""
+        if not isinstance(row, dict):
+            return None, ["Invalid JSON object"]
+
+        # the form's fields, used directly: a form instance per row would deep-copy them every time
+        cleaned, errors = {}, []
+        for name, field in TaskImportForm.base_fields.items():
+            try:
+                cleaned[name] = field.clean(row.get(name) or '')
+            except ValidationError as error:
+                errors.append(f"{name}: {' '.join(error.messages)}")
+
+        assignee_id = None
+        if row.get('assignee'):
+            assignee_id = self.users.get(str(row['assignee']).strip().lower())
+            if assignee_id is None:
+                errors.append(f"assignee: unknown user {row['assignee']}")
+
+        collaborator_ids = []
+        for email in split_list(row.get('collaborators')):
+            if email.lower() in self.users:
+                collaborator_ids.append(self.users[email.lower()])
+            else:
+                errors.append(f"collaborators: unknown user {email}")
+
+        project_ids = []
+        for name in split_list(row.get('projects')):
+            if self.projects.get(name):
+                project_ids.append(self.projects[name])
+            elif name in self.projects:
+                errors.append(f"projects: several projects are named {name}")
+            else:
+                errors.append(f"projects: unknown project {name}")
+
+        if errors:
+            return None, errors
+
+        task = Task(**cleaned, assignee_id=assignee_id, creator=self.creator)
+        # bulk_create skips save(): set the denormalised flag here
+        task.is_overdue = task.compute_overdue()
+        return (task, set(collaborator_ids), set(project_ids)), []
+
+    def flush(self, batch):
+        if not batch:
+            return
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create([task for task, _, _ in batch])
+            Task.collaborators.through.objects.bulk_create([
+                Task.collaborators.through(task_id=task.pk, user_id=user_id)
+                for task, collaborator_ids, _ in batch
+                for user_id in collaborator_ids
+            ])
+            Project.tasks.through.objects.bulk_create([
+                Project.tasks.through(project_id=project_id, task_id=task.pk)
+                for task, _, project_ids in batch
+                for project_id in project_ids
+            ])
+
+            # no save() or m2m_changed signals: counters, change log and status history for the whole batch
+            project_ids = sorted({project_id for _, _, ids in batch for project_id in ids})
+            Project.objects.recount_tasks(project_ids)
+            record_changes(Task, [task.pk for task in tasks], ChangeAction.CREATE)
+            record_transitions((task.pk, None, task.status, task.assignee_id) for task in tasks)
+            record_changes(Project, project_ids, ChangeAction.UPDATE)
+
+        self.imported += len(tasks)
+        report_progress(imported=self.imported, rejected=self.rejected)
+
+
+def import_upload(upload, fmt, user_id=None, batch_size=None):
+    """Import an uploaded file from default storage, keep its reject file there, delete the upload"""
+    creator = User.objects.filter(pk=user_id).first()
+    importer = TaskImporter(creator=creator, batch_size=batch_size)
+
+    with tempfile.TemporaryFile('w+', encoding='utf-8', newline='') as reject_file:
+        rejects = RejectWriter(reject_file, fmt)
+        with default_storage.open(upload, 'rb') as stream:
+            result = importer.run(read_rows(stream, fmt), rejects)
+
+        result['rejects'] = None
+        if rejects.count:
+            reject_file.seek(0)
+            stem, extension = os.path.splitext(upload)
+            result['rejects'] = default_storage.save(f"{stem}-rejects{extension}", File(reject_file))
+
+    default_storage.delete(upload)
+    return result
+
+
+def save_upload(uploaded_file):
+    """Store an uploaded import file for the worker; returns its storage name"""
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    return default_storage.save(f"{settings.IMPORT_UPLOAD_DIR}/tasks-{stamp}{extension}", uploaded_file)
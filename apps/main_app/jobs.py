@@ -0,0 +1,215 @@
+"""
+Database-backed background job queue.
+
+Jobs are rows in the Job table. Views enqueue them and return immediately;
+`manage.py run_workers` claims and runs them. Handlers are plain functions
+registered with @job and receive the job payload as keyword arguments; their
+return value (JSON-serialisable) is stored as the job result.
+"""
+import logging
+import traceback
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .changes import record_changes
+from .history import record_transitions
+from .models import ChangeAction, Job, JobStatus, Priorities, Project, Status, Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+# the job run_job() is running in this thread, for report_progress()
+_current_job = ContextVar('current_job', default=None)
+
+
+def job(name):
+    """Register a function as the handler for jobs called `name`"""
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=0, user=None, max_attempts=3, run_after=None):
+    """Queue a job and return it without waiting for it to run"""
+    if name not in registry:
+        raise LookupError(f"Unknown job: {name}")
+
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=run_after or timezone.now(),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def claim_next(worker_id):
+    """Atomically take the next ready job for this worker, or return None"""
+    now = timezone.now()
+    ready = Job.objects.filter(status=JobStatus.QUEUED, run_after__lte=now).order_by('-priority', 'run_after', 'pk')
+
+    if connections[ready.db].features.has_select_for_update_skip_locked:
+        # PostgreSQL: rows locked by other workers are skipped, never waited on
+        with transaction.atomic(using=ready.db):
+            claimed = ready.select_for_update(skip_locked=True).first()
+            if claimed is None:
+                return None
+            claimed.status = JobStatus.RUNNING
+            claimed.locked_by = worker_id
+            claimed.locked_at = now
+            claimed.attempts += 1
+            claimed.save(update_fields=['status', 'locked_by', 'locked_at', 'attempts'])
+            return claimed
+
+    # SQLite has no row locks: claim with a conditional UPDATE, only one worker can win a row
+    for pk in ready.values_list('pk', flat=True)[:10]:
+        won = Job.objects.filter(pk=pk, status=JobStatus.QUEUED).update(
+            status=JobStatus.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if won:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def report_progress(**progress):
+    """
+    Store progress of the running job where JobStatusView can show it; no-op outside jobs.
+
+    Also the job's heartbeat: locked_at moves forward, so requeue_stale() leaves a
+    job alone for as long as it keeps reporting. Handlers that may run longer than
+    JOB_QUEUE_STALE_AFTER must report progress more often than that.
+    """
+    current = _current_job.get()
+    if current is not None:
+        Job.objects.filter(pk=current.pk).update(progress=progress, locked_at=timezone.now())
+
+
+def run_job(claimed):
+    """Run a claimed job and record its result, or schedule a retry"""
+    handler = registry.get(claimed.name)
+    token = _current_job.set(claimed)
+    try:
+        if handler is None:
+            raise LookupError(f"Unknown job: {claimed.name}")
+        result = handler(**claimed.payload)
+    except Exception:
+        logger.exception("Job %s failed", claimed.pk)
+        claimed.last_error = traceback.format_exc()
+        if claimed.attempts < claimed.max_attempts:
+            # exponential backoff: 2s, 4s, 8s, ...
+            claimed.status = JobStatus.QUEUED
+            claimed.run_after = timezone.now() + timedelta(seconds=2 ** claimed.attempts)
+        else:
+            claimed.status = JobStatus.FAILED
+            claimed.finished_at = timezone.now()
+    else:
+        claimed.status = JobStatus.DONE
+        claimed.result = result
+        claimed.finished_at = timezone.now()
+    finally:
+        _current_job.reset(token)
+
+    claimed.locked_by = ''
+    # progress is written by the handler itself, keep it
+    claimed.save(update_fields=['status', 'result', 'last_error', 'run_after', 'finished_at', 'locked_by'])
+    return claimed
+
+
+def requeue_stale(stale_after=None):
+    """
+    Put back jobs whose worker died while running them, or fail them once out of attempts.
+
+    A job counts as dead when its heartbeat (locked_at, see report_progress) is
+    older than JOB_QUEUE_STALE_AFTER. Returns (requeued, failed).
+    """
+    stale_after = stale_after or settings.JOB_QUEUE_STALE_AFTER
+    now = timezone.now()
+    stale = Job.objects.filter(status=JobStatus.RUNNING, locked_at__lt=now - timedelta(seconds=stale_after))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=JobStatus.FAILED, locked_by='', locked_at=None, finished_at=now,
+        last_error=f"Worker stopped responding for over {stale_after}s",
+    )
+    requeued = stale.update(status=JobStatus.QUEUED, locked_by='', locked_at=None)
+    return requeued, failed
+
+
+# ===========================
+# Job handlers
+# ===========================
+
+@job('project_report')
+def project_report(project_id):
+    from .reports import build_project_report, store_report
+
+    project = Project.objects.get(pk=project_id)
+    report = build_project_report(project)
+    # the report page serves it from now on
+    store_report(report)
+    return report
+
+
+@job('refresh_project_report')
+def refresh_project_report(project_id):
+    from .reports import refresh_project_report as refresh
+
+    report = refresh(project_id)
+    return {'generated_at': report['generated_at']} if report else None
+
+
+@job('recount_project_tasks')
+def recount_project_tasks(project_ids):
+    updated = Project.objects.recount_tasks(project_ids)
+    record_changes(Project, project_ids, ChangeAction.UPDATE)
+    return {'updated': updated}
+
+
+@job('bulk_update_tasks')
+def bulk_update_tasks(task_ids, status=None, priority=None):
+    # codes, or the labels jobs were queued with before the columns held codes
+    status = Status.parse(status) if status else None
+    priority = Priorities.parse(priority) if priority else None
+    changes = {}
+    if status:
+        changes['status'] = status
+    if priority:
+        changes['priority'] = priority
+
+    tasks = Task.objects.filter(pk__in=task_ids)
+    with transaction.atomic():
+        # update() skips save() and its status history receiver
+        transitions = list(tasks.exclude(status=status).values_list('pk', 'status', 'assignee_id')) if status else []
+        updated = tasks.update(**changes, updated_at=timezone.now()) if changes else 0
+        record_transitions((pk, previous, status, assignee_id) for pk, previous, assignee_id in transitions)
+    if status:
+        tasks.sync_overdue()
+    record_changes(Task, task_ids, ChangeAction.UPDATE)
+    return {'updated': updated}
+
+
+@job('purge_project')
+def purge_project(project_id, batch_size=1000):
+    from .purge import purge_project as purge
+
+    return purge(project_id, batch_size)
+
+
+@job('rebalance_board')
+def rebalance_board(project_id, status):
+    from .board import rebalance_column
+
+    return {'ranked': rebalance_column(project_id, status)}
+
+
+@job('import_tasks')
+def import_tasks(upload, format, user_id=None):
+    from .imports import import_upload
+
+    return import_upload(upload, format, user_id)
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.main_app.archive import archive_done_tasks
+
+
+class Command(BaseCommand):
+    help = "Move Done tasks untouched for a while, with their links, into the archive tables in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.ARCHIVE_DONE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        moved = archive_done_tasks(options['older_than_days'], options['batch_size'])
+        self.stdout.write(f"Archived {moved} task(s).")
@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Django's stock connection; SQLITE_PRAGMAS; SQLITE_PRAGMAS with SQLITE_IMMEDIATE_WRITES
+PROFILES = ('default', 'production', 'immediate')
+
+SCHEMA = """
+CREATE TABLE task (
+    id INTEGER PRIMARY KEY, task_name TEXT, status TEXT, priority TEXT,
+    assignee_id INTEGER, due_date TEXT, updated_at TEXT
+);
+CREATE INDEX task_assignee_idx ON task (assignee_id, due_date);
+CREATE TABLE changelog (seq INTEGER PRIMARY KEY, object_id INTEGER, action TEXT, changed_at TEXT);
+"""
+READ = "SELECT id, task_name, status, priority, due_date FROM task WHERE assignee_id = ? ORDER BY due_date LIMIT 50"
+ASSIGNEES = 100
+
+
+def connect(path, pragmas):
+    # what a Django connection runs with the profile's OPTIONS (Python's default 5 s busy timeout included)
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name}={value}')
+    return connection
+
+
+def worker(path, pragmas, begin, role, seconds, seed):
+    """Run reads or read-modify-write transactions for `seconds`; returns (ops, errors, latencies)"""
+    connection = connect(path, pragmas)
+    task_count = connection.execute('SELECT COUNT(*) FROM task').fetchone()[0]
+    rng = random.Random(seed)
+    ops, errors, latencies = 0, 0, []
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == 'read':
+                connection.execute(READ, (rng.randrange(ASSIGNEES),)).fetchall()
+            else:
+                # the shape of a write view: read the row, update it, append to the change log
+                task_id = rng.randrange(1, task_count + 1)
+                now = datetime.now(timezone.utc).isoformat()
+                connection.execute(begin)
+                connection.execute('SELECT status FROM task WHERE id = ?', (task_id,)).fetchone()
+                connection.execute(
+                    'UPDATE task SET priority = ?, updated_at = ? WHERE id = ?',
+                    (rng.choice(['Low', 'Medium', 'High', 'Urgent']), now, task_id),
+                )
+                connection.execute(
+                    "INSERT INTO changelog (object_id, action, changed_at) VALUES (?, 'update', ?)", (task_id, now),
+                )
+                connection.execute('COMMIT')
+        except sqlite3.OperationalError:
+            # "database is locked": the request would have failed
+            errors += 1
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            continue
+        ops += 1
+        latencies.append(time.perf_counter() - start)
+
+    connection.close()
+    return ops, errors, latencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read/write throughput of concurrent processes on a scratch SQLite file, "
+        "with Django's stock connection settings and with SQLITE_PRAGMAS (the production profile)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=50000)
+        parser.add_argument('--profile', dest='profiles', action='append', choices=PROFILES)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'profile':<11} {'reads/s':>9} {'writes/s':>9} {'locked':>7} {'read p95 ms':>12} {'write p95 ms':>13}"
+        )
+        for profile in options['profiles'] or PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite')
+                self.create_database(path, options['rows'])
+                self.run_profile(path, profile, options)
+
+    def create_database(self, path, rows):
+        connection = sqlite3.connect(path)
+        connection.executescript(SCHEMA)
+        start = datetime.now(timezone.utc)
+        connection.executemany(
+            'INSERT INTO task (task_name, status, priority, assignee_id, due_date, updated_at) '
+            "VALUES (?, 'To do', 'Low', ?, ?, ?)",
+            (
+                (f'Task {n}', n % ASSIGNEES, (start + timedelta(hours=n)).isoformat(), start.isoformat())
+                for n in range(rows)
+            ),
+        )
+        connection.commit()
+        connection.close()
+
+    def run_profile(self, path, profile, options):
+        roles = ['read'] * options['readers'] + ['write'] * options['writers']
+        pragmas = {} if profile == 'default' else settings.SQLITE_PRAGMAS
+        begin = 'BEGIN IMMEDIATE' if profile == 'immediate' else 'BEGIN'
+        # separate processes, like gunicorn workers: no shared connection, no GIL between them
+        with multiprocessing.get_context('spawn').Pool(len(roles)) as pool:
+            results = pool.starmap(worker, [
+                (path, pragmas, begin, role, options['seconds'], seed) for seed, role in enumerate(roles)
+            ])
+
+        totals = {}
+        for role, (ops, errors, latencies) in zip(roles, results):
+            total = totals.setdefault(role, [0, 0, []])
+            total[0] += ops
+            total[1] += errors
+            total[2] += latencies
+
+        def rate(role):
+            return totals.get(role, [0])[0] / options['seconds']
+
+        def p95(role):
+            latencies = totals.get(role, [0, 0, []])[2]
+            return statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else 0
+
+        locked = sum(total[1] for total in totals.values())
+        self.stdout.write(
+            f"{profile:<11} {rate('read'):>9.0f} {rate('write'):>9.0f} {locked:>7} "
+            f"{p95('read'):>12.1f} {p95('write'):>13.1f}"
+        )
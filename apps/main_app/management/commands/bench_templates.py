@@ -0,0 +1,88 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.middleware.csrf import get_token
+from django.template import engines
+from django.test import RequestFactory
+from django.utils import timezone
+
+from apps.main_app.models import Priorities, Project, Status, Task
+
+TEMPLATES = [
+    'main_app/partials/my_tasks_table.html',
+    'main_app/partials/project_tasks.html',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering of the task list templates under each template engine. "
+        "Rows are created in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--engine', dest='engines', action='append', choices=['django', 'jinja2'])
+
+    def handle(self, *args, **options):
+        engine_names = options['engines'] or ['django', 'jinja2']
+        self.stdout.write(f"{'template':<40} {'engine':<8} {'rows':>6} {'best ms':>9} {'median ms':>10}")
+
+        with transaction.atomic():
+            user, project = self.create_rows(max(options['rows']))
+            request = RequestFactory().get('/tasks/', {'sort': 'due_date', 'priority': Priorities.HIGH.label})
+            request.user = user
+
+            for rows in options['rows']:
+                # query once up front: only rendering is timed
+                tasks = list(
+                    Task.objects.filter(assignee=user)
+                    .select_related('assignee').prefetch_related('projects')
+                    .order_by('due_date')[:rows]
+                )
+                # same context as the views (see ListTemplateEngineMixin)
+                context = {'tasks': tasks, 'project_id': project.pk, 'user': user, 'csrf_token': get_token(request)}
+
+                for template_name in TEMPLATES:
+                    for engine in engine_names:
+                        template = engines[engine].get_template(template_name)
+                        timings = []
+                        for _ in range(options['repeat']):
+                            start = time.perf_counter()
+                            template.render(context, request)
+                            timings.append((time.perf_counter() - start) * 1000)
+                        self.stdout.write(
+                            f"{template_name:<40} {engine:<8} {len(tasks):>6} "
+                            f"{min(timings):>9.1f} {statistics.median(timings):>10.1f}"
+                        )
+
+            transaction.set_rollback(True)
+
+    def create_rows(self, count):
+        user = get_user_model().objects.create_user(email=f"bench-{uuid.uuid4().hex}@example.com", first_name="Bench")
+        project = Project.objects.create(project_name="Template benchmark", project_description="", creator=user)
+        now = timezone.now()
+        statuses, priorities = Status.values, Priorities.values
+
+        tasks = Task.objects.bulk_create([
+            Task(
+                task_name=f"Task {n}",
+                task_description=f"Description of task {n} & <notes>",
+                status=statuses[n % len(statuses)],
+                priority=priorities[n % len(priorities)],
+                due_date=now + timedelta(hours=n),
+                creator=user,
+                assignee=user,
+            )
+            for n in range(count)
+        ], batch_size=1000)
+        Project.tasks.through.objects.bulk_create(
+            [Project.tasks.through(project_id=project.pk, task_id=task.pk) for task in tasks], batch_size=1000,
+        )
+        return user, project
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.main_app.models import ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = "Compact the change log: drop old entries superseded by a newer entry for the same object."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=7)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        batch_size = options['batch_size']
+
+        # every entry is a full snapshot, so the newest one per object is all a client needs;
+        # the newest entry (or the delete tombstone) is always kept
+        newer = ChangeLogEntry.objects.filter(
+            kind=OuterRef('kind'), object_id=OuterRef('object_id'), seq__gt=OuterRef('seq'),
+        )
+        superseded = ChangeLogEntry.objects.filter(changed_at__lt=cutoff).filter(Exists(newer))
+
+        total = 0
+        while True:
+            seqs = list(superseded.order_by('seq').values_list('seq', flat=True)[:batch_size])
+            if not seqs:
+                break
+            total += ChangeLogEntry.objects.filter(seq__in=seqs).delete()[0]
+
+        self.stdout.write(f"Removed {total} superseded change log entr{'y' if total == 1 else 'ies'}.")
@@ -0,0 +1,45 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.main_app.imports import RejectWriter, TaskImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream-import tasks from a CSV or JSON Lines file in batches. "
+        "Rows that fail validation are written to a reject file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Default: from the file extension")
+        parser.add_argument('--creator', help="Email of the user recorded as the tasks' creator")
+        parser.add_argument('--rejects', help="Where to write rejected rows (default: <path>.rejects)")
+        parser.add_argument('--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = options['format'] or detect_format(path)
+        except ValueError as error:
+            raise CommandError(error)
+
+        creator = None
+        if options['creator']:
+            creator = get_user_model().objects.filter(email__iexact=options['creator']).first()
+            if creator is None:
+                raise CommandError(f"Unknown user {options['creator']}")
+
+        rejects_path = options['rejects'] or f"{path}.rejects"
+        importer = TaskImporter(creator=creator, batch_size=options['batch_size'])
+        with open(path, 'rb') as stream, open(rejects_path, 'w', encoding='utf-8', newline='') as reject_file:
+            result = importer.run(read_rows(stream, fmt), RejectWriter(reject_file, fmt))
+
+        self.stdout.write(f"Imported {result['imported']} task(s), rejected {result['rejected']}.")
+        if result['rejected']:
+            self.stdout.write(f"Rejected rows: {rejects_path}")
+        else:
+            os.remove(rejects_path)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.main_app.models import Project
+from apps.main_app.purge import purge_project
+
+
+class Command(BaseCommand):
+    help = "Purge every project marked deleted whose purge job has not finished, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        project_ids = list(Project.all_objects.deleting().values_list('pk', flat=True))
+        for project_id in project_ids:
+            purge_project(project_id, options['batch_size'])
+        self.stdout.write(f"Purged {len(project_ids)} project(s).")
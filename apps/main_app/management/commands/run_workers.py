@@ -0,0 +1,88 @@
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from apps.main_app.jobs import claim_next, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = "Run background job workers from the database job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty.")
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_QUEUE_POLL_INTERVAL)
+        parser.add_argument(
+            '--requeue-interval', type=float, default=settings.JOB_QUEUE_STALE_AFTER / 2,
+            help="Seconds between checks for jobs whose worker died (default: half of JOB_QUEUE_STALE_AFTER).",
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.requeue_interval = options['requeue_interval']
+        self.next_requeue = 0
+        self.requeue_stale_jobs()
+
+        worker_args = [
+            (f"{socket.gethostname()}:{os.getpid()}:{n}", options['once'], options['poll_interval'])
+            for n in range(options['workers'])
+        ]
+
+        try:
+            if len(worker_args) == 1:
+                self.work(*worker_args[0])
+            else:
+                threads = [threading.Thread(target=self.work_in_thread, args=a, daemon=True) for a in worker_args]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stop.set()
+
+        self.stdout.write(f"Workers stopped after {self.processed} job(s).")
+
+    def work_in_thread(self, *args):
+        # every thread gets its own DB connection from Django, close it on the way out
+        try:
+            self.work(*args)
+        finally:
+            connection.close()
+
+    def work(self, worker_id, once, poll_interval):
+        while not self.stop.is_set():
+            if not connection.in_atomic_block:
+                close_old_connections()
+            claimed = claim_next(worker_id)
+            if claimed is None:
+                # an idle worker looks for jobs a dead worker left running; anything put back is run next
+                if self.requeue_stale_jobs():
+                    continue
+                if once:
+                    return
+                self.stop.wait(poll_interval)
+                continue
+
+            run_job(claimed)
+            with self.lock:
+                self.processed += 1
+            self.stdout.write(f"[{worker_id}] {claimed}")
+
+    def requeue_stale_jobs(self):
+        """Run requeue_stale() at most once per requeue interval across the threads; returns the number requeued"""
+        with self.lock:
+            if time.monotonic() < self.next_requeue:
+                return 0
+            self.next_requeue = time.monotonic() + self.requeue_interval
+        requeued, failed = requeue_stale()
+        if requeued or failed:
+            self.stdout.write(f"Requeued {requeued} stale job(s), failed {failed} out of attempts.")
+        return requeued
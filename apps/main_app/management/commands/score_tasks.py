@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.main_app.risk import score_open_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Score every open task's risk of missing its due date (Task.risk_score) from time left, priority, "
+        "status and its assignee's load and on-time record."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000, help="Tasks read per query")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Scores written per transaction")
+
+    def handle(self, *args, **options):
+        count = score_open_tasks(options['chunk_size'], options['batch_size'])
+        self.stdout.write(f"Scored {count} open task(s).")
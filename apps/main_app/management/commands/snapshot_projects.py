@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.main_app.snapshots import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Record today's task counts of every project (safe to re-run: the day's rows are replaced)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--day', help="Day to file the snapshot under, YYYY-MM-DD (default: today)")
+
+    def handle(self, *args, **options):
+        day = None
+        if options['day']:
+            try:
+                day = date.fromisoformat(options['day'])
+            except ValueError:
+                raise CommandError(f"Invalid day {options['day']!r}, expected YYYY-MM-DD")
+
+        count = take_snapshots(day)
+        self.stdout.write(f"Snapshot of {count} project(s) taken.")
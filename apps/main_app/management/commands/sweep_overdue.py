@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.main_app.changes import record_changes
+from apps.main_app.models import ChangeAction, Task
+
+
+class Command(BaseCommand):
+    help = "Flag tasks that became overdue (and unflag finished or rescheduled ones) in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+
+        flagged = self._sweep(Task.objects.newly_overdue(now), True, batch_size, now)
+        cleared = self._sweep(Task.objects.no_longer_overdue(now), False, batch_size, now)
+
+        self.stdout.write(f"Marked {flagged} task(s) overdue, cleared {cleared}.")
+
+    def _sweep(self, queryset, value, batch_size, now):
+        # per batch, one transaction: lock the selected ids that still match (SELECT ... FOR UPDATE
+        # re-checks the condition; on SQLite the transaction holds the write lock), update and log
+        # exactly those, so a task finished or rescheduled since the first SELECT is neither touched
+        # nor reported as changed; rows leave the candidate set once updated
+        total = 0
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return total
+            with transaction.atomic():
+                locked = list(queryset.select_for_update().filter(pk__in=ids).values_list('pk', flat=True))
+                total += queryset.filter(pk__in=locked).update(is_overdue=value, updated_at=now)
+                record_changes(Task, locked, ChangeAction.UPDATE)
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_is_overdue(apps, schema_editor):
+    Task = apps.get_model('main_app', 'Task')
+    Task.objects.filter(due_date__lt=timezone.now()).exclude(status='Done').update(is_overdue=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0006_remove_project_main_app_project_tasks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='is_overdue',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_is_overdue, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_overdue', True)), fields=['assignee', 'due_date'], name='task_overdue_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_overdue', False), models.Q(('status', 'Done'), _negated=True)), fields=['due_date'], name='task_overdue_candidate_idx'),
+        ),
+    ]
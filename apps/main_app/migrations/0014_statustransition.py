@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0013_projectsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('from_status', models.CharField(blank=True, choices=[('Backlog', 'Backlog'), ('To do', 'To Do'), ('In progress', 'In Progress'), ('Done', 'Done')], max_length=20)),
+                ('to_status', models.CharField(choices=[('Backlog', 'Backlog'), ('To do', 'To Do'), ('In progress', 'In Progress'), ('Done', 'Done')], max_length=20)),
+                ('assignee_id', models.BigIntegerField(blank=True, null=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task_id', 'changed_at'], name='transition_task_idx'), models.Index(fields=['to_status', 'changed_at', 'task_id'], name='transition_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Status / priority as small integers, step 1: code columns next to the label columns"""
+
+    dependencies = [
+        ('main_app', '0015_task_due_date_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # these index the label columns; 0018 recreates them on the codes
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_overdue_candidate_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_done_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='statustransition',
+            name='transition_status_idx',
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='priority_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='priority_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='statustransition',
+            name='from_status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='statustransition',
+            name='to_status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:00
+
+from django.db import migrations, transaction
+from django.db.models import Case, Max, Min, Value, When
+
+# the codes as of this migration; Status / Priorities in models.py may grow later
+STATUS = {'Backlog': 1, 'To do': 2, 'In progress': 3, 'Done': 4}
+PRIORITY = {'Low': 1, 'Medium': 2, 'High': 3, 'Urgent': 4}
+
+# model -> {label column: (codes, code for an unknown label)}
+COLUMNS = {
+    'project': {'status': (STATUS, 1), 'priority': (PRIORITY, 1)},
+    'task': {'status': (STATUS, 1), 'priority': (PRIORITY, 1)},
+    'archivedtask': {'status': (STATUS, 4), 'priority': (PRIORITY, 1)},
+    # '' (the task's creation) becomes NULL
+    'statustransition': {'from_status': (STATUS, None), 'to_status': (STATUS, 1)},
+}
+BATCH_SIZE = 10000
+
+
+def batches(model):
+    """Primary key ranges of BATCH_SIZE ids, so no UPDATE holds the table for long"""
+    bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return
+    for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+        yield model.objects.filter(pk__gte=start, pk__lt=start + BATCH_SIZE)
+
+
+def labels_to_codes(apps, schema_editor):
+    for model_name, columns in COLUMNS.items():
+        model = apps.get_model('main_app', model_name)
+        changes = {
+            f'{column}_code': Case(
+                *(When(**{column: label}, then=Value(code)) for label, code in codes.items()),
+                default=Value(unknown),
+            )
+            for column, (codes, unknown) in columns.items()
+        }
+        for rows in batches(model):
+            # one short transaction per batch (the migration itself is not atomic)
+            with transaction.atomic(using=schema_editor.connection.alias):
+                rows.update(**changes)
+
+
+def codes_to_labels(apps, schema_editor):
+    for model_name, columns in COLUMNS.items():
+        model = apps.get_model('main_app', model_name)
+        changes = {
+            column: Case(
+                *(When(**{f'{column}_code': code}, then=Value(label)) for label, code in codes.items()),
+                default=Value(''),
+            )
+            for column, (codes, unknown) in columns.items()
+        }
+        for rows in batches(model):
+            with transaction.atomic(using=schema_editor.connection.alias):
+                rows.update(**changes)
+
+
+class Migration(migrations.Migration):
+    """Status / priority as small integers, step 2: fill the code columns in batches"""
+
+    atomic = False
+
+    dependencies = [
+        ('main_app', '0016_add_status_priority_codes'),
+    ]
+
+    operations = [
+        migrations.RunPython(labels_to_codes, codes_to_labels, elidable=True),
+    ]
@@ -0,0 +1,145 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:00
+
+import apps.main_app.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Status / priority as small integers, step 3: the codes replace the labels"""
+
+    dependencies = [
+        ('main_app', '0017_convert_status_priority_codes'),
+    ]
+
+    operations = [
+        # lets a reverse migration re-add the label column before 0017 refills it
+        migrations.AlterField(
+            model_name='statustransition',
+            name='to_status',
+            field=models.CharField(choices=[('Backlog', 'Backlog'), ('To do', 'To do'), ('In progress', 'In progress'), ('Done', 'Done')], default='', max_length=20),
+        ),
+        migrations.RemoveField(
+            model_name='project',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='project',
+            name='priority',
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='priority',
+        ),
+        migrations.RemoveField(
+            model_name='archivedtask',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='archivedtask',
+            name='priority',
+        ),
+        migrations.RemoveField(
+            model_name='statustransition',
+            name='from_status',
+        ),
+        migrations.RemoveField(
+            model_name='statustransition',
+            name='to_status',
+        ),
+        migrations.RenameField(
+            model_name='project',
+            old_name='status_code',
+            new_name='status',
+        ),
+        migrations.RenameField(
+            model_name='project',
+            old_name='priority_code',
+            new_name='priority',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='status_code',
+            new_name='status',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='priority_code',
+            new_name='priority',
+        ),
+        migrations.RenameField(
+            model_name='archivedtask',
+            old_name='status_code',
+            new_name='status',
+        ),
+        migrations.RenameField(
+            model_name='archivedtask',
+            old_name='priority_code',
+            new_name='priority',
+        ),
+        migrations.RenameField(
+            model_name='statustransition',
+            old_name='from_status_code',
+            new_name='from_status',
+        ),
+        migrations.RenameField(
+            model_name='statustransition',
+            old_name='to_status_code',
+            new_name='to_status',
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='status',
+            field=apps.main_app.fields.ChoiceCodeField(choices=[(1, 'Backlog'), (2, 'To do'), (3, 'In progress'), (4, 'Done')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='priority',
+            field=apps.main_app.fields.ChoiceCodeField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High'), (4, 'Urgent')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=apps.main_app.fields.ChoiceCodeField(choices=[(1, 'Backlog'), (2, 'To do'), (3, 'In progress'), (4, 'Done')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='priority',
+            field=apps.main_app.fields.ChoiceCodeField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High'), (4, 'Urgent')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='archivedtask',
+            name='status',
+            field=apps.main_app.fields.ChoiceCodeField(choices=[(1, 'Backlog'), (2, 'To do'), (3, 'In progress'), (4, 'Done')], default=4),
+        ),
+        migrations.AlterField(
+            model_name='archivedtask',
+            name='priority',
+            field=apps.main_app.fields.ChoiceCodeField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High'), (4, 'Urgent')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='statustransition',
+            name='from_status',
+            field=apps.main_app.fields.ChoiceCodeField(blank=True, choices=[(1, 'Backlog'), (2, 'To do'), (3, 'In progress'), (4, 'Done')], null=True),
+        ),
+        migrations.AlterField(
+            model_name='statustransition',
+            name='to_status',
+            field=apps.main_app.fields.ChoiceCodeField(choices=[(1, 'Backlog'), (2, 'To do'), (3, 'In progress'), (4, 'Done')]),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_overdue', False), models.Q(('status', 4), _negated=True)), fields=['due_date'], name='task_overdue_candidate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 4)), fields=['updated_at'], name='task_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statustransition',
+            index=models.Index(fields=['to_status', 'changed_at', 'task_id'], name='transition_status_idx'),
+        ),
+    ]
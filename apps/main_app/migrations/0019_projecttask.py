@@ -0,0 +1,76 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:10
+
+import apps.main_app.ranks
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+from apps.main_app.ranks import spread_ranks
+
+BATCH_SIZE = 1000
+
+
+def rank_cards(apps, schema_editor):
+    """Start every board with its columns sorted by due date"""
+    ProjectTask = apps.get_model('main_app', 'ProjectTask')
+    Project = apps.get_model('main_app', 'Project')
+    alias = schema_editor.connection.alias
+
+    for project_id in Project.objects.using(alias).values_list('pk', flat=True).iterator():
+        columns = {}
+        for pk, status in (
+            ProjectTask.objects.using(alias)
+            .filter(project_id=project_id)
+            .order_by('task__status', 'task__due_date', 'task_id')
+            .values_list('pk', 'task__status')
+        ):
+            columns.setdefault(status, []).append(pk)
+
+        cards = [
+            ProjectTask(pk=pk, rank=rank)
+            for pks in columns.values()
+            for pk, rank in zip(pks, spread_ranks(len(pks)))
+        ]
+        with transaction.atomic(using=alias):
+            ProjectTask.objects.using(alias).bulk_update(cards, ['rank'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0018_status_priority_codes'),
+    ]
+
+    operations = [
+        # Project.tasks gets an explicit through model on the table it already has
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ProjectTask',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_links', to='main_app.project')),
+                        ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_links', to='main_app.task')),
+                    ],
+                    options={
+                        'db_table': 'main_app_project_tasks',
+                        'unique_together': {('project', 'task')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='project',
+                    name='tasks',
+                    field=models.ManyToManyField(related_name='projects', through='main_app.ProjectTask', to='main_app.task'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='projecttask',
+            name='rank',
+            field=models.CharField(default=apps.main_app.ranks.append_rank, max_length=64),
+        ),
+        migrations.RunPython(rank_cards, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='projecttask',
+            index=models.Index(fields=['project', 'rank'], name='project_task_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:02
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0020_savedview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportArtifact',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='report_artifact', serialize=False, to='main_app.project')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('csv', models.TextField(blank=True)),
+                ('generated_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0021_reportartifact'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('assignee__isnull', False), models.Q(('status', 4), _negated=True)), fields=['due_date', 'assignee', 'priority'], name='task_open_load_idx'),
+        ),
+    ]
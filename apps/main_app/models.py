@@ -1,56 +1,445 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
-from django.db.models.signals import m2m_changed
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
 
+from .fields import ChoiceCodeField, CodedChoices
+from .ranks import append_rank
+
+
 User = get_user_model()
 
-class Status(models.TextChoices):
-    BACKLOG = 'Backlog'
-    TO_DO = 'To do'
-    IN_PROGRESS = 'In progress'
-    DONE = 'Done'
+# stored as these codes, in semantic order; shown, posted and filtered by label (fields.py)
+class Status(CodedChoices):
+    BACKLOG = 1, 'Backlog'
+    TO_DO = 2, 'To do'
+    IN_PROGRESS = 3, 'In progress'
+    DONE = 4, 'Done'
+
+
+class Priorities(CodedChoices):
+    LOW = 1, 'Low'
+    MEDIUM = 2, 'Medium'
+    HIGH = 3, 'High'
+    URGENT = 4, 'Urgent'
+
+class ProjectQuerySet(models.QuerySet):
+    def deleting(self):
+        return self.filter(deleted_at__isnull=False)
+
+    def with_overdue_tasks(self):
+        return self.filter(tasks__is_overdue=True).distinct()
+
+    def touch(self, now=None):
+        return self.update(updated_at=now or timezone.now())
+
+    def recount_tasks(self, project_ids):
+        # one UPDATE with a correlated COUNT instead of a count + save per project;
+        # archived tasks still belong to the project
+        def count(through):
+            return Coalesce(Subquery(
+                through.objects.filter(project_id=OuterRef('pk'))
+                .order_by()
+                .values('project_id')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ), 0)
+
+        return self.filter(pk__in=project_ids).update(
+            task_count=count(self.model.tasks.through) + count(self.model.archived_tasks.through),
+            updated_at=timezone.now(),
+        )
+
+
+class ProjectManager(models.Manager.from_queryset(ProjectQuerySet)):
+    # soft-deleted projects wait for the purge job; to every view they are already gone
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
+class TaskQuerySet(models.QuerySet):
+    def overdue(self):
+        # reads the denormalised flag, kept in sync by Task.save() and the sweep_overdue command
+        return self.filter(is_overdue=True)
+
+    def for_user(self, user):
+        return self.filter(assignee=user)
+
+    def for_project(self, project):
+        return self.filter(projects=project)
+
+    def newly_overdue(self, now=None):
+        now = now or timezone.now()
+        return self.filter(is_overdue=False, due_date__lt=now).exclude(status=Status.DONE)
+
+    def no_longer_overdue(self, now=None):
+        now = now or timezone.now()
+        return self.filter(is_overdue=True).filter(Q(status=Status.DONE) | Q(due_date__gte=now))
+
+    def sync_overdue(self, now=None):
+        # for callers that change status/due_date with update() and so bypass save()
+        now = now or timezone.now()
+        self.newly_overdue(now).update(is_overdue=True, updated_at=now)
+        self.no_longer_overdue(now).update(is_overdue=False, updated_at=now)
+
+    def touch(self, now=None):
+        return self.update(updated_at=now or timezone.now())
 
-class Priorities(models.TextChoices):
-    LOW = 'Low'
-    MEDIUM = 'Medium'
-    HIGH = 'High'
-    URGENT = 'Urgent'
 
 class Project(models.Model):
     project_name = models.CharField(max_length=100)
     project_description = models.TextField()
-    status = models.CharField(max_length=100, choices=Status.choices, default=Status.BACKLOG)
-    priority = models.CharField(max_length=100, choices=Priorities.choices, default=Priorities.LOW)
+    status = ChoiceCodeField(choices=Status.choices, default=Status.BACKLOG)
+    priority = ChoiceCodeField(choices=Priorities.choices, default=Priorities.LOW)
     task_count = models.PositiveIntegerField(default=0)
     creator = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='created_project', null=True, blank=True)
-    tasks = models.ManyToManyField('Task', related_name='projects')
+    tasks = models.ManyToManyField('Task', related_name='projects', through='ProjectTask')
     collaborators = models.ManyToManyField(User, related_name="collaborating_projects")
 
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    purge_job = models.ForeignKey('Job', on_delete=models.SET_NULL, related_name='+', null=True, blank=True)
+
+    objects = ProjectManager()
+    all_objects = ProjectQuerySet.as_manager()
 
     def __str__(self):
         return self.project_name
 
+    @property
+    def purge_percent(self):
+        progress = self.purge_job.progress if self.purge_job else None
+        if not progress or not progress.get('total'):
+            return 0
+        return 100 * progress['done'] // progress['total']
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        super().save(*args, **kwargs)
+
+class ProjectTask(models.Model):
+    """
+    A task's card on a project's kanban board (the Project.tasks link).
+
+    The column is the task's status; inside it cards sort by rank (ranks.py),
+    so moving a card only rewrites its own row.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_links')
+    task = models.ForeignKey('Task', on_delete=models.CASCADE, related_name='project_links')
+    rank = models.CharField(max_length=64, default=append_rank)
+
+    class Meta:
+        # the table Django created for Project.tasks before it had a rank
+        db_table = 'main_app_project_tasks'
+        unique_together = [('project', 'task')]
+        indexes = [
+            # neighbours of a moved card, and the column a rebalance rewrites (board.py)
+            models.Index(fields=['project', 'rank'], name='project_task_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} / {self.task_id} @ {self.rank}"
+
+
 class Task(models.Model):
     task_name = models.CharField(max_length=100)
     task_description = models.TextField(null=True)
-    status = models.CharField(max_length=100, choices=Status.choices, default=Status.BACKLOG)
-    priority = models.CharField(max_length=100, choices=Priorities.choices, default=Priorities.LOW)
+    status = ChoiceCodeField(choices=Status.choices, default=Status.BACKLOG)
+    priority = ChoiceCodeField(choices=Priorities.choices, default=Priorities.LOW)
     due_date = models.DateTimeField()
     creator = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='created_task', null=True, blank=True)
     assignee = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     collaborators = models.ManyToManyField(User, related_name="collaborating_tasks")
+    is_overdue = models.BooleanField(default=False)
+    # deadline risk, 0-100, written by `manage.py score_tasks` (risk.py); NULL until scored and once done
+    risk_score = models.FloatField(null=True, blank=True, editable=False)
 
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # partial indexes: only overdue rows, and only rows the sweeper still has to look at
+            models.Index(
+                fields=['assignee', 'due_date'],
+                condition=Q(is_overdue=True),
+                name='task_overdue_assignee_idx',
+            ),
+            models.Index(
+                fields=['due_date'],
+                condition=Q(is_overdue=False) & ~Q(status=Status.DONE),
+                name='task_overdue_candidate_idx',
+            ),
+            # calendar pages: one due_date range scan each (schedule.py)
+            models.Index(fields=['due_date'], name='task_due_date_idx'),
+            # capacity heatmap: open assigned work by due date, read without touching the table (capacity.py)
+            models.Index(
+                fields=['due_date', 'assignee', 'priority'],
+                condition=Q(assignee__isnull=False) & ~Q(status=Status.DONE),
+                name='task_open_load_idx',
+            ),
+            # riskiest tasks, overall (per project) and per assignee (risk.py)
+            models.Index(fields=['-risk_score'], condition=Q(risk_score__isnull=False), name='task_risk_idx'),
+            models.Index(
+                fields=['assignee', '-risk_score'],
+                condition=Q(risk_score__isnull=False),
+                name='task_assignee_risk_idx',
+            ),
+            # finished tasks waiting to be archived (archive_tasks)
+            models.Index(
+                fields=['updated_at'],
+                condition=Q(status=Status.DONE),
+                name='task_done_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.task_name
 
+    def compute_overdue(self, now=None):
+        now = now or timezone.now()
+        return self.status != Status.DONE and self.due_date is not None and self.due_date < now
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the status history (history.py) logs a transition when save() changes it
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.is_overdue = self.compute_overdue()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            extra = {'updated_at'}
+            if {'status', 'due_date'} & set(update_fields):
+                extra.add('is_overdue')
+            kwargs['update_fields'] = {*update_fields, *extra}
+        super().save(*args, **kwargs)
+
+
+class ArchivedTask(models.Model):
+    """
+    A finished task moved out of the Task table by `manage.py archive_tasks`.
+
+    Keeps the task's id, so /task/<id>/ still shows it (read-only), and its
+    project and collaborator links.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    task_name = models.CharField(max_length=100)
+    task_description = models.TextField(null=True)
+    status = ChoiceCodeField(choices=Status.choices, default=Status.DONE)
+    priority = ChoiceCodeField(choices=Priorities.choices, default=Priorities.LOW)
+    due_date = models.DateTimeField()
+    creator = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='+', null=True, blank=True)
+    assignee = models.ForeignKey(
+        User, on_delete=models.SET_NULL, related_name='archived_tasks', null=True, blank=True
+    )
+    projects = models.ManyToManyField(Project, related_name='archived_tasks')
+    collaborators = models.ManyToManyField(User, related_name='archived_collaborating_tasks')
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.task_name
+
+
+class ReportArtifact(models.Model):
+    """
+    A project's report built ahead of time by `manage.py pregenerate_reports` (reports.py).
+
+    data is the report as JSON, csv its CSV export (empty unless asked for). generated_at
+    is when the build started: the report is served while nothing in the project is newer.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='report_artifact')
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    csv = models.TextField(blank=True)
+    generated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.project_id} @ {self.generated_at}"
+
+
+class SavedView(models.Model):
+    """
+    A user's named filters and sort for the my-tasks page (no project) or one project's page.
+
+    spec holds the validated codes (SavedViewForm), e.g.
+    {"status": 2, "priority": null, "overdue": false, "sort": "due_date"}; see saved_views.py.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_views')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='saved_views', null=True, blank=True)
+    name = models.CharField(max_length=100)
+    spec = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
+
+
+class ProjectSnapshot(models.Model):
+    """
+    A project's task counts at the end of one day, written by `manage.py snapshot_projects`.
+
+    Archived tasks count as done. by_status / by_priority map each choice to its count.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='snapshots')
+    day = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+    overdue = models.PositiveIntegerField(default=0)
+    by_status = models.JSONField(default=dict)
+    by_priority = models.JSONField(default=dict)
+
+    taken_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # one row per project and day; its index serves the history range scans
+            models.UniqueConstraint(fields=['project', 'day'], name='project_snapshot_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} @ {self.day}"
+
+
+class StatusTransition(models.Model):
+    """
+    One status change of a task, append-only; from_status is NULL for the task's creation.
+
+    task_id and assignee_id (the assignee at the time) are plain columns rather than
+    foreign keys: the history outlives archiving and deletion, and stays cheap to append.
+    """
+    task_id = models.BigIntegerField()
+    from_status = ChoiceCodeField(choices=Status.choices, null=True, blank=True)
+    to_status = ChoiceCodeField(choices=Status.choices)
+    assignee_id = models.BigIntegerField(null=True, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task_id', 'changed_at'], name='transition_task_idx'),
+            # tasks finished in a time window (cycle-time analytics); covers the task_id it returns
+            models.Index(fields=['to_status', 'changed_at', 'task_id'], name='transition_status_idx'),
+        ]
+
+    def __str__(self):
+        previous = self.get_from_status_display() if self.from_status else '-'
+        return f"{self.task_id}: {previous} -> {self.get_to_status_display()}"
+
+
+class ChangeAction(models.TextChoices):
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    M2M = 'm2m'
+
+
+class ChangeLogEntry(models.Model):
+    # append-only: seq only ever grows, clients resume with ?since=<last seq they saw>
+    seq = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ChangeAction.choices)
+    data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+
+    changed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'object_id', 'seq'], name='changelog_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.action} {self.kind} {self.object_id}"
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class Job(models.Model):
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    priority = models.SmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    # set by long jobs while they run (jobs.report_progress), e.g. {"done": 500, "total": 2000}
+    progress = models.JSONField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='jobs', null=True, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # workers only ever scan queued rows, highest priority first
+            models.Index(
+                fields=['-priority', 'run_after'],
+                condition=Q(status='queued'),
+                name='job_ready_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
 @receiver(m2m_changed, sender=Project.tasks.through)
-def update_tasks_count(sender, instance, **kwargs):
-    instance.task_count = instance.tasks.count()
-    instance.save(update_fields=['task_count'])
+def update_tasks_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # task.projects.clear() sends no pk_set, so remember which projects lose the task
+        instance._cleared_project_ids = list(instance.projects.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        project_ids = [instance.pk]
+    elif action == 'post_clear':
+        project_ids = instance.__dict__.pop('_cleared_project_ids', [])
+    else:
+        project_ids = list(pk_set)
+
+    if settings.JOB_QUEUE_ASYNC_COUNTERS:
+        from .jobs import enqueue
+        enqueue('recount_project_tasks', {'project_ids': project_ids})
+    else:
+        Project.objects.recount_tasks(project_ids)
+
+
+
+@receiver(pre_delete, sender=Task)
+def remember_task_projects(sender, instance, **kwargs):
+    # the cascade removes Project.tasks rows without sending m2m_changed
+    instance._deleted_from_project_ids = list(instance.projects.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Task)
+def recount_after_task_delete(sender, instance, **kwargs):
+    project_ids = instance.__dict__.get('_deleted_from_project_ids', [])
+    if project_ids:
+        Project.objects.recount_tasks(project_ids)
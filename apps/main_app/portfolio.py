@@ -0,0 +1,91 @@
+"""
+Portfolio: every project a user can see, side by side.
+
+portfolio_rows() annotates the projects with one grouped aggregate over their
+tasks (the Project.tasks join): counts per status and per priority, overdue,
+completion and next deadline, each a filtered COUNT/MIN, so a page of the
+portfolio is a single query however many projects it lists, instead of one
+report per project. Archived tasks (all Done, see archive.py) still belong to
+their projects: a correlated COUNT over their project links adds them to the
+total, the Done and priority columns and so to completion, without a second
+join multiplying the rows. The metrics are computed by the database, so the
+page sorts and paginates on any of them with ORDER BY/LIMIT.
+
+Overdue reads the is_overdue flag (kept in sync by Task.save() and
+sweep_overdue) and the next deadline is the earliest open task not flagged
+overdue: every number then changes only with a row, which keeps the page's
+ETag valid until something in it really changed.
+"""
+from django.db.models import Count, F, FloatField, Func, IntegerField, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Cast, NullIf
+
+from .models import ArchivedTask, Priorities, Status
+
+OPEN = ~Q(tasks__status=Status.DONE)
+
+STATUS_COLUMNS = [(f'status_{status.name.lower()}', status) for status in Status]
+PRIORITY_COLUMNS = [(f'priority_{priority.name.lower()}', priority) for priority in Priorities]
+
+# ?sort= values; missing deadlines and empty projects sort last either way
+METRICS = (
+    'total', 'overdue', 'completion', 'next_deadline',
+    *(name for name, _ in STATUS_COLUMNS), *(name for name, _ in PRIORITY_COLUMNS),
+)
+PORTFOLIO_SORTS = {
+    'project_name': (F('project_name').asc(), 'pk'),
+    '-project_name': (F('project_name').desc(), '-pk'),
+    **{metric: (F(metric).asc(nulls_last=True), 'pk') for metric in METRICS},
+    **{f'-{metric}': (F(metric).desc(nulls_last=True), '-pk') for metric in METRICS},
+}
+DEFAULT_SORT = '-overdue'
+
+
+class ProjectSubquery(Subquery):
+    # correlated on the project's pk only, which the rows are already grouped by: left out of
+    # GROUP BY, it runs once per project instead of once per joined task row
+    def get_group_by_cols(self):
+        return []
+
+
+def archived_count(**filters):
+    """The number of the project's archived tasks matching `filters` (an ungrouped COUNT: 0 if none)"""
+    return ProjectSubquery(
+        ArchivedTask.projects.through.objects.filter(project_id=OuterRef('pk'), **filters)
+        .order_by()
+        .annotate(total=Func('pk', function='COUNT', output_field=IntegerField()))
+        .values('total')
+    )
+
+
+def portfolio_rows(projects, sort=DEFAULT_SORT):
+    """`projects` as dicts of their task metrics, live and archived, in `sort` order (one grouped query)"""
+    breakdown = {
+        **{name: Count('tasks', filter=Q(tasks__status=status)) for name, status in STATUS_COLUMNS},
+        **{
+            name: Count('tasks', filter=Q(tasks__priority=priority)) + archived_count(archivedtask__priority=priority)
+            for name, priority in PRIORITY_COLUMNS
+        },
+    }
+    breakdown['status_done'] += archived_count()
+    return (
+        projects
+        .values('pk', 'project_name')
+        .annotate(
+            total=Count('tasks') + archived_count(),
+            overdue=Count('tasks', filter=Q(tasks__is_overdue=True)),
+            next_deadline=Min('tasks__due_date', filter=OPEN & Q(tasks__is_overdue=False)),
+            **breakdown,
+        )
+        .annotate(
+            completion=100 * Cast('status_done', FloatField()) / NullIf('total', 0),
+        )
+        .order_by(*PORTFOLIO_SORTS.get(sort, PORTFOLIO_SORTS[DEFAULT_SORT]))
+    )
+
+
+def with_breakdowns(rows):
+    """Add 'by_status' and 'by_priority' [(label, count)] lists to each row, for the template"""
+    for row in rows:
+        row['by_status'] = [(status.label, row[name]) for name, status in STATUS_COLUMNS]
+        row['by_priority'] = [(priority.label, row[name]) for name, priority in PRIORITY_COLUMNS]
+    return rows
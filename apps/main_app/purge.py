@@ -0,0 +1,64 @@
+"""
+Non-blocking project deletion.
+
+delete_project() only marks the project deleted (the default manager hides it
+from then on) and queues a purge_project job. The job removes the project's
+task, collaborator and archive links in batches of `batch_size`, one short
+transaction each, reporting progress, and finally deletes the empty project.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .changes import record_changes
+from .jobs import enqueue, report_progress
+from .models import ArchivedTask, ChangeAction, Project, Task
+
+
+def project_links():
+    # (through model, column holding the task whose snapshot changes, if any)
+    return [
+        (Project.tasks.through, 'task_id'),
+        (Project.collaborators.through, None),
+        (ArchivedTask.projects.through, None),
+    ]
+
+
+def delete_project(project, user=None):
+    with transaction.atomic():
+        project.deleted_at = timezone.now()
+        project.purge_job = enqueue('purge_project', {'project_id': project.pk}, user=user)
+        project.save(update_fields=['deleted_at', 'purge_job'])
+        # clients drop the project now, not when the purge is done
+        record_changes(Project, [project.pk], ChangeAction.DELETE)
+    return project.purge_job
+
+
+def purge_project(project_id, batch_size=1000):
+    project = Project.all_objects.filter(pk=project_id, deleted_at__isnull=False).first()
+    if project is None:
+        return {'deleted': 0}
+
+    total = sum(through.objects.filter(project_id=project_id).count() for through, _ in project_links())
+    done = 0
+    report_progress(done=done, total=total)
+
+    for through, task_column in project_links():
+        while True:
+            with transaction.atomic():
+                batch = through.objects.filter(project_id=project_id).order_by('pk')[:batch_size]
+                rows = list(batch.values_list('pk', task_column) if task_column else batch.values_list('pk'))
+                if not rows:
+                    break
+                through.objects.filter(pk__in=[row[0] for row in rows]).delete()
+
+                if task_column:
+                    # the tasks lost a project: bump them for conditional GETs and the change feed
+                    task_ids = [row[1] for row in rows]
+                    Task.objects.filter(pk__in=task_ids).touch()
+                    record_changes(Task, task_ids, ChangeAction.UPDATE)
+
+            done += len(rows)
+            report_progress(done=done, total=total)
+
+    Project.all_objects.filter(pk=project_id).delete()
+    return {'deleted': done}
@@ -0,0 +1,79 @@
+"""
+Lexicographic rank keys for the kanban board (ProjectTask.rank).
+
+A key is a string over RANK_DIGITS read as a fraction in [0, 1): cards sort by
+plain string comparison, and there is always a key between two others, so
+moving a card rewrites that card's key only. Keys lengthen as cards pile up in
+one spot; past settings.BOARD_RANK_MAX_LENGTH the column is rebalanced, i.e.
+rewritten with evenly spaced short keys (board.rebalance_column).
+
+Digits and lowercase letters only: they sort the same under the C collation
+and the usual locale collations, so the database orders them like Python does.
+
+Cards added to a project without a position (the task form, imports, add())
+get append_rank(): 'z' followed by the time, after every spread key, so a new
+card lands at the bottom of its column without looking at the others.
+"""
+import itertools
+import math
+import threading
+import time
+
+RANK_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(RANK_DIGITS)
+# first digit of append_rank() keys; spread_ranks() stays below it
+APPEND_DIGIT = RANK_DIGITS[-1]
+APPEND_WIDTH = 10
+
+_last_append = 0
+_append_lock = threading.Lock()
+
+
+def encode(number, width):
+    digits = []
+    for _ in range(width):
+        number, digit = divmod(number, BASE)
+        digits.append(RANK_DIGITS[digit])
+    return ''.join(reversed(digits))
+
+
+def append_rank():
+    """A key after every spread key and every earlier append_rank() of this process"""
+    global _last_append
+    with _append_lock:
+        # microseconds, never repeated: add(*tasks) asks for several keys within one
+        _last_append = max(time.time_ns() // 1000, _last_append + 1)
+        return APPEND_DIGIT + encode(_last_append, APPEND_WIDTH)
+
+
+def rank_between(before=None, after=None):
+    """A key sorting strictly between `before` and `after` (None: the start / end of the column)"""
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} does not sort before {after!r}")
+
+    before = before or ''
+    key = []
+    for i in itertools.count():
+        # -1: `before` has run out, so any digit here sorts after it
+        low = RANK_DIGITS.index(before[i]) if i < len(before) else -1
+        high = RANK_DIGITS.index(after[i]) if after is not None else BASE
+        middle = (low + high) // 2
+        # a key never ends in '0', or nothing could be put before "...0"
+        if middle > low and middle > 0:
+            key.append(RANK_DIGITS[middle])
+            return ''.join(key)
+        # no room at this position: take the lower digit and look one position deeper
+        digit = max(low, 0)
+        key.append(RANK_DIGITS[digit])
+        if digit < high:
+            # the key is below `after` for good
+            after = None
+
+
+def spread_ranks(count):
+    """`count` increasing keys of equal length, evenly spaced below the append_rank() keys"""
+    width = max(2, math.ceil(math.log(count + 1, BASE)) + 1)
+    # keys start with one of the BASE - 1 digits before APPEND_DIGIT
+    span = (BASE - 1) * BASE ** (width - 1)
+    step = span // (count + 1)
+    return [encode(step * (n + 1), width) for n in range(count)]
@@ -0,0 +1,187 @@
+"""
+Project report data.
+
+The report is built as plain, JSON-serialisable data so the same result can be
+rendered by ProjectReportView or stored by a background job.
+
+ProjectReportView reads it through cached_project_report(), stale-while-revalidate:
+a report younger than REPORT_FRESH_SECONDS is served as is; for REPORT_STALE_SECONDS
+more it is still served at once while a single refresh_project_report job
+rebuilds it (a cache lock keeps a crowd of page views from queueing more than
+one); after that the next view builds it inline. The page shows when it was built.
+
+`manage.py pregenerate_reports` builds every project's report ahead of time
+into ReportArtifact rows (with a CSV export if asked), in parallel processes.
+A view that finds nothing in the cache serves the stored report instead of
+building one while nothing in the project has changed since it was stored.
+"""
+import csv
+import io
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchivedTask, Project, ReportArtifact, Task, Status
+
+TASK_LISTS = ("top_by_deadline", "top_by_priority", "overdue_tasks")
+CSV_COLUMNS = ("id", "task_name", "assignee_name", "status", "priority", "due_date")
+
+
+def task_row(task):
+    return {
+        "id": task.id,
+        "task_name": task.task_name,
+        "assignee_name": task.assignee.first_name if task.assignee else None,
+        "status": task.get_status_display(),
+        "priority": task.get_priority_display(),
+        "due_date": task.due_date,
+    }
+
+
+def build_project_report(project):
+    tasks = Task.objects.filter(projects=project).select_related("assignee")
+
+    # 1. top 3 by deadline
+    top_by_deadline = tasks.exclude(due_date=None).order_by("due_date")[:3]
+
+    # 2. top 3 by priority: the codes sort Urgent highest
+    top_by_priority = tasks.order_by("-priority", "pk")[:3]
+
+    # 3. overdue tasks
+    overdue_tasks = [task_row(t) for t in tasks.overdue().order_by("due_date")]
+
+    # archived tasks are all done and still count towards the totals
+    archived_count = ArchivedTask.objects.filter(projects=project).count()
+
+    return {
+        "project_id": project.id,
+        "total_tasks": tasks.count() + archived_count,
+        "total_done": tasks.filter(status=Status.DONE).count() + archived_count,
+        "overdue_count": len(overdue_tasks),
+        "top_by_deadline": [task_row(t) for t in top_by_deadline],
+        "top_by_priority": [task_row(t) for t in top_by_priority],
+        "overdue_tasks": overdue_tasks,
+        "generated_at": timezone.now(),
+    }
+
+
+def report_cache_key(project_id):
+    return f'project-report:{project_id}'
+
+
+def refresh_lock_key(project_id):
+    return f'project-report:{project_id}:refreshing'
+
+
+def store_report(report):
+    cache.set(
+        report_cache_key(report["project_id"]), report,
+        settings.REPORT_FRESH_SECONDS + settings.REPORT_STALE_SECONDS,
+    )
+
+
+def cached_project_report(project):
+    """(report, stale): the cached report, queueing one rebuild if it is stale; stored or built now if there is none"""
+    report = cache.get(report_cache_key(project.id))
+    if report is None:
+        report = pregenerated_report(project) or build_project_report(project)
+        store_report(report)
+        return report, False
+
+    if (timezone.now() - report["generated_at"]).total_seconds() < settings.REPORT_FRESH_SECONDS:
+        return report, False
+
+    # only the view that takes the lock queues the refresh; the job releases it
+    if cache.add(refresh_lock_key(project.id), True, settings.REPORT_REFRESH_LOCK_SECONDS):
+        from .jobs import enqueue
+        enqueue("refresh_project_report", {"project_id": project.id}, priority=5)
+    return report, True
+
+
+def refresh_project_report(project_id):
+    try:
+        project = Project.objects.filter(pk=project_id).first()
+        if project is None:
+            return None
+        report = build_project_report(project)
+        store_report(report)
+        return report
+    finally:
+        cache.delete(refresh_lock_key(project_id))
+
+
+def report_from_json(data):
+    """A report as stored in ReportArtifact.data, with its datetimes parsed back"""
+    return {
+        **data,
+        "generated_at": parse_datetime(data["generated_at"]),
+        **{
+            name: [{**row, "due_date": row["due_date"] and parse_datetime(row["due_date"])} for row in data[name]]
+            for name in TASK_LISTS
+        },
+    }
+
+
+def report_csv(report):
+    """The report as CSV: the totals, then each task list with a section column"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["total_tasks", "total_done", "overdue_count", "generated_at"])
+    writer.writerow([
+        report["total_tasks"], report["total_done"], report["overdue_count"], report["generated_at"].isoformat(),
+    ])
+    writer.writerow([])
+    writer.writerow(["section", *CSV_COLUMNS])
+    for name in TASK_LISTS:
+        for row in report[name]:
+            writer.writerow([name, *(csv_value(row[column]) for column in CSV_COLUMNS)])
+    return out.getvalue()
+
+
+def csv_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def artifact_is_fresh(artifact, project_id):
+    """Nothing in the project (its tasks included) changed since the artifact was built, and it is not too old"""
+    if timezone.now() - artifact.generated_at > timedelta(seconds=settings.REPORT_ARTIFACT_MAX_AGE):
+        return False
+    changed = Project.objects.filter(pk=project_id).aggregate(
+        latest=Max("updated_at"), tasks_latest=Max("tasks__updated_at"),
+    )
+    return all(value is None or value <= artifact.generated_at for value in changed.values())
+
+
+def pregenerated_report(project):
+    artifact = ReportArtifact.objects.filter(project=project).first()
+    if artifact is None or not artifact_is_fresh(artifact, project.id):
+        return None
+    return report_from_json(artifact.data)
+
+
+def pregenerate_reports(project_ids, with_csv=False):
+    """Build and store the reports of `project_ids`, one transaction for the lot; returns how many"""
+    artifacts = []
+    for project in Project.objects.filter(pk__in=project_ids):
+        # a change made while the report is built must count as newer than the artifact
+        started = timezone.now()
+        report = build_project_report(project)
+        artifacts.append(ReportArtifact(
+            project=project,
+            data=report,
+            csv=report_csv(report) if with_csv else "",
+            generated_at=started,
+        ))
+    with transaction.atomic():
+        ReportArtifact.objects.bulk_create(
+            artifacts,
+            update_conflicts=True,
+            unique_fields=["project"],
+            update_fields=["data", "csv", "generated_at"],
+        )
+    return len(artifacts)
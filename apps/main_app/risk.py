@@ -0,0 +1,154 @@
+"""
+Deadline risk: how likely each open task is to miss its due date.
+
+score_open_tasks() reads the open tasks in keyset chunks of values_list rows
+(due dates already as epoch seconds from the database, see analytics.Seconds)
+into NumPy arrays and scores them all at once:
+
+    urgency    1 once due, else exp(-days left / RISK_HORIZON_DAYS)
+    work left  by status: Backlog 1, To do 0.9, In progress 0.6
+    stakes     the priority code over 4, Low 0.25 ... Urgent 1
+    load       the assignee's open tasks n as n / (n + RISK_LOAD_HALF)
+    lateness   the assignee's share of tasks finished after their due date
+               over the last RISK_HISTORY_DAYS, from the status history,
+               starting from 1 late in 2 for someone without history
+
+    risk = 100 * urgency * work left * (0.5 + 0.5 * stakes)
+               * (0.5 + 0.25 * load + 0.25 * lateness)
+
+An unassigned task counts as fully loaded. The scores land in Task.risk_score
+(indexed, NULL for finished tasks) and are refreshed by `manage.py
+score_tasks`; between runs a task keeps the score of the last run, and the
+riskiest-tasks pages order by that column without computing anything.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import F, Max, Value
+from django.utils import timezone
+
+from .analytics import DAY, Seconds
+from .models import ArchivedTask, Status, StatusTransition, Task
+
+RISK_HORIZON_DAYS = 14
+RISK_LOAD_HALF = 10
+RISK_HISTORY_DAYS = 180
+# indexed by status code; Done tasks are not scored
+STATUS_WORK = np.array([0, 1.0, 0.9, 0.6, 0])
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def epoch_seconds(expression):
+    return Seconds(expression, Value(EPOCH))
+
+
+def open_task_columns(chunk_size=10000):
+    """(ids, assignee ids (0: none), status, priority, due seconds) arrays of the open tasks, read in chunks"""
+    chunks = []
+    last = 0
+    while True:
+        rows = list(
+            Task.objects.exclude(status=Status.DONE)
+            .filter(pk__gt=last)
+            .order_by('pk')
+            .values_list('pk', 'assignee_id', 'status', 'priority', epoch_seconds(F('due_date')))[:chunk_size]
+        )
+        if not rows:
+            break
+        # None (no assignee) -> NaN; ids stay exact in float64 up to 2**53
+        chunks.append(np.array(rows, dtype=float))
+        last = rows[-1][0]
+
+    table = np.concatenate(chunks) if chunks else np.empty((0, 5))
+    return (
+        table[:, 0].astype(np.int64),
+        np.nan_to_num(table[:, 1]).astype(np.int64),
+        table[:, 2].astype(np.int64),
+        table[:, 3],
+        table[:, 4],
+    )
+
+
+def finish_history(since):
+    """(assignee ids, finished late) arrays, one entry per task finished since `since` by a known assignee"""
+    finished = (
+        StatusTransition.objects
+        .filter(to_status=Status.DONE, changed_at__gte=since)
+        .values('task_id')
+        .annotate(assignee=Max('assignee_id'), done=epoch_seconds(Max('changed_at')))
+        .filter(assignee__isnull=False)
+        .order_by('task_id')
+        .values_list('task_id', 'assignee', 'done')
+    )
+    history = np.array(list(finished), dtype=float).reshape(-1, 3)
+    if not len(history):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+
+    # the due dates of those tasks, live or archived; task ids are unique across both tables
+    task_ids = history[:, 0].astype(np.int64)
+    finished_ids = StatusTransition.objects.filter(to_status=Status.DONE, changed_at__gte=since).values('task_id')
+    due = []
+    for model in (Task, ArchivedTask):
+        due += model.objects.filter(pk__in=finished_ids).values_list('pk', epoch_seconds(F('due_date')))
+    due = np.array(due, dtype=float).reshape(-1, 2)
+    due = due[np.argsort(due[:, 0])]
+
+    # task_ids is sorted: match each finished task to its due date without a Python loop
+    found = np.searchsorted(due[:, 0], task_ids)
+    known = (found < len(due)) & (due[np.minimum(found, len(due) - 1), 0] == task_ids)
+    late = history[known, 2] > due[found[known], 1]
+    return history[known, 1].astype(np.int64), late
+
+
+def risk_scores(assignee_ids, status, priority, due, history_assignees, history_late, now):
+    """Vectorised scores for the given open tasks (see the module docstring)"""
+    days_left = (due - now) / DAY
+    urgency = np.where(days_left <= 0, 1.0, np.exp(-np.maximum(days_left, 0) / RISK_HORIZON_DAYS))
+    stakes = priority / 4
+
+    # per-assignee figures, over one compact index for everyone seen in either array
+    people, index = np.unique(np.concatenate([assignee_ids, history_assignees]), return_inverse=True)
+    task_person, history_person = index[:len(assignee_ids)], index[len(assignee_ids):]
+    open_count = np.bincount(task_person, minlength=len(people))
+    finished = np.bincount(history_person, minlength=len(people))
+    late = np.bincount(history_person, weights=history_late, minlength=len(people))
+
+    load = open_count[task_person] / (open_count[task_person] + RISK_LOAD_HALF)
+    lateness = (late[task_person] + 1) / (finished[task_person] + 2)
+    load = np.where(assignee_ids == 0, 1.0, load)
+
+    return np.round(
+        100 * urgency * STATUS_WORK[status] * (0.5 + 0.5 * stakes) * (0.5 + 0.25 * load + 0.25 * lateness),
+        4,
+    )
+
+
+def write_scores(ids, scores, batch_size=5000):
+    """
+    Store the scores, a transaction per batch so web requests get the write lock in between.
+
+    One prepared UPDATE run for every row: bulk_update's CASE over a whole batch
+    is evaluated row by row on SQLite and takes minutes for 100k+ tasks. Plain
+    column writes also leave updated_at alone: a new score is not an edit.
+    """
+    table = connection.ops.quote_name(Task._meta.db_table)
+    column = connection.ops.quote_name(Task._meta.get_field('risk_score').column)
+    sql = f"UPDATE {table} SET {column} = %s WHERE id = %s"
+    ids, scores = ids.tolist(), scores.tolist()
+    for start in range(0, len(ids), batch_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, zip(scores[start:start + batch_size], ids[start:start + batch_size]))
+
+
+def score_open_tasks(chunk_size=10000, batch_size=5000, now=None):
+    """Recompute Task.risk_score for every open task and clear it on finished ones; returns the number scored"""
+    now = now or timezone.now()
+    ids, assignee_ids, status, priority, due = open_task_columns(chunk_size)
+    history_assignees, history_late = finish_history(now - timedelta(days=RISK_HISTORY_DAYS))
+    scores = risk_scores(
+        assignee_ids, status, priority, due, history_assignees, history_late, (now - EPOCH).total_seconds(),
+    )
+    write_scores(ids, scores, batch_size)
+    Task.objects.filter(status=Status.DONE, risk_score__isnull=False).update(risk_score=None)
+    return len(ids)
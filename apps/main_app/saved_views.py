@@ -0,0 +1,119 @@
+"""
+Saved views: a user's named filters and sort for the my-tasks page or a project page.
+
+The spec is validated once, when the view is saved (SavedViewForm), and stored
+as codes, so opening a view parses nothing: compile_spec() turns a spec into
+filter arguments and an ordering once per process, and the ids of the tasks a
+view selects are cached, in order, under its id. Only ids: the rows, with
+their assignee and projects, are loaded fresh on every request, so renames show
+at once and nothing but ids lands in the shared cache.
+
+Each cache key carries a generation: the assignee's (my-tasks views) or the
+project's (project views). Every task change goes through record_changes(),
+which bumps the generations of the users the changed tasks are assigned to and
+of the projects they belong to, so only the views a change may add a task to,
+or reorder, are dropped. A task that left a view is dropped when its rows are
+loaded, as they are filtered by the view again. SAVED_VIEW_CACHE_SECONDS bounds
+the rest.
+"""
+import functools
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Task
+
+# ?sort= values -> order_by(), as each page reads them
+MY_TASKS_SORTS = {
+    sort: (sort,) for field in ('task_name', 'due_date', 'priority', 'status') for sort in (field, f'-{field}')
+}
+PROJECT_SORTS = {
+    # status and priority sort by their codes; "priority" lists Urgent first and
+    # "status" Done first, as the project page always has
+    'priority': ('-priority', 'pk'),
+    '-priority': ('priority', 'pk'),
+    'status': ('-status', 'pk'),
+    '-status': ('status', 'pk'),
+    **{sort: (sort,) for field in ('task_name', 'due_date', 'assignee__first_name') for sort in (field, f'-{field}')},
+}
+
+def page_sorts(project_id):
+    return MY_TASKS_SORTS if project_id is None else PROJECT_SORTS
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_spec(spec, project_page):
+    """(filter kwargs, ordering) for a spec given as sorted (name, value) pairs"""
+    spec = dict(spec)
+    filters = {name: spec[name] for name in ('status', 'priority') if spec.get(name)}
+    if spec.get('overdue'):
+        filters['is_overdue'] = True
+    ordering = (PROJECT_SORTS if project_page else MY_TASKS_SORTS).get(spec.get('sort'), ())
+    return filters, ordering
+
+
+def user_generation_key(user_id):
+    return f'saved-views:gen:user:{user_id}'
+
+
+def project_generation_key(project_id):
+    return f'saved-views:gen:project:{project_id}'
+
+
+def new_generation():
+    # random, so a generation lost from the cache never comes back at an old value
+    return uuid.uuid4().hex
+
+
+def generation(key):
+    return cache.get_or_set(key, new_generation, None)
+
+
+def _bump(keys):
+    cache.set_many({key: new_generation() for key in keys}, None)
+
+
+def forget_saved_view_pages(snapshots):
+    """
+    Drop the cached pages the changed tasks (change log snapshots, as they are now) may
+    appear in: their assignee's and their projects' views. Again on commit, over pages
+    cached from the old rows meanwhile.
+    """
+    keys = set()
+    for data in snapshots:
+        if data.get('assignee_id') is not None:
+            keys.add(user_generation_key(data['assignee_id']))
+        keys.update(project_generation_key(project_id) for project_id in data.get('project_ids', []))
+    if keys:
+        _bump(keys)
+        transaction.on_commit(functools.partial(_bump, keys))
+
+
+def saved_view_tasks(view):
+    """The tasks `view` selects, in its order: the ids from the cache when none changed since, the rows fresh"""
+    spec = tuple(sorted(view.spec.items()))
+    filters, ordering = compile_spec(spec, view.project_id is not None)
+    if view.project_id is None:
+        queryset = Task.objects.filter(assignee=view.owner_id).prefetch_related('projects')
+        scope = user_generation_key(view.owner_id)
+    else:
+        queryset = Task.objects.filter(projects=view.project_id)
+        scope = project_generation_key(view.project_id)
+    queryset = queryset.filter(**filters).select_related('assignee')
+
+    # saving under an existing name changes the spec of the same view
+    digest = hashlib.md5(json.dumps(spec).encode(), usedforsecurity=False).hexdigest()
+    key = f'saved-view:{view.pk}:{digest}:{generation(scope)}'
+    ids = cache.get(key)
+    if ids is None:
+        tasks = list(queryset.order_by(*ordering) if ordering else queryset)
+        cache.set(key, [task.pk for task in tasks], settings.SAVED_VIEW_CACHE_SECONDS)
+        return tasks
+
+    # the view's filters again: a task changed out of the view since is left out
+    rows = queryset.in_bulk(ids)
+    return [rows[pk] for pk in ids if pk in rows]
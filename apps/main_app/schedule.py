@@ -0,0 +1,92 @@
+"""
+Calendar data: tasks by due date.
+
+Every calendar view (month, week, timeline) is one query: a due_date range
+scan on the task_due_date_idx index, joined to the assignee. The database
+buckets the tasks by local day (TruncDate) and, with window functions,
+numbers them within their day and counts each day, so a crowded day sends
+its first `per_day` tasks plus its total instead of every row.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber, TruncDate
+from django.utils import timezone
+
+from .models import Priorities, Status, Task
+
+# view -> tasks sent per day (the rest are counted)
+CALENDAR_VIEWS = {'month': 4, 'week': 50, 'timeline': 50}
+TIMELINE_DAYS = 28
+COLUMNS = ('id', 'task_name', 'status', 'priority', 'due_date', 'assignee')
+
+
+def calendar_range(view, anchor):
+    """[start, end) dates shown by `view` around the `anchor` date"""
+    if view == 'month':
+        first = anchor.replace(day=1)
+        last = (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+        # whole weeks, Monday first
+        return first - timedelta(days=first.weekday()), last + timedelta(days=7 - last.weekday())
+    if view == 'week':
+        start = anchor - timedelta(days=anchor.weekday())
+        return start, start + timedelta(days=7)
+    return anchor, anchor + timedelta(days=TIMELINE_DAYS)
+
+
+def calendar_step(view, anchor, direction):
+    """The anchor date of the previous (-1) or next (+1) page of `view`"""
+    if view == 'month':
+        month = anchor.month - 1 + direction
+        return date(anchor.year + month // 12, month % 12 + 1, 1)
+    return anchor + timedelta(days=direction * (7 if view == 'week' else TIMELINE_DAYS))
+
+
+class LocalDate(TruncDate):
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Django's SQLite TruncDate is a Python function called for every row (and
+        # again for each window partition); in UTC the native date() gives the same day
+        if self.get_tzname() == 'UTC':
+            sql, params = compiler.compile(self.lhs)
+            return f'date({sql})', params
+        return self.as_sql(compiler, connection, **extra_context)
+
+
+def tasks_between(start, end, per_day=None, tasks=None):
+    """Tasks due in [start, end) as rows of COLUMNS plus their day, day position and day count"""
+    tz = timezone.get_current_timezone()
+    tasks = (tasks if tasks is not None else Task.objects.all()).filter(
+        due_date__gte=timezone.make_aware(datetime.combine(start, time.min), tz),
+        due_date__lt=timezone.make_aware(datetime.combine(end, time.min), tz),
+    )
+    rows = tasks.annotate(
+        day=LocalDate('due_date', tzinfo=tz),
+        position=Window(RowNumber(), partition_by=F('day'), order_by=[F('due_date').asc(), F('pk').asc()]),
+        day_count=Window(Count('pk'), partition_by=F('day')),
+    )
+    if per_day:
+        rows = rows.filter(position__lte=per_day)
+    return rows.order_by('due_date', 'pk').values_list(
+        'pk', 'task_name', 'status', 'priority', 'due_date', 'assignee__first_name', 'assignee__email',
+        'day', 'day_count',
+    )
+
+
+def calendar_feed(view, anchor, tasks=None):
+    """JSON-ready data for one page of a calendar view"""
+    start, end = calendar_range(view, anchor)
+    days = {}
+    for pk, name, status, priority, due_date, first_name, email, day, day_count in tasks_between(
+        start, end, CALENDAR_VIEWS[view], tasks,
+    ):
+        bucket = days.setdefault(day.isoformat(), {'count': day_count, 'tasks': []})
+        bucket['tasks'].append([
+            pk, name, Status(status).label, Priorities(priority).label, due_date, first_name or email,
+        ])
+    return {
+        'view': view,
+        'start': start,
+        'end': end,
+        'columns': COLUMNS,
+        'days': days,
+    }
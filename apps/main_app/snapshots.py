@@ -0,0 +1,96 @@
+"""
+Daily project snapshots for burndown and throughput charts.
+
+take_snapshots() counts the tasks of every project by status and priority
+with one grouped query over the live links and one over the archived ones,
+and upserts one ProjectSnapshot per project for the day, so running it again
+the same day just refreshes that day's rows. project_history() reads a
+project's snapshots back with one range scan of the (project, day) index.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ArchivedTask, Priorities, Project, ProjectSnapshot, Status
+
+HISTORY_FIELDS = ('day', 'total', 'done', 'overdue', 'by_status', 'by_priority')
+
+
+def project_counts(now):
+    """{project id: {'by_status': Counter, 'by_priority': Counter, 'overdue': n}} for every project"""
+    counts = {
+        pk: {'by_status': Counter(), 'by_priority': Counter(), 'overdue': 0}
+        for pk in Project.objects.values_list('pk', flat=True)
+    }
+
+    live = (
+        Project.tasks.through.objects
+        .filter(project_id__in=counts)
+        .values('project_id', 'task__status', 'task__priority')
+        .annotate(
+            count=Count('pk'),
+            # as of now, not as of the last sweep_overdue run
+            overdue=Count('pk', filter=Q(task__due_date__lt=now) & ~Q(task__status=Status.DONE)),
+        )
+        .order_by()
+    )
+    archived = (
+        ArchivedTask.projects.through.objects
+        .filter(project_id__in=counts)
+        .values('project_id', 'archivedtask__status', 'archivedtask__priority')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+
+    for row in live:
+        entry = counts[row['project_id']]
+        entry['by_status'][row['task__status']] += row['count']
+        entry['by_priority'][row['task__priority']] += row['count']
+        entry['overdue'] += row['overdue']
+    for row in archived:
+        entry = counts[row['project_id']]
+        entry['by_status'][row['archivedtask__status']] += row['count']
+        entry['by_priority'][row['archivedtask__priority']] += row['count']
+    return counts
+
+
+def take_snapshots(day=None, now=None):
+    """Write (or rewrite) the snapshot of every project for `day`; returns the number of projects"""
+    now = now or timezone.now()
+    day = day or timezone.localdate(now)
+
+    snapshots = [
+        ProjectSnapshot(
+            project_id=project_id,
+            day=day,
+            total=sum(entry['by_status'].values()),
+            done=entry['by_status'][Status.DONE],
+            overdue=entry['overdue'],
+            # keyed by label, like the snapshots taken before the columns held codes
+            by_status={status.label: entry['by_status'][status] for status in Status},
+            by_priority={priority.label: entry['by_priority'][priority] for priority in Priorities},
+            taken_at=now,
+        )
+        for project_id, entry in project_counts(now).items()
+    ]
+    ProjectSnapshot.objects.bulk_create(
+        snapshots,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['project', 'day'],
+        update_fields=['total', 'done', 'overdue', 'by_status', 'by_priority', 'taken_at'],
+    )
+    return len(snapshots)
+
+
+def project_history(project_id, days=365, today=None):
+    """The project's snapshots for the last `days` days, oldest first"""
+    today = today or timezone.localdate()
+    return list(
+        ProjectSnapshot.objects
+        .filter(project_id=project_id, day__gt=today - timedelta(days=days), day__lte=today)
+        .order_by('day')
+        .values(*HISTORY_FIELDS)
+    )
@@ -0,0 +1,514 @@
+"""
+Unit tests for management commands in the main_app.
+"""
+import csv
+import gzip
+import tempfile
+from io import StringIO
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from config.settings.base import sqlite_options
+
+from .models import ArchivedTask, Project, ProjectSnapshot, ReportArtifact, StatusTransition, Task, Status, Priorities, Job, JobStatus, ChangeLogEntry
+from .factories import UserFactory, ProjectFactory, TaskFactory
+from .jobs import claim_next, enqueue, run_job
+from .management.commands import run_workers
+from .purge import delete_project
+
+
+class SweepOverdueCommandTests(TestCase):
+    """Tests for the sweep_overdue command"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+    
+    def test_flags_newly_overdue_tasks(self):
+        """Test tasks whose deadline passed since the last save get flagged"""
+        tasks = TaskFactory.create_tasks(count=5, assignee=self.user)
+        past = timezone.now() - timedelta(hours=1)
+        # queryset update bypasses save(), like time passing does
+        Task.objects.filter(pk__in=[t.pk for t in tasks]).update(
+            due_date=past, status=Status.TO_DO, is_overdue=False
+        )
+        
+        out = StringIO()
+        call_command('sweep_overdue', batch_size=2, stdout=out)
+        
+        self.assertEqual(Task.objects.overdue().count(), 5)
+        self.assertIn("Marked 5 task(s) overdue", out.getvalue())
+    
+    def test_clears_done_and_rescheduled_tasks(self):
+        """Test stale flags are cleared in bulk"""
+        done = TaskFactory.create_overdue_task(assignee=self.user)
+        moved = TaskFactory.create_overdue_task(assignee=self.user)
+        Task.objects.filter(pk=done.pk).update(status=Status.DONE)
+        Task.objects.filter(pk=moved.pk).update(due_date=timezone.now() + timedelta(days=3))
+        
+        call_command('sweep_overdue', stdout=StringIO())
+        
+        self.assertFalse(Task.objects.overdue().exists())
+    
+    def test_task_reopened_during_the_sweep_keeps_its_flag(self):
+        """Test the batch UPDATE checks the condition again, not just the selected ids"""
+        task = TaskFactory.create_overdue_task(assignee=self.user)
+        Task.objects.filter(pk=task.pk).update(status=Status.DONE)
+        update = QuerySet.update
+        
+        def reopen_first(queryset, **kwargs):
+            # the task is reopened between the sweep's SELECT and its UPDATE clearing the flag
+            if kwargs.get('is_overdue') is False:
+                update(Task.objects.filter(pk=task.pk), status=Status.TO_DO)
+            return update(queryset, **kwargs)
+        
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=reopen_first):
+            call_command('sweep_overdue', stdout=StringIO())
+        
+        self.assertTrue(Task.objects.get(pk=task.pk).is_overdue)
+
+    
+    def test_only_updated_tasks_are_logged(self):
+        """Test a task that stops matching before the batch is locked gets no change log entry"""
+        task = TaskFactory.create_overdue_task(assignee=self.user)
+        Task.objects.filter(pk=task.pk).update(is_overdue=False)
+        select_for_update = QuerySet.select_for_update
+        
+        def finish_first(queryset, *args, **kwargs):
+            # the task is finished between the sweep's SELECT and the batch's locking SELECT
+            Task.objects.filter(pk=task.pk).update(status=Status.DONE)
+            return select_for_update(queryset, *args, **kwargs)
+        
+        since = ChangeLogEntry.objects.latest('seq').seq
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=finish_first):
+            call_command('sweep_overdue', stdout=StringIO())
+        
+        self.assertFalse(Task.objects.get(pk=task.pk).is_overdue)
+        self.assertFalse(ChangeLogEntry.objects.filter(seq__gt=since, kind='task', object_id=task.pk).exists())
+
+class CompactChangesCommandTests(TestCase):
+    """Tests for the compact_changes command"""
+    
+    def test_keeps_latest_entry_per_object(self):
+        """Test old superseded entries are removed in batches, newest survive"""
+        tasks = TaskFactory.create_tasks(count=3)
+        for task in tasks:
+            task.save()
+            task.save()
+        ChangeLogEntry.objects.update(changed_at=timezone.now() - timedelta(days=30))
+        
+        out = StringIO()
+        call_command('compact_changes', older_than_days=7, batch_size=2, stdout=out)
+        
+        self.assertEqual(ChangeLogEntry.objects.filter(kind='task').count(), 3)
+        for task in tasks:
+            latest = ChangeLogEntry.objects.filter(kind='task', object_id=task.id).get()
+            self.assertEqual(latest.action, 'update')
+        self.assertIn("Removed 6", out.getvalue())
+    
+    def test_recent_entries_untouched(self):
+        """Test entries newer than the cutoff are kept"""
+        task = TaskFactory.create_task()
+        task.save()
+        
+        call_command('compact_changes', stdout=StringIO())
+        
+        self.assertEqual(ChangeLogEntry.objects.filter(kind='task', object_id=task.id).count(), 2)
+
+
+class RunWorkersCommandTests(TestCase):
+    """Tests for the run_workers command"""
+    
+    def test_once_drains_queue(self):
+        """Test --once runs every ready job and exits"""
+        project = ProjectFactory.create_project()
+        project.tasks.add(*TaskFactory.create_tasks(count=2))
+        enqueue('project_report', {'project_id': project.id})
+        enqueue('recount_project_tasks', {'project_ids': [project.id]})
+        
+        out = StringIO()
+        call_command('run_workers', once=True, stdout=out)
+        
+        self.assertEqual(Job.objects.filter(status=JobStatus.DONE).count(), 2)
+        report = Job.objects.get(name='project_report').result
+        self.assertEqual(report['total_tasks'], 2)
+        self.assertIn("after 2 job(s)", out.getvalue())
+    
+    def test_requeues_jobs_that_go_stale_while_running(self):
+        """Test an idle worker puts back a job whose worker died after the pool started, then runs it"""
+        project = ProjectFactory.create_project()
+        job = enqueue('recount_project_tasks', {'project_ids': [project.id]})
+        claim_next('dead-worker')
+        
+        def die_then_claim(worker_id):
+            # the other worker stops heartbeating once this pool is already running
+            Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+            return claim_next(worker_id)
+        
+        out = StringIO()
+        with mock.patch.object(run_workers, 'claim_next', side_effect=die_then_claim):
+            call_command('run_workers', once=True, requeue_interval=0, stdout=out)
+        
+        self.assertIn("Requeued 1 stale job(s)", out.getvalue())
+        self.assertEqual(Job.objects.get(pk=job.pk).status, JobStatus.DONE)
+
+
+class CollectstaticCompressionTests(TestCase):
+    """Tests for the hashed, precompressed static files storage"""
+    
+    def test_writes_hashed_and_compressed_files(self):
+        """Test collectstatic emits hashed names with .gz/.br siblings"""
+        with tempfile.TemporaryDirectory() as static_root:
+            storages = {
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "config.storage.CompressedManifestStaticFilesStorage"},
+            }
+            with override_settings(STATIC_ROOT=static_root, STORAGES=storages):
+                call_command('collectstatic', interactive=False, verbosity=0)
+            
+            root = Path(static_root)
+            hashed = [p for p in root.glob('css/report.*.css') if p.name.count('.') == 2]
+            self.assertEqual(len(hashed), 1)
+            
+            gz = Path(f"{hashed[0]}.gz")
+            self.assertTrue(gz.exists())
+            self.assertEqual(gzip.decompress(gz.read_bytes()), hashed[0].read_bytes())
+            self.assertTrue((root / 'staticfiles.json').exists())
+
+
+class BenchTemplatesCommandTests(TestCase):
+    """Tests for the bench_templates command"""
+    
+    def test_reports_each_engine_and_rolls_back(self):
+        """Test timings are printed per template and engine, and no rows are left behind"""
+        out = StringIO()
+        call_command('bench_templates', rows=[5], repeat=1, stdout=out)
+        
+        lines = out.getvalue().splitlines()[1:]
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(any('jinja2' in line and 'project_tasks' in line for line in lines))
+        self.assertFalse(Task.objects.exists())
+
+
+class BenchSqliteCommandTests(TestCase):
+    """Tests for the bench_sqlite command and the SQLite connection profile"""
+    
+    def test_reports_each_profile(self):
+        """Test one line of throughput per profile, without locking errors once writes are IMMEDIATE"""
+        out = StringIO()
+        call_command('bench_sqlite', readers=1, writers=2, seconds=0.5, rows=100, stdout=out)
+        
+        lines = [line.split() for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual([line[0] for line in lines], ['default', 'production', 'immediate'])
+        self.assertEqual(lines[2][3], '0')
+    
+    @skipUnless(connection.vendor == 'sqlite', "SQLite connection profile")
+    def test_connections_get_the_pragmas(self):
+        """Test new connections run the production profile"""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+    
+    def test_wal_is_opt_in(self):
+        """Test the persistent WAL journal (and synchronous=NORMAL) only apply with SQLITE_WAL"""
+        self.assertNotIn('journal_mode', sqlite_options()['init_command'])
+        self.assertNotIn('synchronous', sqlite_options()['init_command'])
+        self.assertIn('PRAGMA journal_mode=WAL', sqlite_options(wal=True)['init_command'])
+        self.assertIn('PRAGMA synchronous=NORMAL', sqlite_options(wal=True)['init_command'])
+
+
+class ArchiveTasksCommandTests(TestCase):
+    """Tests for the archive_tasks command"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.project = ProjectFactory.create_project(creator=self.user)
+    
+    def create_done_task(self, days_ago):
+        task = TaskFactory.create_completed_task(assignee=self.user)
+        task.collaborators.add(self.user)
+        self.project.tasks.add(task)
+        Task.objects.filter(pk=task.pk).update(updated_at=timezone.now() - timedelta(days=days_ago))
+        return task
+    
+    def test_moves_old_done_tasks_with_links(self):
+        """Test old Done tasks move to the archive with their links, others stay"""
+        old = self.create_done_task(days_ago=200)
+        recent = self.create_done_task(days_ago=1)
+        open_task = TaskFactory.create_task(assignee=self.user)
+        self.project.tasks.add(open_task)
+        
+        out = StringIO()
+        call_command('archive_tasks', older_than_days=90, stdout=out)
+        
+        self.assertIn("Archived 1 task(s)", out.getvalue())
+        self.assertEqual(set(Task.objects.values_list('pk', flat=True)), {recent.pk, open_task.pk})
+        archived = ArchivedTask.objects.get(pk=old.pk)
+        self.assertEqual(archived.task_name, old.task_name)
+        self.assertEqual(list(archived.projects.all()), [self.project])
+        self.assertEqual(list(archived.collaborators.all()), [self.user])
+        self.assertTrue(ChangeLogEntry.objects.filter(kind='task', object_id=old.pk, action='delete').exists())
+    
+    def test_project_counter_unchanged(self):
+        """Test task_count still includes archived tasks"""
+        for _ in range(3):
+            self.create_done_task(days_ago=200)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 3)
+        
+        call_command('archive_tasks', older_than_days=90, batch_size=2, stdout=StringIO())
+        
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 3)
+        self.assertEqual(ArchivedTask.objects.count(), 3)
+        self.assertFalse(self.project.tasks.exists())
+        
+        self.project.tasks.add(TaskFactory.create_task())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 4)
+
+
+class PurgeDeletedProjectsTests(TestCase):
+    """Tests for the purge_project job and the purge_deleted_projects command"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.project = ProjectFactory.create_project(creator=self.user)
+        self.project.collaborators.add(UserFactory.create_user())
+        self.tasks = TaskFactory.create_tasks(count=5, assignee=self.user)
+        self.project.tasks.add(*self.tasks)
+    
+    def test_job_purges_in_batches(self):
+        """Test the job removes links batch by batch, reports progress and keeps the tasks"""
+        job = delete_project(self.project, user=self.user)
+        job.payload['batch_size'] = 2
+        job.save()
+        
+        run_job(job)
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(job.result, {'deleted': 6})
+        self.assertEqual(job.progress, {'done': 6, 'total': 6})
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertEqual(Task.objects.count(), 5)
+        self.assertFalse(Project.tasks.through.objects.exists())
+    
+    def test_command_purges_leftovers(self):
+        """Test the command finishes projects whose job never ran"""
+        delete_project(self.project)
+        out = StringIO()
+        
+        call_command('purge_deleted_projects', batch_size=2, stdout=out)
+        
+        self.assertIn("Purged 1 project(s)", out.getvalue())
+        self.assertFalse(Project.all_objects.exists())
+
+
+class ImportTasksCommandTests(TestCase):
+    """Tests for the import_tasks command"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user(email="dev@example.com")
+        self.helper = UserFactory.create_user(email="helper@example.com")
+        self.project = ProjectFactory.create_project(creator=self.user, project_name="Legacy")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+    
+    def write_csv(self, rows):
+        path = Path(self.directory.name) / 'tasks.csv'
+        header = 'task_name,task_description,status,priority,due_date,assignee,collaborators,projects\n'
+        path.write_text(header + ''.join(row + '\n' for row in rows))
+        return path
+    
+    # the count is the import's own SQL: keep the cache (the access ids, the saved-view generation) out of the database
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_imports_valid_rows_in_batches(self):
+        """Test valid rows are inserted with their links and counters, in bulk"""
+        path = self.write_csv([
+            f'Task {n},Ported,To do,High,2000-01-01 10:00,dev@example.com,helper@example.com;dev@example.com,Legacy'
+            for n in range(5)
+        ])
+        out = StringIO()
+        
+        # creator, users, the creator's project ids, projects; per batch: savepoint + release, 3 inserts,
+        # recount, task snapshot (3) + log insert, status history insert, project snapshot (2) + log insert
+        with self.assertNumQueries(4 + 3 * 14):
+            call_command('import_tasks', str(path), creator='dev@example.com', batch_size=2, stdout=out)
+        
+        self.assertIn("Imported 5 task(s), rejected 0", out.getvalue())
+        tasks = Task.objects.filter(task_name__startswith='Task ')
+        self.assertEqual(tasks.count(), 5)
+        task = tasks.first()
+        self.assertEqual(task.creator, self.user)
+        self.assertTrue(task.is_overdue)
+        self.assertEqual(set(task.collaborators.all()), {self.user, self.helper})
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 5)
+        self.assertEqual(ChangeLogEntry.objects.filter(kind='task', action='create').count(), 5)
+        self.assertFalse(Path(f'{path}.rejects').exists())
+    
+    def test_invalid_rows_go_to_reject_file(self):
+        """Test rows failing the form rules or lookups are written out with their reasons"""
+        path = self.write_csv([
+            'Good,Ported,Done,Low,2030-01-01 10:00,,,',
+            ',Ported,Done,Low,2030-01-01 10:00,,,',
+            'Nobody,Ported,Done,Low,2030-01-01 10:00,ghost@example.com,,Nowhere',
+            'Bad date,Ported,Done,Low,tomorrow,,,',
+        ])
+        
+        call_command('import_tasks', str(path), stdout=StringIO())
+        
+        self.assertEqual(list(Task.objects.values_list('task_name', flat=True)), ['Good'])
+        with open(f'{path}.rejects', newline='') as reject_file:
+            rejects = list(csv.DictReader(reject_file))
+        self.assertEqual([row['line'] for row in rejects], ['3', '4', '5'])
+        self.assertIn('task_name', rejects[0]['errors'])
+        self.assertIn('unknown user ghost@example.com', rejects[1]['errors'])
+        self.assertIn('unknown project Nowhere', rejects[1]['errors'])
+        self.assertIn('due_date', rejects[2]['errors'])
+
+
+class SnapshotProjectsCommandTests(TestCase):
+    """Tests for the snapshot_projects command"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.project = ProjectFactory.create_project(creator=self.user)
+        self.empty = ProjectFactory.create_project(creator=self.user)
+        self.project.tasks.add(
+            TaskFactory.create_task(status=Status.TO_DO, priority=Priorities.HIGH),
+            TaskFactory.create_overdue_task(),
+            TaskFactory.create_completed_task(),
+        )
+    
+    def test_counts_every_project(self):
+        """Test each project gets its counts by status and priority, overdue and done"""
+        overdue = Task.objects.filter(projects=self.project, due_date__lt=timezone.now()).exclude(status=Status.DONE)
+        
+        # projects, live links, archived links, upsert
+        with self.assertNumQueries(4):
+            call_command('snapshot_projects', stdout=StringIO())
+        
+        snapshot = ProjectSnapshot.objects.get(project=self.project, day=timezone.localdate())
+        self.assertEqual(snapshot.total, 3)
+        self.assertEqual(snapshot.done, 1)
+        self.assertEqual(snapshot.overdue, overdue.count())
+        self.assertEqual(sum(snapshot.by_status.values()), 3)
+        self.assertEqual(sum(snapshot.by_priority.values()), 3)
+        empty = ProjectSnapshot.objects.get(project=self.empty)
+        self.assertEqual(empty.total, 0)
+        self.assertEqual(empty.by_status, {status: 0 for status in Status.labels})
+    
+    def test_rerun_replaces_the_day(self):
+        """Test running twice on the same day updates the day's rows instead of adding more"""
+        call_command('snapshot_projects', day='2026-01-05', stdout=StringIO())
+        self.project.tasks.add(TaskFactory.create_completed_task())
+        
+        call_command('snapshot_projects', day='2026-01-05', stdout=StringIO())
+        
+        self.assertEqual(ProjectSnapshot.objects.count(), 2)
+        snapshot = ProjectSnapshot.objects.get(project=self.project)
+        self.assertEqual((snapshot.total, snapshot.done), (4, 2))
+
+
+class PregenerateReportsCommandTests(TestCase):
+    """Tests for the pregenerate_reports command"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.projects = [ProjectFactory.create_project(creator=self.user) for _ in range(3)]
+        self.projects[0].tasks.add(TaskFactory.create_overdue_task(), TaskFactory.create_task(task_name="Plain", status=Status.TO_DO, due_date=timezone.now() + timedelta(days=3)))
+    
+    def test_builds_every_project_in_chunks(self):
+        """Test every project gets its report, and its CSV export when asked"""
+        out = StringIO()
+        
+        call_command('pregenerate_reports', workers=1, chunk_size=2, csv=True, stdout=out)
+        
+        self.assertIn("Pregenerated 3 report(s)", out.getvalue())
+        artifact = ReportArtifact.objects.get(project=self.projects[0])
+        self.assertEqual(artifact.data['total_tasks'], 2)
+        self.assertEqual(artifact.data['overdue_count'], 1)
+        rows = list(csv.reader(StringIO(artifact.csv)))
+        self.assertEqual(rows[1][:3], ['2', '0', '1'])
+        self.assertIn('overdue_tasks', [row[0] for row in rows if row])
+    
+    def test_rerun_replaces_artifacts(self):
+        """Test a second run updates the stored reports instead of adding rows"""
+        call_command('pregenerate_reports', workers=1, stdout=StringIO())
+        self.projects[1].tasks.add(TaskFactory.create_task())
+        
+        call_command('pregenerate_reports', workers=1, stdout=StringIO())
+        
+        self.assertEqual(ReportArtifact.objects.count(), 3)
+        artifact = ReportArtifact.objects.get(project=self.projects[1])
+        self.assertEqual(artifact.data['total_tasks'], 1)
+        self.assertEqual(artifact.csv, '')
+
+
+class ScoreTasksCommandTests(TestCase):
+    """Tests for the score_tasks command"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.now = timezone.now()
+    
+    def task(self, days, priority=Priorities.MEDIUM, status=Status.TO_DO, assignee=None):
+        return TaskFactory.create_task(
+            assignee=assignee or self.user, status=status, priority=priority, due_date=self.now + timedelta(days=days),
+        )
+    
+    def score(self):
+        out = StringIO()
+        call_command('score_tasks', chunk_size=2, batch_size=2, stdout=out)
+        return out.getvalue()
+    
+    def test_ranks_by_deadline_priority_and_status(self):
+        """Test sooner, more urgent and less advanced tasks score higher; finished ones lose their score"""
+        overdue = self.task(-2)
+        soon = self.task(1)
+        later = self.task(20)
+        soon_urgent = self.task(1, priority=Priorities.URGENT)
+        soon_started = self.task(1, status=Status.IN_PROGRESS)
+        done = self.task(1, status=Status.DONE)
+        Task.objects.filter(pk=done.pk).update(risk_score=50)
+        stamp = Task.objects.get(pk=soon.pk).updated_at
+        
+        output = self.score()
+        
+        self.assertIn("Scored 5 open task(s).", output)
+        scores = dict(Task.objects.values_list('pk', 'risk_score'))
+        self.assertGreater(scores[overdue.pk], scores[soon.pk])
+        self.assertGreater(scores[soon.pk], scores[later.pk])
+        self.assertGreater(scores[soon_urgent.pk], scores[soon.pk])
+        self.assertGreater(scores[soon.pk], scores[soon_started.pk])
+        self.assertIsNone(scores[done.pk])
+        self.assertEqual(Task.objects.get(pk=soon.pk).updated_at, stamp)
+    
+    def test_late_history_and_load_raise_the_score(self):
+        """Test an assignee who finished late before, or holds more open tasks, makes the same task riskier"""
+        late = UserFactory.create_user()
+        busy = UserFactory.create_user()
+        finished = self.task(-10, assignee=late)
+        finished.status = Status.DONE
+        finished.save()
+        StatusTransition.objects.filter(task_id=finished.pk, to_status=Status.DONE).update(changed_at=self.now)
+        for _ in range(5):
+            self.task(30, assignee=busy)
+        
+        tasks = {user: self.task(3, assignee=user) for user in (self.user, late, busy)}
+        self.score()
+        
+        scores = {user: Task.objects.get(pk=task.pk).risk_score for user, task in tasks.items()}
+        self.assertGreater(scores[late], scores[self.user])
+        self.assertGreater(scores[busy], scores[self.user])
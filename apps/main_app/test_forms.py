@@ -1,6 +1,7 @@
 """
 Unit tests for forms in the main_app.
 """
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 from django.utils import timezone
 from datetime import timedelta
@@ -33,8 +34,8 @@ class TaskCreationFormTests(TestCase):
         form_data = {
             'task_name': 'Test Task',
             'task_description': 'Test Description',
-            'status': Status.TO_DO,
-            'priority': Priorities.HIGH,
+            'status': Status.TO_DO.label,
+            'priority': Priorities.HIGH.label,
             'assignee': self.user.id,
             'due_date': due_date,
             'collaborators': [],
@@ -47,8 +48,8 @@ class TaskCreationFormTests(TestCase):
         """Test form validation with missing required field"""
         form_data = {
             'task_description': 'Test Description',
-            'status': Status.TO_DO,
-            'priority': Priorities.HIGH,
+            'status': Status.TO_DO.label,
+            'priority': Priorities.HIGH.label,
             # Missing task_name
         }
         
@@ -71,8 +72,8 @@ class TaskCreationFormTests(TestCase):
         form_data = {
             'task_name': 'New Task',
             'task_description': 'Description',
-            'status': Status.TO_DO,
-            'priority': Priorities.MEDIUM,
+            'status': Status.TO_DO.label,
+            'priority': Priorities.MEDIUM.label,
             'assignee': self.user.id,
             'due_date': due_date,
             'collaborators': [],
@@ -97,8 +98,8 @@ class TaskCreationFormTests(TestCase):
         form_data = {
             'task_name': 'Collaborative Task',
             'task_description': 'Description',
-            'status': Status.TO_DO,
-            'priority': Priorities.HIGH,
+            'status': Status.TO_DO.label,
+            'priority': Priorities.HIGH.label,
             'assignee': self.user.id,
             'due_date': due_date,
             'collaborators': [c.id for c in collaborators],
@@ -130,8 +131,8 @@ class ProjectCreationFormTests(TestCase):
         form_data = {
             'project_name': 'Test Project',
             'project_description': 'Test Description',
-            'status': Status.BACKLOG,
-            'priority': Priorities.MEDIUM,
+            'status': Status.BACKLOG.label,
+            'priority': Priorities.MEDIUM.label,
         }
         
         form = ProjectCreationForm(data=form_data)
@@ -141,7 +142,7 @@ class ProjectCreationFormTests(TestCase):
         """Test form validation with missing required field"""
         form_data = {
             'project_description': 'Description',
-            'status': Status.BACKLOG,
+            'status': Status.BACKLOG.label,
             # Missing project_name
         }
         
@@ -154,8 +155,8 @@ class ProjectCreationFormTests(TestCase):
         form_data = {
             'project_name': 'New Project',
             'project_description': 'Description',
-            'status': Status.IN_PROGRESS,
-            'priority': Priorities.HIGH,
+            'status': Status.IN_PROGRESS.label,
+            'priority': Priorities.HIGH.label,
         }
         
         form = ProjectCreationForm(data=form_data)
@@ -172,8 +173,8 @@ class ProjectCreationFormTests(TestCase):
         form_data = {
             'project_name': 'Project With Tasks',
             'project_description': 'Description',
-            'status': Status.IN_PROGRESS,
-            'priority': Priorities.HIGH,
+            'status': Status.IN_PROGRESS.label,
+            'priority': Priorities.HIGH.label,
             'tasks': [t.id for t in tasks],
         }
         
@@ -190,8 +191,8 @@ class ProjectCreationFormTests(TestCase):
         form_data = {
             'project_name': 'Collaborative Project',
             'project_description': 'Description',
-            'status': Status.BACKLOG,
-            'priority': Priorities.MEDIUM,
+            'status': Status.BACKLOG.label,
+            'priority': Priorities.MEDIUM.label,
             'collaborators': [c.id for c in collaborators],
         }
         
@@ -209,8 +210,8 @@ class ProjectCreationFormTests(TestCase):
         form_data = {
             'project_name': 'Full Project',
             'project_description': 'Description',
-            'status': Status.IN_PROGRESS,
-            'priority': Priorities.URGENT,
+            'status': Status.IN_PROGRESS.label,
+            'priority': Priorities.URGENT.label,
             'tasks': [t.id for t in tasks],
             'collaborators': [c.id for c in collaborators],
         }
@@ -237,8 +238,8 @@ class FormValidationTests(TestCase):
         form_data = {
             'task_name': long_name,
             'task_description': 'Description',
-            'status': Status.TO_DO,
-            'priority': Priorities.LOW,
+            'status': Status.TO_DO.label,
+            'priority': Priorities.LOW.label,
             'assignee': user.id,
             'due_date': due_date,
             'collaborators': [],
@@ -258,8 +259,8 @@ class FormValidationTests(TestCase):
         form_data = {
             'task_name': too_long_name,
             'task_description': 'Description',
-            'status': Status.TO_DO,
-            'priority': Priorities.LOW,
+            'status': Status.TO_DO.label,
+            'priority': Priorities.LOW.label,
             'assignee': user.id,
             'due_date': due_date,
             'collaborators': [],
@@ -274,9 +275,40 @@ class FormValidationTests(TestCase):
         form_data = {
             'project_name': 'Minimal Project',
             'project_description': 'A description is required',
-            'status': Status.BACKLOG,
-            'priority': Priorities.LOW,
+            'status': Status.BACKLOG.label,
+            'priority': Priorities.LOW.label,
         }
         
         form = ProjectCreationForm(data=form_data)
         self.assertTrue(form.is_valid())
+
+
+class CodedChoiceFieldTests(TestCase):
+    """Tests for the integer-coded status / priority fields (fields.py)"""
+    
+    def test_options_are_labels(self):
+        """Test the selects post labels and show the instance's code as its label"""
+        task = TaskFactory.create_task(status=Status.IN_PROGRESS, priority=Priorities.URGENT)
+        
+        html = str(TaskCreationForm(instance=task)['status'])
+        
+        self.assertIn('<option value="In progress" selected>In progress</option>', html)
+        self.assertNotIn('value="3"', html)
+    
+    def test_labels_clean_to_codes(self):
+        """Test a posted label (any case) is stored as its code, and unknown labels are rejected"""
+        field = TaskCreationForm.base_fields['status']
+        
+        self.assertEqual(field.clean('Done'), Status.DONE)
+        self.assertEqual(field.clean('in progress'), Status.IN_PROGRESS)
+        self.assertEqual(Status.parse('4'), Status.DONE)
+        self.assertIsNone(Status.parse('Someday'))
+        with self.assertRaises(ValidationError):
+            field.clean('Someday')
+    
+    def test_codes_sort_semantically(self):
+        """Test the database orders the codes Backlog < To do < In progress < Done"""
+        for status in (Status.DONE, Status.BACKLOG, Status.IN_PROGRESS, Status.TO_DO):
+            TaskFactory.create_task(status=status)
+        
+        self.assertEqual(list(Task.objects.order_by('status').values_list('status', flat=True)), Status.values)
@@ -6,7 +6,9 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 
-from .models import Project, Task, Status, Priorities
+from .models import Project, Task, Status, Priorities, Job, JobStatus, ChangeLogEntry, ChangeAction, StatusTransition
+from .jobs import _current_job, bulk_update_tasks, claim_next, enqueue, job, report_progress, requeue_stale, run_job
+from .ranks import append_rank, rank_between, spread_ranks
 from .factories import UserFactory, ProjectFactory, TaskFactory, DataSetFactory
 
 User = get_user_model()
@@ -184,13 +186,192 @@ class TaskModelTests(TestCase):
         self.assertEqual(task.projects.count(), 3)
 
 
+class OverdueTrackingTests(TestCase):
+    """Tests for the denormalised is_overdue flag and TaskQuerySet helpers"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.other_user = UserFactory.create_user(email="other@example.com")
+    
+    def test_save_flags_overdue_task(self):
+        """Test saving a past-due open task sets is_overdue"""
+        task = TaskFactory.create_overdue_task(assignee=self.user)
+        self.assertTrue(task.is_overdue)
+    
+    def test_save_clears_flag_when_done(self):
+        """Test marking an overdue task as done clears the flag"""
+        task = TaskFactory.create_overdue_task(assignee=self.user)
+        task.status = Status.DONE
+        task.save(update_fields=['status'])
+        
+        task.refresh_from_db()
+        self.assertFalse(task.is_overdue)
+    
+    def test_future_and_done_tasks_not_overdue(self):
+        """Test future and completed tasks are never flagged"""
+        future = TaskFactory.create_urgent_task(assignee=self.user)
+        done = TaskFactory.create_completed_task(assignee=self.user)
+        self.assertFalse(future.is_overdue)
+        self.assertFalse(done.is_overdue)
+    
+    def test_overdue_queryset_by_user_and_project(self):
+        """Test overdue() combines with for_user() and for_project()"""
+        mine = TaskFactory.create_overdue_task(assignee=self.user)
+        theirs = TaskFactory.create_overdue_task(assignee=self.other_user)
+        TaskFactory.create_urgent_task(assignee=self.user)
+        project = ProjectFactory.create_project(creator=self.user)
+        project.tasks.add(theirs)
+        
+        self.assertEqual(list(Task.objects.overdue().for_user(self.user)), [mine])
+        self.assertEqual(list(Task.objects.overdue().for_project(project)), [theirs])
+        self.assertEqual(Task.objects.overdue().count(), 2)
+    
+    def test_projects_with_overdue_tasks(self):
+        """Test ProjectQuerySet.with_overdue_tasks()"""
+        late_project = ProjectFactory.create_project(creator=self.user)
+        ok_project = ProjectFactory.create_project(creator=self.user)
+        late_project.tasks.add(TaskFactory.create_overdue_task(), TaskFactory.create_overdue_task())
+        ok_project.tasks.add(TaskFactory.create_urgent_task())
+        
+        self.assertEqual(list(Project.objects.with_overdue_tasks()), [late_project])
+
+
+class UpdatedAtTests(TestCase):
+    """Tests for updated_at change tracking"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.project = ProjectFactory.create_project(creator=self.user)
+        self.task = TaskFactory.create_task(creator=self.user)
+        self.past = timezone.now() - timedelta(days=1)
+        Task.objects.update(updated_at=self.past)
+        Project.objects.update(updated_at=self.past)
+    
+    def test_save_with_update_fields_touches(self):
+        """Test partial saves still bump updated_at"""
+        self.task.task_name = "Renamed"
+        self.task.save(update_fields=['task_name'])
+        
+        self.task.refresh_from_db()
+        self.assertGreater(self.task.updated_at, self.past)
+    
+    def test_project_tasks_change_touches_both_sides(self):
+        """Test adding a task to a project bumps the project and the task"""
+        self.project.tasks.add(self.task)
+        
+        self.project.refresh_from_db()
+        self.task.refresh_from_db()
+        self.assertGreater(self.project.updated_at, self.past)
+        self.assertGreater(self.task.updated_at, self.past)
+    
+    def test_reverse_collaborator_clear_touches_tasks(self):
+        """Test user.collaborating_tasks.clear() bumps the affected tasks"""
+        self.task.collaborators.add(self.user)
+        Task.objects.update(updated_at=self.past)
+        
+        self.user.collaborating_tasks.clear()
+        
+        self.task.refresh_from_db()
+        self.assertGreater(self.task.updated_at, self.past)
+
+
+class ChangeLogTests(TestCase):
+    """Tests for the append-only change log"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+    
+    def entries(self, kind, object_id):
+        return list(ChangeLogEntry.objects.filter(kind=kind, object_id=object_id).order_by('seq'))
+    
+    def test_create_and_update_logged_with_snapshot(self):
+        """Test saves append entries with the current state"""
+        task = TaskFactory.create_task(task_name="First", creator=self.user)
+        task.task_name = "Second"
+        task.save()
+        
+        create, update = self.entries('task', task.id)
+        self.assertEqual(create.action, ChangeAction.CREATE)
+        self.assertEqual(update.action, ChangeAction.UPDATE)
+        self.assertEqual(update.data['task_name'], "Second")
+        self.assertGreater(update.seq, create.seq)
+    
+    def test_m2m_change_logs_both_sides(self):
+        """Test adding a task to a project logs memberships on both objects"""
+        project = ProjectFactory.create_project(creator=self.user)
+        task = TaskFactory.create_task(creator=self.user)
+        
+        project.tasks.add(task)
+        
+        task_entry = self.entries('task', task.id)[-1]
+        project_entry = self.entries('project', project.id)[-1]
+        self.assertEqual(task_entry.action, ChangeAction.M2M)
+        self.assertEqual(task_entry.data['project_ids'], [project.id])
+        self.assertEqual(project_entry.data['task_count'], 1)
+    
+    def test_delete_logs_tombstone_and_recounts(self):
+        """Test deleting a task logs a tombstone and refreshes its projects"""
+        project = ProjectFactory.create_project(creator=self.user)
+        task = TaskFactory.create_task(creator=self.user)
+        project.tasks.add(task)
+        task_id = task.id
+        
+        task.delete()
+        
+        tombstone = self.entries('task', task_id)[-1]
+        self.assertEqual(tombstone.action, ChangeAction.DELETE)
+        self.assertIsNone(tombstone.data)
+        project.refresh_from_db()
+        self.assertEqual(project.task_count, 0)
+        self.assertEqual(self.entries('project', project.id)[-1].data['task_count'], 0)
+
+
+class StatusHistoryTests(TestCase):
+    """Tests for the status transition log"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+    
+    def transitions(self, task):
+        return list(
+            StatusTransition.objects.filter(task_id=task.pk).order_by('pk').values_list('from_status', 'to_status')
+        )
+    
+    def test_creation_and_status_changes_logged(self):
+        """Test creating a task and changing its status append transitions, other edits do not"""
+        task = TaskFactory.create_task(status=Status.TO_DO, assignee=self.user)
+        
+        task = Task.objects.get(pk=task.pk)
+        task.task_name = "Renamed"
+        task.save()
+        task.status = Status.IN_PROGRESS
+        task.save()
+        task.status = Status.DONE
+        task.save(update_fields=['status'])
+        
+        self.assertEqual(self.transitions(task), [
+            (None, Status.TO_DO), (Status.TO_DO, Status.IN_PROGRESS), (Status.IN_PROGRESS, Status.DONE),
+        ])
+        self.assertEqual(StatusTransition.objects.filter(task_id=task.pk).last().assignee_id, self.user.pk)
+    
+    def test_bulk_update_logged(self):
+        """Test the bulk update job logs the tasks whose status it changed"""
+        changed = TaskFactory.create_task(status=Status.TO_DO)
+        unchanged = TaskFactory.create_task(status=Status.DONE)
+        
+        bulk_update_tasks([changed.pk, unchanged.pk], status=Status.DONE)
+        
+        self.assertEqual(self.transitions(changed), [(None, Status.TO_DO), (Status.TO_DO, Status.DONE)])
+        self.assertEqual(self.transitions(unchanged), [(None, Status.DONE)])
+
+
 class StatusAndPriorityTests(TestCase):
     """Tests for Status and Priority choices"""
     
     def test_status_choices(self):
         """Test all status choices are available"""
         expected_statuses = ['Backlog', 'To do', 'In progress', 'Done']
-        actual_statuses = [choice[0] for choice in Status.choices]
+        actual_statuses = [choice[1] for choice in Status.choices]
         
         for status in expected_statuses:
             self.assertIn(status, actual_statuses)
@@ -198,12 +379,48 @@ class StatusAndPriorityTests(TestCase):
     def test_priority_choices(self):
         """Test all priority choices are available"""
         expected_priorities = ['Low', 'Medium', 'High', 'Urgent']
-        actual_priorities = [choice[0] for choice in Priorities.choices]
+        actual_priorities = [choice[1] for choice in Priorities.choices]
         
         for priority in expected_priorities:
             self.assertIn(priority, actual_priorities)
 
 
+class RankKeyTests(TestCase):
+    """Tests for the kanban rank keys (ranks.py)"""
+    
+    def test_rank_between_sorts_between(self):
+        """Test a key always fits between its neighbours, however often the same gap is split"""
+        column = spread_ranks(3)
+        for n in range(300):
+            # the top, just below the top card, the bottom
+            i = (0, 1, len(column))[n % 3]
+            before = column[i - 1] if i else None
+            after = column[i] if i < len(column) else None
+            key = rank_between(before, after)
+            if before is not None:
+                self.assertLess(before, key)
+            if after is not None:
+                self.assertLess(key, after)
+            column.insert(i, key)
+        
+        self.assertEqual(column, sorted(column))
+        self.assertEqual(len(set(column)), len(column))
+    
+    def test_rank_between_rejects_unordered_neighbours(self):
+        """Test neighbours in the wrong order are an error, not a misplaced key"""
+        with self.assertRaises(ValueError):
+            rank_between('b', 'a')
+    
+    def test_spread_and_append_keys(self):
+        """Test spread keys are short, increasing and below the keys of newly added cards"""
+        keys = spread_ranks(1000)
+        
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), 1000)
+        self.assertLessEqual(len(keys[-1]), 3)
+        self.assertLess(keys[-1], append_rank())
+
+
 class DataSetFactoryTests(TestCase):
     """Tests for DataSetFactory"""
     
@@ -280,3 +497,106 @@ class SignalTests(TestCase):
         project.tasks.clear()
         project.refresh_from_db()
         self.assertEqual(project.task_count, 0)
+    
+    def test_project_task_count_signal_on_reverse_add(self):
+        """Test task_count updates when a task is added from the task side"""
+        user = UserFactory.create_user()
+        projects = ProjectFactory.create_projects(count=2, creator=user)
+        task = TaskFactory.create_task(creator=user)
+        
+        task.projects.add(*projects)
+        
+        for project in projects:
+            project.refresh_from_db()
+            self.assertEqual(project.task_count, 1)
+        
+        task.projects.clear()
+        
+        for project in projects:
+            project.refresh_from_db()
+            self.assertEqual(project.task_count, 0)
+
+
+@job('test_flaky')
+def flaky_job(fail):
+    if fail:
+        raise RuntimeError("boom")
+    return {'ok': True}
+
+
+class JobQueueTests(TestCase):
+    """Tests for the database job queue"""
+    
+    def test_enqueue_unknown_job(self):
+        """Test enqueueing an unregistered job name fails early"""
+        with self.assertRaises(LookupError):
+            enqueue('no_such_job')
+    
+    def test_claim_respects_priority(self):
+        """Test higher priority jobs are claimed first"""
+        low = enqueue('test_flaky', {'fail': False}, priority=0)
+        high = enqueue('test_flaky', {'fail': False}, priority=10)
+        
+        claimed = claim_next('worker-1')
+        
+        self.assertEqual(claimed.pk, high.pk)
+        self.assertEqual(claimed.status, JobStatus.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertEqual(claim_next('worker-2').pk, low.pk)
+        self.assertIsNone(claim_next('worker-3'))
+    
+    def test_successful_job_stores_result(self):
+        """Test a finished job keeps its handler result"""
+        enqueue('test_flaky', {'fail': False})
+        
+        finished = run_job(claim_next('worker-1'))
+        
+        self.assertEqual(finished.status, JobStatus.DONE)
+        self.assertEqual(finished.result, {'ok': True})
+        self.assertIsNotNone(finished.finished_at)
+    
+    def test_failed_job_is_retried_then_failed(self):
+        """Test failures are retried with backoff until max_attempts"""
+        queued = enqueue('test_flaky', {'fail': True}, max_attempts=2)
+        
+        with self.assertLogs('apps.main_app.jobs', 'ERROR'):
+            first = run_job(claim_next('worker-1'))
+        self.assertEqual(first.status, JobStatus.QUEUED)
+        self.assertGreater(first.run_after, timezone.now())
+        self.assertIn("boom", first.last_error)
+        
+        Job.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        with self.assertLogs('apps.main_app.jobs', 'ERROR'):
+            second = run_job(claim_next('worker-1'))
+        self.assertEqual(second.status, JobStatus.FAILED)
+        self.assertEqual(second.attempts, 2)
+    
+    def test_stale_jobs_requeued_or_failed(self):
+        """Test dead jobs go back to the queue, or fail once out of attempts; live ones are left alone"""
+        retry = enqueue('test_flaky', {'fail': False})
+        last_try = enqueue('test_flaky', {'fail': False}, max_attempts=1)
+        live = enqueue('test_flaky', {'fail': False})
+        for worker in ('worker-1', 'worker-2', 'worker-3'):
+            claim_next(worker)
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        
+        # a running handler reporting progress keeps its job's heartbeat fresh
+        token = _current_job.set(live)
+        report_progress(done=1, total=2)
+        _current_job.reset(token)
+        
+        self.assertEqual(requeue_stale(stale_after=600), (1, 1))
+        self.assertEqual(Job.objects.get(pk=retry.pk).status, JobStatus.QUEUED)
+        self.assertEqual(Job.objects.get(pk=last_try.pk).status, JobStatus.FAILED)
+        self.assertEqual(Job.objects.get(pk=live.pk).status, JobStatus.RUNNING)
+    
+    def test_bulk_update_job(self):
+        """Test bulk_update_tasks changes status and keeps overdue flags in sync"""
+        tasks = [TaskFactory.create_overdue_task() for _ in range(3)]
+        enqueue('bulk_update_tasks', {'task_ids': [t.pk for t in tasks], 'status': Status.DONE})
+        
+        finished = run_job(claim_next('worker-1'))
+        
+        self.assertEqual(finished.result, {'updated': 3})
+        self.assertEqual(Task.objects.filter(status=Status.DONE).count(), 3)
+        self.assertFalse(Task.objects.overdue().exists())
@@ -1,11 +1,37 @@
 """
 Unit tests for views in the main_app.
 """
-from django.test import TestCase, Client
+import asyncio
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+from datetime import datetime, timedelta
+
+import numpy
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.views import View
+
+from config import db_router
 
-from .models import Project, Task, Status, Priorities
+from .archive import archive_chunk
+from .capacity import horizon_start
+from .jobs import run_job
+from .events import RESYNC, EventScope, Subscription, entries_after, latest_seq
+from .saved_views import user_generation_key
+from .views import ConditionalGetMixin
+from .models import Project, ProjectSnapshot, ProjectTask, ReportArtifact, SavedView, StatusTransition, Task, Status, Priorities, Job, JobStatus, ChangeLogEntry
 from .factories import UserFactory, ProjectFactory, TaskFactory, DataSetFactory
 
 User = get_user_model()
@@ -67,7 +93,7 @@ class MyTasksListViewTests(TestCase):
         TaskFactory.create_task(assignee=self.user, status=Status.TO_DO)
         TaskFactory.create_task(assignee=self.user, status=Status.DONE)
         
-        response = self.client.get(reverse('main_app:my_tasks'), {'status': Status.TO_DO})
+        response = self.client.get(reverse('main_app:my_tasks'), {'status': Status.TO_DO.label})
         
         self.assertEqual(len(response.context['tasks']), 2)
         for task in response.context['tasks']:
@@ -79,12 +105,22 @@ class MyTasksListViewTests(TestCase):
         TaskFactory.create_task(assignee=self.user, priority=Priorities.LOW)
         TaskFactory.create_task(assignee=self.user, priority=Priorities.URGENT)
         
-        response = self.client.get(reverse('main_app:my_tasks'), {'priority': Priorities.URGENT})
+        response = self.client.get(reverse('main_app:my_tasks'), {'priority': Priorities.URGENT.label})
         
         self.assertEqual(len(response.context['tasks']), 2)
         for task in response.context['tasks']:
             self.assertEqual(task.priority, Priorities.URGENT)
     
+    def test_filter_overdue(self):
+        """Test filtering tasks to overdue only"""
+        overdue = TaskFactory.create_overdue_task(assignee=self.user)
+        TaskFactory.create_urgent_task(assignee=self.user)
+        TaskFactory.create_completed_task(assignee=self.user)
+        
+        response = self.client.get(reverse('main_app:my_tasks'), {'overdue': '1'})
+        
+        self.assertEqual(list(response.context['tasks']), [overdue])
+    
     def test_sort_by_task_name(self):
         """Test sorting tasks by name"""
         TaskFactory.create_task(task_name="Zebra Task", assignee=self.user)
@@ -97,6 +133,19 @@ class MyTasksListViewTests(TestCase):
         self.assertEqual(tasks[0].task_name, "Alpha Task")
         self.assertEqual(tasks[1].task_name, "Beta Task")
         self.assertEqual(tasks[2].task_name, "Zebra Task")
+    
+    def test_table_fragment(self):
+        """Test the fragment endpoint renders only the filtered table"""
+        TaskFactory.create_task(task_name="Urgent one", assignee=self.user, priority=Priorities.URGENT)
+        TaskFactory.create_task(task_name="Low one", assignee=self.user, priority=Priorities.LOW)
+        
+        response = self.client.get(reverse('main_app:my_tasks_table'), {'priority': Priorities.URGENT.label})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t.task_name for t in response.context['tasks']], ["Urgent one"])
+        self.assertNotContains(response, "filtersForm")
+        self.assertNotContains(response, "sidebar")
+        self.assertContains(response, "<table>")
 
 
 class OneTaskDetailViewTests(TestCase):
@@ -138,6 +187,30 @@ class OneTaskDetailViewTests(TestCase):
         self.assertNotIn(different_assignee_task, other_tasks)
 
 
+class ArchivedTaskDetailTests(TestCase):
+    """Tests for viewing archived tasks"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.client.force_login(self.user)
+        self.task = TaskFactory.create_completed_task(assignee=self.user)
+        archive_chunk([self.task.pk])
+    
+    def test_detail_url_shows_archived_task(self):
+        """Test the existing detail URL renders the archived task read-only"""
+        response = self.client.get(reverse('main_app:one_task', kwargs={'task_id': self.task.id}))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, self.task.task_name)
+        self.assertNotContains(response, reverse('main_app:task_edit', kwargs={'task_id': self.task.id}))
+    
+    def test_archived_task_cannot_be_edited(self):
+        """Test write views do not find archived tasks"""
+        response = self.client.post(reverse('main_app:task_mark_done', kwargs={'task_id': self.task.id}))
+        self.assertEqual(response.status_code, 404)
+
+
 class ProjectsListViewTests(TestCase):
     """Tests for ProjectsListView"""
     
@@ -183,6 +256,39 @@ class OneProjectListViewTests(TestCase):
         
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.context['project'], self.project)
+    
+    def test_tasks_fragment(self):
+        """Test the fragment endpoint renders only the filtered task list"""
+        todo = TaskFactory.create_task(task_name="Open task", status=Status.TO_DO)
+        done = TaskFactory.create_task(task_name="Closed task", status=Status.DONE)
+        self.project.tasks.add(todo, done)
+        url = reverse('main_app:project_tasks_table', kwargs={'project_id': self.project.id})
+        
+        response = self.client.get(url, {'status': Status.TO_DO.label, 'sort': 'task_name'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['tasks']), [todo])
+        self.assertContains(response, "Open task")
+        self.assertNotContains(response, "Closed task")
+        self.assertNotContains(response, "project-meta")
+        self.assertNotContains(response, "<html")
+        self.assertContains(response, "status=To+do")
+    
+    def test_priority_sort_in_the_database(self):
+        """Test sorting by priority lists Urgent first, with one query instead of a Python sort"""
+        for priority in (Priorities.LOW, Priorities.URGENT, Priorities.MEDIUM):
+            self.project.tasks.add(TaskFactory.create_task(priority=priority))
+        url = reverse('main_app:project_tasks_table', kwargs={'project_id': self.project.id})
+        
+        tasks = self.client.get(url, {'sort': 'priority'}).context['tasks']
+        
+        self.assertEqual([task.priority for task in tasks], [Priorities.URGENT, Priorities.MEDIUM, Priorities.LOW])
+        self.assertEqual(tasks.query.order_by, ('-priority', 'pk'))
+    
+    def test_tasks_fragment_unknown_project(self):
+        """Test the fragment endpoint 404s for a missing project"""
+        url = reverse('main_app:project_tasks_table', kwargs={'project_id': 99999})
+        self.assertEqual(self.client.get(url).status_code, 404)
 
 
 class TaskCreateViewTests(TestCase):
@@ -213,8 +319,8 @@ class TaskCreateViewTests(TestCase):
         data = {
             'task_name': 'New Test Task',
             'task_description': 'Description',
-            'status': Status.TO_DO,
-            'priority': Priorities.HIGH,
+            'status': Status.TO_DO.label,
+            'priority': Priorities.HIGH.label,
             'due_date': (timezone.now() + timezone.timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S'),
             'assignee': self.user.id,
             'collaborators': [],
@@ -253,8 +359,8 @@ class ProjectCreateViewTests(TestCase):
         data = {
             'project_name': 'New Test Project',
             'project_description': 'Project Description',
-            'status': Status.BACKLOG,
-            'priority': Priorities.MEDIUM,
+            'status': Status.BACKLOG.label,
+            'priority': Priorities.MEDIUM.label,
             'tasks': [],
             'collaborators': [],
         }
@@ -293,7 +399,7 @@ class TaskUpdateViewTests(TestCase):
         data = {
             'task_name': 'Updated Task Name',
             'task_description': self.task.task_description,
-            'status': Status.IN_PROGRESS,
+            'status': Status.IN_PROGRESS.label,
             'priority': self.task.priority,
             'due_date': self.task.due_date.strftime('%Y-%m-%d %H:%M:%S'),
             'assignee': self.user.id,
@@ -354,6 +460,31 @@ class ProjectDeleteViewTests(TestCase):
         response = self.client.post(reverse('main_app:project_delete', kwargs={'project_id': project_id}))
         
         self.assertFalse(Project.objects.filter(id=project_id).exists())
+    
+    def test_delete_is_deferred_to_a_job(self):
+        """Test deleting marks the project deleted and queues its purge"""
+        task = TaskFactory.create_task(assignee=self.user)
+        self.project.tasks.add(task)
+        
+        response = self.client.post(reverse('main_app:project_delete', kwargs={'project_id': self.project.id}))
+        
+        self.assertRedirects(response, reverse('main_app:projects_view'))
+        project = Project.all_objects.get(pk=self.project.pk)
+        self.assertIsNotNone(project.deleted_at)
+        self.assertEqual(project.purge_job.name, 'purge_project')
+        self.assertEqual(project.purge_job.status, JobStatus.QUEUED)
+        self.assertTrue(project.tasks.filter(pk=task.pk).exists())
+        self.assertTrue(ChangeLogEntry.objects.filter(kind='project', object_id=project.pk, action='delete').exists())
+    
+    def test_deleted_project_hidden(self):
+        """Test a project being purged 404s and shows as deleting in the list"""
+        self.client.post(reverse('main_app:project_delete', kwargs={'project_id': self.project.id}))
+        
+        response = self.client.get(reverse('main_app:one_project', kwargs={'project_id': self.project.id}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('main_app:projects_view'))
+        self.assertNotIn(self.project, response.context['projects'])
+        self.assertContains(response, f"Deleting {self.project.project_name}")
 
 
 class UsersListViewTests(TestCase):
@@ -397,7 +528,7 @@ class UserTasksViewTests(TestCase):
     
     def test_view_user_tasks(self):
         """Test viewing tasks of a specific user"""
-        TaskFactory.create_tasks(count=3, assignee=self.target_user)
+        TaskFactory.create_tasks(count=3, creator=self.user, assignee=self.target_user)
         TaskFactory.create_tasks(count=2, assignee=self.user)
         
         response = self.client.get(reverse('main_app:users_tasks', kwargs={'user_id': self.target_user.id}))
@@ -406,10 +537,116 @@ class UserTasksViewTests(TestCase):
         self.assertEqual(len(response.context['tasks']), 3)
 
 
+class AccessControlTests(TestCase):
+    """Tests for object-level access (access.py)"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.owner = UserFactory.create_user(email="owner@example.com")
+        self.user = UserFactory.create_user(email="member@example.com")
+        self.client.force_login(self.user)
+        self.project = ProjectFactory.create_project(creator=self.owner)
+        self.task = TaskFactory.create_task(creator=self.owner, assignee=self.owner)
+        self.project.tasks.add(self.task)
+    
+    def test_strangers_get_404(self):
+        """Test projects and tasks out of reach are not found, not just hidden from lists"""
+        for name, kwargs in [
+            ('one_project', {'project_id': self.project.id}),
+            ('project_edit', {'project_id': self.project.id}),
+            ('project_delete', {'project_id': self.project.id}),
+            ('project_report', {'project_id': self.project.id}),
+            ('one_task', {'task_id': self.task.id}),
+            ('task_edit', {'task_id': self.task.id}),
+        ]:
+            self.assertEqual(self.client.get(reverse(f'main_app:{name}', kwargs=kwargs)).status_code, 404, name)
+        self.assertNotContains(self.client.get(reverse('main_app:projects_view')), self.project.project_name)
+    
+    def test_collaborator_changes_drop_the_cached_ids(self):
+        """Test adding and removing a collaborator takes effect on the next request"""
+        url = reverse('main_app:one_project', kwargs={'project_id': self.project.id})
+        task_url = reverse('main_app:one_task', kwargs={'task_id': self.task.id})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        
+        self.project.collaborators.add(self.user)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(task_url).status_code, 200)
+        
+        self.user.collaborating_projects.remove(self.project)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(task_url).status_code, 404)
+    
+    def test_task_people_reach_the_task_only(self):
+        """Test a task collaborator sees the task but not its project"""
+        self.task.collaborators.add(self.user)
+        
+        self.assertEqual(self.client.get(reverse('main_app:one_task', kwargs={'task_id': self.task.id})).status_code, 200)
+        self.assertEqual(
+            self.client.get(reverse('main_app:one_project', kwargs={'project_id': self.project.id})).status_code, 404,
+        )
+    
+    def test_only_the_creator_deletes_a_project(self):
+        """Test collaborators can edit a project but not delete it"""
+        self.project.collaborators.add(self.user)
+        
+        self.assertEqual(self.client.get(reverse('main_app:project_edit', kwargs={'project_id': self.project.id})).status_code, 200)
+        self.assertEqual(self.client.post(reverse('main_app:project_delete', kwargs={'project_id': self.project.id})).status_code, 404)
+    
+    def test_projects_list_is_one_query(self):
+        """Test the project list filters with the cached ids instead of per-row checks"""
+        for n in range(5):
+            ProjectFactory.create_project(creator=self.user, project_name=f"Mine {n}")
+        self.client.get(reverse('main_app:projects_view'))  # fills the cache
+        
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(reverse('main_app:projects_view'))
+        
+        self.assertEqual(len(response.context['projects']), 5)
+        project_queries = [q['sql'] for q in queries.captured_queries if 'main_app_project' in q['sql']]
+        # the change stamp, the purge check, the page and its list of projects being deleted
+        self.assertEqual(len(project_queries), 4)
+    
+    def test_change_feed_hides_strangers_changes(self):
+        """Test the change feed skips tasks and projects out of reach but still advances past them"""
+        mine = TaskFactory.create_task(creator=self.user)
+        url = reverse('main_app:change_feed')
+        
+        response = self.client.get(url, {'since': 0}).json()
+        
+        self.assertEqual([(kind, object_id) for _, kind, object_id, _, _ in response['changes']], [('task', mine.pk)])
+        self.assertEqual(response['last_seq'], ChangeLogEntry.objects.latest('seq').seq)
+        
+        self.project.collaborators.add(self.user)
+        changes = self.client.get(url, {'since': response['last_seq']}).json()['changes']
+        self.assertIn(('project', self.project.pk), [(kind, object_id) for _, kind, object_id, _, _ in changes])
+    
+    def test_cycle_time_assignees_come_from_visible_tasks(self):
+        """Test strangers' finished tasks appear neither in the cycle-time projects nor assignees"""
+        self.task.status = Status.DONE
+        self.task.save()
+        
+        response = self.client.get(reverse('main_app:cycle_time'))
+        
+        self.assertEqual(response.context['finished'], 0)
+        self.assertEqual(response.context['assignees'], [])
+        self.assertEqual(response.context['projects'], [])
+    
+    def test_bulk_update_skips_unreachable_tasks(self):
+        """Test bulk updates only queue the tasks the user may change"""
+        mine = TaskFactory.create_task(creator=self.user)
+        
+        response = self.client.post(
+            reverse('main_app:task_bulk_update'), {'task_ids': [mine.id, self.task.id], 'status': Status.DONE.label},
+        )
+        
+        self.assertEqual(Job.objects.get(pk=response.json()['job_id']).payload['task_ids'], [mine.id])
+
+
 class ProjectReportViewTests(TestCase):
     """Tests for ProjectReportView"""
     
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = UserFactory.create_user()
         self.client.force_login(self.user)
@@ -432,3 +669,1072 @@ class ProjectReportViewTests(TestCase):
         self.assertIn('project', response.context)
         self.assertIn('total_done', response.context)
         self.assertIn('overdue_tasks', response.context)
+    
+    def test_report_context_counts(self):
+        """Test report counters come from the report builder"""
+        response = self.client.get(reverse('main_app:project_report', kwargs={'project_id': self.project.id}))
+        
+        self.assertEqual(response.context['total_tasks'], 7)
+        self.assertEqual(response.context['overdue_count'], len(response.context['overdue_tasks']))
+        self.assertGreaterEqual(response.context['overdue_count'], 1)
+    
+    def report(self):
+        return self.client.get(reverse('main_app:project_report', kwargs={'project_id': self.project.id}))
+    
+    def test_fresh_report_is_served_from_the_cache(self):
+        """Test a report within its freshness window is reused without rebuilding or queueing anything"""
+        self.report()
+        self.project.tasks.add(TaskFactory.create_task(creator=self.user))
+        
+        response = self.report()
+        
+        self.assertEqual(response.context['total_tasks'], 7)
+        self.assertFalse(response.context['report_stale'])
+        self.assertContains(response, "As of")
+        self.assertFalse(Job.objects.filter(name='refresh_project_report').exists())
+    
+    def test_pregenerated_report_is_served_while_fresh(self):
+        """Test the nightly report is served until something in the project changes"""
+        call_command('pregenerate_reports', workers=1, csv=True, stdout=StringIO())
+        stored = ReportArtifact.objects.get(project=self.project)
+        
+        response = self.report()
+        
+        self.assertEqual(response.context['generated_at'], parse_datetime(stored.data['generated_at']))
+        csv_response = self.client.get(reverse('main_app:project_report_csv', args=[self.project.id]))
+        self.assertEqual(csv_response.content.decode(), stored.csv)
+        
+        cache.clear()
+        self.project.tasks.first().save()
+        response = self.report()
+        self.assertNotEqual(response.context['generated_at'], parse_datetime(stored.data['generated_at']))
+        self.assertNotEqual(self.client.get(reverse('main_app:project_report_csv', args=[self.project.id])).content.decode(), stored.csv)
+    
+    def test_stale_report_is_served_while_one_refresh_runs(self):
+        """Test a stale report is served at once, a crowd of views queues one refresh, and the refresh lands"""
+        self.report()
+        key = f'project-report:{self.project.id}'
+        stale = {**cache.get(key), 'generated_at': timezone.now() - timedelta(seconds=120)}
+        cache.set(key, stale)
+        self.project.tasks.add(TaskFactory.create_task(creator=self.user))
+        
+        responses = [self.report() for _ in range(3)]
+        
+        self.assertTrue(all(response.context['report_stale'] for response in responses))
+        self.assertTrue(all(response.context['total_tasks'] == 7 for response in responses))
+        job = Job.objects.get(name='refresh_project_report')
+        
+        run_job(job)
+        
+        response = self.report()
+        self.assertFalse(response.context['report_stale'])
+        self.assertEqual(response.context['total_tasks'], 8)
+        self.assertIsNone(cache.get(f'{key}:refreshing'))
+
+
+class BackgroundJobViewTests(TestCase):
+    """Tests for views that offload work to the job queue"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory.create_user()
+        self.client.force_login(self.user)
+        self.project = ProjectFactory.create_project(creator=self.user)
+    
+    def test_generate_report_returns_immediately(self):
+        """Test report generation is queued and answered with 202"""
+        response = self.client.post(reverse('main_app:project_report_generate', kwargs={'project_id': self.project.id}))
+        
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.name, 'project_report')
+        self.assertEqual(job.payload, {'project_id': self.project.id})
+        self.assertEqual(response.json()['status_url'], reverse('main_app:job_status', args=[job.id]))
+    
+    def test_bulk_update_validates_input(self):
+        """Test bulk update rejects empty selections and unknown statuses"""
+        task = TaskFactory.create_task(creator=self.user)
+        url = reverse('main_app:task_bulk_update')
+        
+        self.assertEqual(self.client.post(url, {'status': Status.DONE.label}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'task_ids': [task.id], 'status': 'Nope'}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'task_ids': [task.id], 'status': Status.DONE.label}).status_code, 202)
+    
+    def test_job_status_only_for_owner(self):
+        """Test job status is visible to the user who queued it"""
+        response = self.client.post(reverse('main_app:project_report_generate', kwargs={'project_id': self.project.id}))
+        status_url = response.json()['status_url']
+        
+        response = self.client.get(status_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], JobStatus.QUEUED)
+        
+        self.client.force_login(UserFactory.create_user(email="stranger@example.com"))
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+
+class ProjectHistoryViewTests(TestCase):
+    """Tests for ProjectHistoryView"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory.create_user()
+        self.client.force_login(self.user)
+        self.project = ProjectFactory.create_project(creator=self.user)
+        today = timezone.localdate()
+        ProjectSnapshot.objects.bulk_create([
+            ProjectSnapshot(project=self.project, day=today - timedelta(days=n), total=10, done=n)
+            for n in (400, 30, 1, 0)
+        ])
+    
+    def test_returns_range_oldest_first(self):
+        """Test the endpoint returns the requested window of days, oldest first"""
+        url = reverse('main_app:project_history', kwargs={'project_id': self.project.id})
+        
+        response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([day['done'] for day in response.json()['days']], [30, 1, 0])
+        self.assertEqual([day['done'] for day in self.client.get(url, {'days': 7}).json()['days']], [1, 0])
+        self.assertEqual(self.client.get(url, {'days': 'all'}).status_code, 400)
+    
+    def test_missing_project(self):
+        """Test unknown projects 404"""
+        response = self.client.get(reverse('main_app:project_history', kwargs={'project_id': 99999}))
+        self.assertEqual(response.status_code, 404)
+
+
+class PortfolioViewTests(TestCase):
+    """Tests for PortfolioView"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory.create_user()
+        self.client.force_login(self.user)
+        soon = timezone.now() + timedelta(days=2)
+        self.busy = ProjectFactory.create_project(creator=self.user, project_name="Busy")
+        self.busy.tasks.add(
+            TaskFactory.create_task(status=Status.TO_DO, priority=Priorities.HIGH, due_date=timezone.now() - timedelta(days=5)),
+            TaskFactory.create_task(status=Status.DONE, priority=Priorities.URGENT),
+            TaskFactory.create_task(status=Status.IN_PROGRESS, priority=Priorities.LOW, due_date=soon),
+            TaskFactory.create_task(status=Status.DONE, priority=Priorities.LOW),
+        )
+        self.calm = ProjectFactory.create_project(creator=self.user, project_name="Calm")
+        self.calm.tasks.add(TaskFactory.create_task(status=Status.DONE, priority=Priorities.LOW))
+        self.empty = ProjectFactory.create_project(creator=self.user, project_name="Empty")
+        ProjectFactory.create_project(project_name="Someone else's")
+        self.soon = soon
+    
+    def test_metrics_per_project_in_one_query(self):
+        """Test each visible project's breakdowns come from a single grouped query"""
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(reverse('main_app:portfolio'))
+        
+        rows = {row['project_name']: row for row in response.context['rows']}
+        self.assertEqual(set(rows), {"Busy", "Calm", "Empty"})
+        busy = rows["Busy"]
+        self.assertEqual(busy['total'], 4)
+        self.assertEqual(busy['overdue'], 1)
+        self.assertEqual(busy['completion'], 50)
+        self.assertEqual(busy['next_deadline'], self.soon)
+        self.assertEqual(dict(busy['by_status'])['Done'], 2)
+        self.assertEqual(dict(busy['by_priority'])['Low'], 2)
+        self.assertIsNone(rows["Empty"]['completion'])
+        grouped = [query['sql'] for query in queries.captured_queries if 'GROUP BY' in query['sql']]
+        self.assertEqual(len(grouped), 1)
+    
+    def test_archived_tasks_still_count(self):
+        """Test archived (Done) tasks stay in the total, the Done and priority columns and completion"""
+        archive_chunk(list(self.busy.tasks.filter(status=Status.DONE).values_list('pk', flat=True)))
+        self.assertEqual(self.busy.tasks.count(), 2)
+        
+        response = self.client.get(reverse('main_app:portfolio'))
+        
+        busy = next(row for row in response.context['rows'] if row['project_name'] == "Busy")
+        self.assertEqual(busy['total'], 4)
+        self.assertEqual(busy['completion'], 50)
+        self.assertEqual(dict(busy['by_status'])['Done'], 2)
+        self.assertEqual(dict(busy['by_priority']), {'Low': 2, 'Medium': 0, 'High': 1, 'Urgent': 1})
+    
+    def test_sorts_by_any_metric(self):
+        """Test ?sort= orders by the metric, with empty projects last"""
+        def names(sort):
+            response = self.client.get(reverse('main_app:portfolio'), {'sort': sort})
+            return [row['project_name'] for row in response.context['rows']]
+        
+        self.assertEqual(names('-completion'), ["Calm", "Busy", "Empty"])
+        self.assertEqual(names('completion'), ["Busy", "Calm", "Empty"])
+        self.assertEqual(names('-status_done'), ["Busy", "Calm", "Empty"])
+        self.assertEqual(names('project_name'), ["Busy", "Calm", "Empty"])
+        self.assertEqual(names('nonsense')[0], "Busy")
+    
+    @override_settings(PORTFOLIO_PAGE_SIZE=2)
+    def test_paginates(self):
+        """Test the page size and the page count from the visible projects"""
+        response = self.client.get(reverse('main_app:portfolio'), {'sort': 'project_name', 'page': 2})
+        
+        self.assertEqual([row['project_name'] for row in response.context['rows']], ["Empty"])
+        self.assertEqual(response.context['paginator'].num_pages, 2)
+
+
+class CapacityViewTests(TestCase):
+    """Tests for CapacityView"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory.create_user(is_superuser=True)
+        self.client.force_login(self.user)
+        self.ann = UserFactory.create_user(first_name="Ann", last_name="Lee")
+        self.bob = UserFactory.create_user(first_name="Bob", last_name="Ray")
+        self.monday = horizon_start()
+    
+    def due(self, week, assignee, priority, status=Status.TO_DO):
+        """A task due on the Wednesday of the given week of the horizon"""
+        due_date = timezone.make_aware(datetime.combine(self.monday + timedelta(weeks=week, days=2), datetime.min.time()))
+        return TaskFactory.create_task(assignee=assignee, priority=priority, status=status, due_date=due_date)
+    
+    def heatmap(self, **params):
+        return self.client.get(reverse('main_app:capacity'), params).context['heatmap']
+    
+    def test_weighted_load_per_assignee_and_week(self):
+        """Test the matrix holds priority-weighted loads and counts, busiest assignee first"""
+        self.due(0, self.ann, Priorities.LOW)
+        self.due(0, self.ann, Priorities.URGENT)
+        self.due(2, self.ann, Priorities.MEDIUM)
+        self.due(1, self.bob, Priorities.URGENT)
+        self.due(1, self.bob, Priorities.HIGH)
+        self.due(1, self.bob, Priorities.HIGH, status=Status.DONE)
+        self.due(1, None, Priorities.URGENT)
+        self.due(4, self.bob, Priorities.URGENT)
+        
+        with CaptureQueriesContext(connections['default']) as queries:
+            heatmap = self.heatmap(weeks=4)
+        
+        self.assertEqual(heatmap['weeks'][0], self.monday)
+        self.assertEqual([name for _, name in heatmap['assignees']], ["Bob Ray", "Ann Lee"])
+        numpy.testing.assert_array_equal(heatmap['load'], [[0, 7, 0, 0], [5, 0, 2, 0]])
+        numpy.testing.assert_array_equal(heatmap['count'], [[0, 2, 0, 0], [2, 0, 1, 0]])
+        grouped = [query['sql'] for query in queries.captured_queries if 'GROUP BY' in query['sql']]
+        self.assertEqual(len(grouped), 1)
+    
+    def test_project_filter_and_horizon(self):
+        """Test ?project= keeps that project's tasks and ?weeks= sets the columns"""
+        project = ProjectFactory.create_project(creator=self.user)
+        project.tasks.add(self.due(0, self.ann, Priorities.HIGH))
+        self.due(0, self.bob, Priorities.HIGH)
+        
+        heatmap = self.heatmap(weeks=8, project=project.id)
+        
+        self.assertEqual(len(heatmap['weeks']), 8)
+        self.assertEqual(heatmap['assignees'], [[self.ann.id, "Ann Lee"]])
+        self.assertEqual(heatmap['load'].shape, (1, 8))
+    
+    def test_sees_only_visible_tasks(self):
+        """Test a regular user's heatmap counts only the tasks they can reach"""
+        self.due(0, self.ann, Priorities.HIGH)
+        self.due(0, self.bob, Priorities.HIGH)
+        self.client.force_login(self.ann)
+        
+        response = self.client.get(reverse('main_app:capacity'))
+        
+        self.assertEqual(response.context['heatmap']['assignees'], [[self.ann.id, "Ann Lee"]])
+        self.assertContains(response, 'id="capacity-data"')
+
+
+class RiskiestTasksViewTests(TestCase):
+    """Tests for UserRiskiestTasksView and ProjectRiskiestTasksView"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory.create_user()
+        self.client.force_login(self.user)
+        self.project = ProjectFactory.create_project(creator=self.user)
+        self.tasks = []
+        for score in (10, 80, 40):
+            task = TaskFactory.create_task(assignee=self.user, status=Status.TO_DO)
+            Task.objects.filter(pk=task.pk).update(risk_score=score)
+            self.project.tasks.add(task)
+            self.tasks.append(task)
+        done = TaskFactory.create_task(assignee=self.user, status=Status.DONE)
+        Task.objects.filter(pk=done.pk).update(risk_score=99)
+        TaskFactory.create_task(assignee=self.user, status=Status.TO_DO)
+    
+    def scores(self, response):
+        return [task.risk_score for task in response.context['tasks']]
+    
+    def test_user_page_lists_open_scored_tasks_highest_first(self):
+        """Test the user's scored open tasks come highest risk first"""
+        response = self.client.get(reverse('main_app:user_riskiest_tasks', args=[self.user.id]))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.scores(response), [80, 40, 10])
+    
+    @override_settings(RISKIEST_TASKS_LIMIT=2)
+    def test_project_page_is_limited(self):
+        """Test the project page keeps the riskiest RISKIEST_TASKS_LIMIT tasks"""
+        response = self.client.get(reverse('main_app:project_riskiest_tasks', args=[self.project.id]))
+        
+        self.assertEqual(self.scores(response), [80, 40])
+    
+    def test_out_of_reach(self):
+        """Test another user's project is a 404 and their tasks stay hidden"""
+        other = UserFactory.create_user()
+        self.client.force_login(other)
+        
+        self.assertEqual(
+            self.client.get(reverse('main_app:project_riskiest_tasks', args=[self.project.id])).status_code, 404,
+        )
+        response = self.client.get(reverse('main_app:user_riskiest_tasks', args=[self.user.id]))
+        self.assertEqual(self.scores(response), [])
+
+
+class CycleTimeViewTests(TestCase):
+    """Tests for CycleTimeView"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = UserFactory.create_user(first_name="Ann", last_name="Lee")
+        self.client.force_login(self.user)
+        self.project = ProjectFactory.create_project(creator=self.user, project_name="Delivery")
+    
+    def finish(self, created_days_ago, cycle_days, assignee=None):
+        """Log a task created N days ago that took `cycle_days` from In progress to Done, ending today"""
+        task = TaskFactory.create_task(assignee=assignee, status=Status.TO_DO)
+        self.project.tasks.add(task)
+        now = timezone.now()
+        StatusTransition.objects.filter(task_id=task.pk).update(changed_at=now - timedelta(days=created_days_ago))
+        StatusTransition.objects.bulk_create([
+            StatusTransition(task_id=task.pk, from_status=Status.TO_DO, to_status=Status.IN_PROGRESS,
+                             assignee_id=task.assignee_id, changed_at=now - timedelta(days=cycle_days)),
+            StatusTransition(task_id=task.pk, from_status=Status.IN_PROGRESS, to_status=Status.DONE,
+                             assignee_id=task.assignee_id, changed_at=now),
+        ])
+        return task
+    
+    def test_percentiles_by_project_and_assignee(self):
+        """Test cycle and lead time percentiles match numpy.percentile per group"""
+        cycles = [1, 2, 3, 4, 10]
+        for days in cycles:
+            self.finish(created_days_ago=20, cycle_days=days, assignee=self.user)
+        self.finish(created_days_ago=5, cycle_days=2)
+        
+        response = self.client.get(reverse('main_app:cycle_time'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['finished'], 6)
+        project, = response.context['projects']
+        self.assertEqual(project['name'], "Delivery")
+        self.assertEqual(project['cycle']['count'], 6)
+        self.assertAlmostEqual(project['cycle']['p90'], numpy.percentile(cycles + [2], 90), places=3)
+        ann, unassigned = response.context['assignees']
+        self.assertEqual((ann['name'], unassigned['name']), ("Ann Lee", "Unassigned"))
+        self.assertAlmostEqual(ann['cycle']['p50'], 3, places=3)
+        self.assertAlmostEqual(ann['lead']['p75'], 20, places=3)
+        self.assertContains(response, "Delivery")
+    
+    def test_window_excludes_older_work(self):
+        """Test only tasks finished inside the selected window count"""
+        task = self.finish(created_days_ago=200, cycle_days=100)
+        StatusTransition.objects.filter(task_id=task.pk).update(changed_at=timezone.now() - timedelta(days=100))
+        
+        response = self.client.get(reverse('main_app:cycle_time'), {'days': 30})
+        
+        self.assertEqual(response.context['finished'], 0)
+        self.assertContains(response, "No tasks finished in this period.")
+
+
+class CalendarViewTests(TestCase):
+    """Tests for CalendarView and CalendarFeedView"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory.create_user(first_name="Ann")
+        self.client.force_login(self.user)
+        self.day = timezone.make_aware(datetime(2030, 5, 15, 9, 0))
+    
+    def feed(self, **params):
+        return self.client.get(reverse('main_app:calendar_feed'), {'date': '2030-05-15', **params}).json()
+    
+    def test_month_buckets_by_day_and_caps(self):
+        """Test the month feed groups tasks by day, sends the first few and counts the rest"""
+        for hour in range(6):
+            TaskFactory.create_task(assignee=self.user, due_date=self.day + timedelta(hours=hour))
+        TaskFactory.create_task(creator=self.user, due_date=self.day + timedelta(days=3))
+        TaskFactory.create_task(creator=self.user, due_date=self.day + timedelta(days=60))
+        
+        feed = self.feed(view='month')
+        
+        self.assertEqual((feed['start'], feed['end']), ('2030-04-29', '2030-06-03'))
+        self.assertEqual(set(feed['days']), {'2030-05-15', '2030-05-18'})
+        crowded = feed['days']['2030-05-15']
+        self.assertEqual(crowded['count'], 6)
+        self.assertEqual(len(crowded['tasks']), 4)
+        self.assertEqual(crowded['tasks'][0][feed['columns'].index('assignee')], "Ann")
+        self.assertLess(crowded['tasks'][0][4], crowded['tasks'][1][4])
+    
+    def test_feed_is_one_query(self):
+        """Test a feed page costs a single query besides the session and user"""
+        for _ in range(10):
+            TaskFactory.create_task(assignee=self.user, due_date=self.day)
+        
+        with CaptureQueriesContext(connections['default']) as queries:
+            self.feed(view='week')
+        
+        task_queries = [q['sql'] for q in queries.captured_queries if 'main_app_task' in q['sql']]
+        self.assertEqual(len(task_queries), 1)
+    
+    def test_filters_and_views(self):
+        """Test the week and timeline ranges and the project / mine filters"""
+        project = ProjectFactory.create_project(creator=self.user)
+        mine = TaskFactory.create_task(assignee=self.user, due_date=self.day)
+        other = TaskFactory.create_task(due_date=self.day)
+        project.tasks.add(other)
+        
+        week = self.feed(view='week')
+        self.assertEqual((week['start'], week['end']), ('2030-05-13', '2030-05-20'))
+        self.assertEqual(week['days']['2030-05-15']['count'], 2)
+        self.assertEqual(self.feed(view='timeline')['end'], '2030-06-12')
+        self.assertEqual([t[0] for t in self.feed(view='week', mine=1)['days']['2030-05-15']['tasks']], [mine.pk])
+        self.assertEqual([t[0] for t in self.feed(view='week', project=project.pk)['days']['2030-05-15']['tasks']], [other.pk])
+    
+    def test_page_links(self):
+        """Test the page points at the feed with its own query and links the neighbouring pages"""
+        response = self.client.get(reverse('main_app:calendar'), {'view': 'week', 'date': '2030-05-15'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'data-feed-url="/calendar/feed/?view=week&amp;date=2030-05-15"')
+        self.assertContains(response, '?view=week&amp;date=2030-05-08')
+        self.assertContains(response, '?view=week&amp;date=2030-05-22')
+
+
+class SavedViewTests(TestCase):
+    """Tests for saved views on the my-tasks and project pages"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = UserFactory.create_user()
+        self.client.force_login(self.user)
+        self.project = ProjectFactory.create_project(creator=self.user)
+    
+    def save_view(self, **data):
+        return self.client.post(reverse('main_app:saved_view_create'), {'name': "Urgent work", **data})
+    
+    def test_save_and_open_my_tasks_view(self):
+        """Test the posted labels are stored as codes and the view opens filtered and sorted"""
+        late = TaskFactory.create_task(assignee=self.user, priority=Priorities.URGENT,
+                                       due_date=timezone.now() + timedelta(days=9))
+        soon = TaskFactory.create_task(assignee=self.user, priority=Priorities.URGENT,
+                                       due_date=timezone.now() + timedelta(days=1))
+        TaskFactory.create_task(assignee=self.user, priority=Priorities.LOW)
+        
+        response = self.save_view(priority="urgent", sort="due_date")
+        
+        saved = SavedView.objects.get(owner=self.user)
+        self.assertEqual(saved.spec, {'status': None, 'priority': Priorities.URGENT, 'overdue': False, 'sort': 'due_date'})
+        self.assertRedirects(response, f"{reverse('main_app:my_tasks')}?view={saved.pk}")
+        response = self.client.get(reverse('main_app:my_tasks'), {'view': saved.pk})
+        self.assertEqual(list(response.context['tasks']), [soon, late])
+        self.assertEqual(response.context['saved_view_filters']['priority'], "Urgent")
+    
+    def test_invalid_spec_is_rejected(self):
+        """Test an unknown status is a 400 and saves nothing, while an unknown sort falls back to the default"""
+        self.assertEqual(self.save_view(status="Someday").status_code, 400)
+        self.assertFalse(SavedView.objects.exists())
+        
+        self.save_view(sort="description")
+        self.save_view(sort="priority")
+        
+        self.assertEqual(SavedView.objects.get().spec['sort'], 'priority')
+    
+    def test_cached_page_follows_task_changes(self):
+        """Test reopening a view only loads the cached ids' rows until a task changes"""
+        task = TaskFactory.create_task(assignee=self.user, status=Status.TO_DO)
+        self.save_view(status="To do")
+        url = f"{reverse('main_app:my_tasks')}?view={SavedView.objects.get().pk}"
+        self.client.get(url)
+        
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(url)
+        
+        self.assertEqual(list(response.context['tasks']), [task])
+        task_queries = [q['sql'] for q in queries.captured_queries if 'FROM "main_app_task"' in q['sql']]
+        self.assertEqual(len(task_queries), 1)
+        self.assertIn('"main_app_task"."id" IN', task_queries[0])
+        task.status = Status.DONE
+        task.save()
+        self.assertEqual(list(self.client.get(url).context['tasks']), [])
+        
+        added = TaskFactory.create_task(assignee=self.user, status=Status.TO_DO)
+        self.assertEqual(list(self.client.get(url).context['tasks']), [added])
+    
+    def test_cache_holds_ids_and_names_stay_fresh(self):
+        """Test only task ids are cached, so a renamed project or assignee shows on the next open"""
+        task = TaskFactory.create_task(assignee=self.user, status=Status.TO_DO)
+        self.project.tasks.add(task)
+        self.save_view(status="To do")
+        saved = SavedView.objects.get()
+        url = f"{reverse('main_app:my_tasks')}?view={saved.pk}"
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.client.get(url)
+        
+        cached = [call.args[1] for call in cache_set.call_args_list if call.args[0].startswith('saved-view:')]
+        self.assertEqual(cached, [[task.pk]])
+        self.project.project_name = "Renamed project"
+        self.project.save()
+        self.user.first_name = "Renamed"
+        self.user.save()
+        
+        response = self.client.get(url)
+        self.assertContains(response, "Renamed project")
+        self.assertEqual(response.context['tasks'][0].assignee.first_name, "Renamed")
+    
+    def test_other_users_changes_keep_the_cache(self):
+        """Test a task change elsewhere does not drop this user's cached views"""
+        TaskFactory.create_task(assignee=self.user, status=Status.TO_DO)
+        self.save_view(status="To do")
+        url = f"{reverse('main_app:my_tasks')}?view={SavedView.objects.get().pk}"
+        self.client.get(url)
+        generation = cache.get(user_generation_key(self.user.pk))
+        
+        TaskFactory.create_task(assignee=UserFactory.create_user(), status=Status.TO_DO).save()
+        
+        self.assertEqual(cache.get(user_generation_key(self.user.pk)), generation)
+    
+    def test_project_view(self):
+        """Test a project's saved view lists that project's tasks and opens on no other page"""
+        mine = TaskFactory.create_task(creator=self.user, status=Status.DONE)
+        self.project.tasks.add(mine, TaskFactory.create_task(creator=self.user, status=Status.BACKLOG))
+        
+        self.save_view(project=self.project.id, status="Done", sort="-status")
+        saved = SavedView.objects.get()
+        
+        response = self.client.get(reverse('main_app:one_project', args=[self.project.id]), {'view': saved.pk})
+        self.assertEqual(list(response.context['tasks']), [mine])
+        self.assertEqual(self.client.get(reverse('main_app:my_tasks'), {'view': saved.pk}).status_code, 404)
+    
+    def test_views_belong_to_their_owner(self):
+        """Test another user can neither open a view nor save one on a project out of reach"""
+        self.save_view()
+        saved = SavedView.objects.get()
+        other = Client()
+        other.force_login(UserFactory.create_user())
+        
+        self.assertEqual(other.get(reverse('main_app:my_tasks'), {'view': saved.pk}).status_code, 404)
+        self.assertEqual(other.post(reverse('main_app:saved_view_delete', args=[saved.pk])).status_code, 404)
+        response = other.post(reverse('main_app:saved_view_create'), {'name': "Peek", 'project': self.project.id})
+        self.assertEqual(response.status_code, 404)
+    
+    def test_same_name_replaces(self):
+        """Test saving under an existing name updates that view"""
+        self.save_view(status="Done")
+        self.save_view(status="Backlog")
+        
+        self.assertEqual(SavedView.objects.get().spec['status'], Status.BACKLOG)
+
+
+class ProjectBoardViewTests(TestCase):
+    """Tests for ProjectBoardView and ProjectBoardMoveView"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory.create_user(first_name="Ann")
+        self.client.force_login(self.user)
+        self.project = ProjectFactory.create_project(creator=self.user)
+        self.tasks = [
+            TaskFactory.create_task(creator=self.user, status=Status.TO_DO, task_name=f"Card {n}") for n in range(3)
+        ]
+        self.project.tasks.add(*self.tasks)
+    
+    def column(self, status=Status.TO_DO):
+        return list(
+            ProjectTask.objects.filter(project=self.project, task__status=status)
+            .order_by('rank').values_list('task_id', flat=True)
+        )
+    
+    def move(self, task, status="To do", before=None, after=None):
+        return self.client.post(reverse('main_app:project_board_move', args=[self.project.id]), {
+            'task_id': task.id,
+            'status': status,
+            'before': before.id if before else '',
+            'after': after.id if after else '',
+        })
+    
+    def test_board_is_one_query(self):
+        """Test the board renders every column from a single query on the project's cards"""
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(reverse('main_app:project_board', args=[self.project.id]))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([status for status, cards in response.context['columns']], list(Status))
+        self.assertEqual(
+            [card['id'] for card in dict(response.context['columns'])[Status.TO_DO]], [t.id for t in self.tasks],
+        )
+        card_queries = [q['sql'] for q in queries.captured_queries if 'main_app_project_tasks' in q['sql']]
+        self.assertEqual(len(card_queries), 1)
+    
+    def test_move_within_column_updates_one_row(self):
+        """Test moving a card to the top rewrites only its own rank"""
+        first, second, third = self.tasks
+        ranks = dict(ProjectTask.objects.values_list('task_id', 'rank'))
+        
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.move(third, after=first)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.column(), [third.id, first.id, second.id])
+        self.assertEqual(dict(ProjectTask.objects.exclude(task=third).values_list('task_id', 'rank')),
+                         {pk: rank for pk, rank in ranks.items() if pk != third.id})
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+    
+    def test_move_to_another_column_changes_status(self):
+        """Test dropping a card in another column sets the task's status and logs the transition"""
+        task = self.tasks[1]
+        
+        response = self.move(task, status="In progress")
+        
+        self.assertEqual(response.json()['status'], "In progress")
+        task.refresh_from_db()
+        self.assertEqual(task.status, Status.IN_PROGRESS)
+        self.assertEqual(self.column(Status.IN_PROGRESS), [task.id])
+        self.assertTrue(StatusTransition.objects.filter(task_id=task.id, to_status=Status.IN_PROGRESS).exists())
+    
+    def test_stale_neighbours_conflict(self):
+        """Test neighbours that are not in the target column answer 409 and change nothing"""
+        first, second, third = self.tasks
+        ranks = dict(ProjectTask.objects.values_list('task_id', 'rank'))
+        
+        self.assertEqual(self.move(first, status="Done", before=second).status_code, 409)
+        self.assertEqual(self.move(first, before=third, after=second).status_code, 409)
+        self.assertEqual(dict(ProjectTask.objects.values_list('task_id', 'rank')), ranks)
+    
+    def test_move_between_tied_cards(self):
+        """Test cards that share a rank are spread out before a card goes between them"""
+        first, second, third = self.tasks
+        ProjectTask.objects.filter(task__in=[first, second]).update(rank='zz')
+        
+        response = self.move(third, before=first, after=second)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.column(), [first.id, third.id, second.id])
+    
+    @override_settings(BOARD_RANK_MAX_LENGTH=2)
+    def test_long_keys_queue_a_rebalance(self):
+        """Test a column whose keys grew too long is re-ranked by a job, keeping its order"""
+        first, second, third = self.tasks
+        for _ in range(6):
+            self.move(third, after=first)
+            self.move(first, after=third)
+        order = self.column()
+        
+        job = Job.objects.filter(name='rebalance_board').first()
+        self.assertIsNotNone(job)
+        run_job(job)
+        
+        self.assertEqual(self.column(), order)
+        self.assertTrue(all(len(rank) <= 2 for rank in ProjectTask.objects.values_list('rank', flat=True)))
+    
+    def test_board_out_of_reach(self):
+        """Test another user's project board and moves are 404"""
+        other = Client()
+        other.force_login(UserFactory.create_user())
+        
+        self.assertEqual(other.get(reverse('main_app:project_board', args=[self.project.id])).status_code, 404)
+        response = other.post(
+            reverse('main_app:project_board_move', args=[self.project.id]),
+            {'task_id': self.tasks[0].id, 'status': "Done"},
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskImportViewTests(TestCase):
+    """Tests for TaskImportView and TaskImportRejectsView"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory.create_user(email="owner@example.com")
+        self.client.force_login(self.user)
+        self.project = ProjectFactory.create_project(creator=self.user, project_name="Migration")
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+    
+    def test_rejects_unknown_file_types(self):
+        """Test only CSV and JSON Lines uploads are accepted"""
+        url = reverse('main_app:task_import')
+        
+        self.assertEqual(self.client.post(url).status_code, 400)
+        upload = SimpleUploadedFile('tasks.xlsx', b'data')
+        self.assertEqual(self.client.post(url, {'file': upload}).status_code, 400)
+    
+    def test_upload_is_imported_by_a_job(self):
+        """Test the upload is queued, imported by the worker and its rejects can be downloaded"""
+        lines = [
+            {'task_name': 'Ported', 'task_description': 'From the old tracker', 'status': Status.TO_DO.label, 'priority': Priorities.HIGH.label,
+             'due_date': '2030-01-01T09:00', 'assignee': 'OWNER@example.com', 'projects': ['Migration']},
+            {'task_name': 'Broken', 'task_description': 'Never', 'status': 'Someday', 'priority': Priorities.LOW.label, 'due_date': '2030-01-01T09:00'},
+        ]
+        content = '\n'.join(json.dumps(line) for line in lines).encode() + b'\n{not json\n'
+        upload = SimpleUploadedFile('tasks.jsonl', content)
+        
+        response = self.client.post(reverse('main_app:task_import'), {'file': upload})
+        
+        self.assertEqual(response.status_code, 202)
+        job = run_job(Job.objects.get(pk=response.json()['job_id']))
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(job.result['imported'], 1)
+        self.assertEqual(job.result['rejected'], 2)
+        task = Task.objects.get(task_name='Ported')
+        self.assertEqual(task.assignee, self.user)
+        self.assertEqual(task.creator, self.user)
+        self.assertEqual(list(task.projects.all()), [self.project])
+        
+        response = self.client.get(reverse('main_app:task_import_rejects', args=[job.id]))
+        rejects = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['line'] for row in rejects], [2, 3])
+        self.assertTrue(rejects[0]['errors'][0].startswith('status:'))
+        self.assertEqual(rejects[1]['raw'], '{not json')
+
+
+class ConditionalGetTests(TestCase):
+    """Tests for ETag / Last-Modified handling"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = UserFactory.create_user()
+        self.client.force_login(self.user)
+        self.task = TaskFactory.create_task(creator=self.user, assignee=self.user)
+        self.project = ProjectFactory.create_project(creator=self.user)
+        self.project.tasks.add(self.task)
+    
+    def assertRevalidates(self, url):
+        self.client.get(url)  # first visit sets the CSRF cookie, which is part of the ETag
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first.headers)
+        self.assertIn('Last-Modified', first.headers)
+        
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(second.status_code, 304)
+        return first.headers['ETag']
+    
+    def test_task_detail_not_modified(self):
+        """Test task detail answers 304 until the task changes"""
+        url = reverse('main_app:one_task', kwargs={'task_id': self.task.id})
+        etag = self.assertRevalidates(url)
+        
+        self.task.task_name = "Changed"
+        self.task.save()
+        
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_project_detail_changes_when_task_deleted(self):
+        """Test deleting a project task invalidates the project ETag"""
+        url = reverse('main_app:one_project', kwargs={'project_id': self.project.id})
+        etag = self.assertRevalidates(url)
+        
+        self.task.delete()
+        
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_report_and_lists_revalidate(self):
+        """Test report and list views support conditional GET"""
+        self.assertRevalidates(reverse('main_app:project_report', kwargs={'project_id': self.project.id}))
+        self.assertRevalidates(reverse('main_app:my_tasks'))
+        self.assertRevalidates(reverse('main_app:projects_view'))
+    
+    def test_my_tasks_changes_with_project_and_assignee_names(self):
+        """Test renaming a listed project or the assignee invalidates the my-tasks ETag"""
+        url = reverse('main_app:my_tasks')
+        etag = self.assertRevalidates(url)
+    
+        self.project.project_name = "Renamed"
+        self.project.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+        etag = self.assertRevalidates(url)
+        self.user.first_name = "Renamed"
+        self.user.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_view_without_a_stamp_just_renders(self):
+        """Test a view that does not override get_change_stamp renders without an ETag"""
+        class Page(View):
+            def get(self, request):
+                return HttpResponse("plain")
+        
+        class StampedPage(ConditionalGetMixin, Page):
+            pass
+        
+        response = StampedPage.as_view()(RequestFactory().get('/'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+    
+    def test_etag_is_per_user(self):
+        """Test another user never gets a 304 for someone else's copy"""
+        url = reverse('main_app:one_task', kwargs={'task_id': self.task.id})
+        etag = self.client.get(url).headers['ETag']
+        
+        second = UserFactory.create_user(email="second@example.com")
+        self.task.collaborators.add(second)
+        self.client.force_login(second)
+        
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_missing_task_still_404(self):
+        """Test conditional handling does not hide 404s"""
+        url = reverse('main_app:one_task', kwargs={'task_id': 999999})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ChangeFeedViewTests(TestCase):
+    """Tests for the incremental change feed"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory.create_user()
+        self.client.force_login(self.user)
+    
+    def test_login_required(self):
+        """Test feed requires authentication"""
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('main_app:change_feed')).status_code, 302)
+    
+    def test_incremental_sync(self):
+        """Test clients page through changes with since/last_seq"""
+        TaskFactory.create_tasks(count=3, creator=self.user)
+        url = reverse('main_app:change_feed')
+        
+        first = self.client.get(url, {'since': 0, 'limit': 2}).json()
+        self.assertEqual(len(first['changes']), 2)
+        self.assertTrue(first['has_more'])
+        
+        second = self.client.get(url, {'since': first['last_seq']}).json()
+        self.assertEqual(len(second['changes']), 1)
+        self.assertFalse(second['has_more'])
+        seq, kind, object_id, action, data = second['changes'][0]
+        self.assertEqual((kind, action), ('task', 'create'))
+        self.assertEqual(data['task_name'], 'Task 2')
+        
+        idle = self.client.get(url, {'since': second['last_seq']}).json()
+        self.assertEqual(idle['changes'], [])
+        self.assertEqual(idle['last_seq'], second['last_seq'])
+    
+    def test_invalid_since(self):
+        """Test non-numeric cursors are rejected"""
+        response = self.client.get(reverse('main_app:change_feed'), {'since': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class EventStreamViewTests(TestCase):
+    """Tests for the Server-Sent Events stream"""
+    
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.other = UserFactory.create_user(email='other@example.com')
+    
+    def test_login_required(self):
+        """Test anonymous clients get 401 instead of a login page"""
+        response = self.client.get(reverse('main_app:event_stream'))
+        self.assertEqual(response.status_code, 401)
+    
+    async def test_replays_missed_events(self):
+        """Test Last-Event-ID replays visible changes only"""
+        await self.async_client.aforce_login(self.user)
+        since = await sync_to_async(latest_seq)()
+        mine = await sync_to_async(TaskFactory.create_task)(creator=self.user, assignee=self.user)
+        await sync_to_async(TaskFactory.create_task)(creator=self.other, assignee=self.other, task_name='Hidden')
+        
+        response = await self.async_client.get(reverse('main_app:event_stream'), headers={'Last-Event-ID': str(since)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        
+        stream = response.streaming_content
+        try:
+            self.assertTrue((await anext(stream)).startswith(b'retry:'))
+            event = (await anext(stream)).decode()
+        finally:
+            await stream.aclose()
+        
+        self.assertIn('event: task', event)
+        self.assertIn(f'"id":{mine.pk}', event)
+        self.assertNotIn('Hidden', event)
+    
+    @override_settings(CHANGE_FEED_PAGE_SIZE=1)
+    async def test_replay_past_the_page_size_asks_for_resync(self):
+        """Test a replay cut at CHANGE_FEED_PAGE_SIZE ends with a resync event"""
+        await self.async_client.aforce_login(self.user)
+        since = await sync_to_async(latest_seq)()
+        for _ in range(2):
+            await sync_to_async(TaskFactory.create_task)(creator=self.user, assignee=self.user)
+        
+        response = await self.async_client.get(reverse('main_app:event_stream'), headers={'Last-Event-ID': str(since)})
+        stream = response.streaming_content
+        try:
+            events = [(await anext(stream)).decode() for _ in range(3)]
+        finally:
+            await stream.aclose()
+        
+        self.assertIn('event: task', events[1])
+        self.assertTrue(events[2].startswith('event: resync'))
+    
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=2)
+    def test_poller_waits_for_late_commits(self):
+        """Test a lower seq committed after a higher one was read is still delivered"""
+        since = latest_seq()
+        TaskFactory.create_task(creator=self.user, task_name='Late')
+        TaskFactory.create_task(creator=self.user, task_name='Early')
+        entries = list(ChangeLogEntry.objects.filter(seq__gt=since).order_by('seq'))
+        late, early = entries[0], entries[-1]
+        late.delete()  # not committed yet when the poller first reads
+        
+        first = entries_after(since)
+        last_seq = first[-1].seq if first else since
+        late.save()  # commits with its lower seq
+        with mock.patch.object(timezone, 'now', return_value=timezone.now() + timedelta(seconds=3)):
+            second = entries_after(last_seq)
+        
+        self.assertEqual(first, [])
+        self.assertIn(late.seq, [entry.seq for entry in first + second])
+        self.assertIn(early.seq, [entry.seq for entry in second])
+    
+    def test_scope_follows_membership(self):
+        """Test a user sees tasks joining their projects and the last event of tasks leaving"""
+        project = ProjectFactory.create_project(creator=self.user)
+        task = TaskFactory.create_task(creator=self.other, assignee=self.other)
+        scope = EventScope.for_user(self.user)
+        self.assertNotIn(task.pk, scope.task_ids)
+        
+        project.tasks.add(task)
+        joined = ChangeLogEntry.objects.filter(kind='task', object_id=task.pk).last()
+        self.assertTrue(scope.allows(joined))
+        
+        project.tasks.remove(task)
+        left = ChangeLogEntry.objects.filter(kind='task', object_id=task.pk).last()
+        self.assertTrue(scope.allows(left))
+        
+        task.save()
+        later = ChangeLogEntry.objects.filter(kind='task', object_id=task.pk).last()
+        self.assertFalse(scope.allows(later))
+    
+    async def test_slow_subscriber_gets_resync(self):
+        """Test a full buffer is replaced by a single resync marker"""
+        subscription = Subscription(asyncio.get_running_loop(), buffer_size=2)
+        for n in range(5):
+            subscription.offer(n)
+        
+        self.assertIs(await subscription.get(), RESYNC)
+        self.assertTrue(subscription.queue.empty())
+
+
+@override_settings(LIST_TEMPLATE_ENGINE='jinja2')
+class JinjaTemplateEngineTests(TestCase):
+    """Tests for the list and report pages rendered with Jinja2"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory.create_user(first_name="Olena")
+        self.client.force_login(self.user)
+        self.project = ProjectFactory.create_project(creator=self.user, project_name="Jinja project")
+        self.task = TaskFactory.create_task(task_name="Jinja task", assignee=self.user, priority=Priorities.HIGH)
+        self.project.tasks.add(self.task)
+    
+    def test_my_tasks_page(self):
+        """Test my tasks renders with layout, sort links and row forms"""
+        response = self.client.get(reverse('main_app:my_tasks'), {'priority': Priorities.HIGH.label})
+        
+        self.assertContains(response, "Welcome Olena")
+        self.assertContains(response, "Jinja task")
+        self.assertContains(response, "?priority=High&amp;sort=task_name")
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+        self.assertContains(response, reverse('main_app:one_task', args=[self.task.id]))
+    
+    def test_project_page_and_fragment(self):
+        """Test the project page and its task fragment"""
+        page = self.client.get(reverse('main_app:one_project', kwargs={'project_id': self.project.id}))
+        self.assertContains(page, "Jinja project")
+        self.assertContains(page, "Jinja task")
+        
+        fragment = self.client.get(reverse('main_app:project_tasks_table', kwargs={'project_id': self.project.id}))
+        self.assertContains(fragment, "Jinja task")
+        self.assertNotContains(fragment, "Jinja project")
+    
+    def test_report_page(self):
+        """Test the report renders its summary"""
+        response = self.client.get(reverse('main_app:project_report', kwargs={'project_id': self.project.id}))
+        self.assertContains(response, "Project Report")
+        self.assertContains(response, "Jinja task")
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Tests for reading from replicas with read-your-writes pinning"""
+    
+    @classmethod
+    def setUpClass(cls):
+        # a second connection to the test database stands in for the replica
+        connections.settings['replica'] = dict(connections['default'].settings_dict)
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+    
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+    
+    def setUp(self):
+        db_router._down_until.clear()
+        self.user = UserFactory.create_user()
+        self.task = TaskFactory.create_task(assignee=self.user)
+        self.client.force_login(self.user)
+    
+    def get_my_tasks(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(reverse('main_app:my_tasks'))
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in replica.captured_queries if 'main_app_task' in q['sql']]
+    
+    def test_get_reads_from_replica(self):
+        """Test list views read tasks from the replica"""
+        self.assertTrue(self.get_my_tasks())
+    
+    def test_pinned_to_primary_after_write(self):
+        """Test a write pins the user's next reads to the primary"""
+        response = self.client.post(reverse('main_app:task_mark_done', kwargs={'task_id': self.task.id}))
+        self.assertIn(db_router.PIN_COOKIE, response.cookies)
+        
+        self.assertEqual(self.get_my_tasks(), [])
+        
+        self.client.cookies[db_router.PIN_COOKIE] = '0'
+        self.assertTrue(self.get_my_tasks())
+    
+    @override_settings(DATABASE_REPLICAS=['missing'])
+    def test_falls_back_when_replica_unavailable(self):
+        """Test reads go to the primary when no replica can be reached"""
+        with self.assertLogs('config.db_router', 'WARNING'):
+            response = self.client.get(reverse('main_app:my_tasks'))
+        
+        self.assertContains(response, self.task.task_name)
+        self.assertGreater(db_router._down_until['missing'], 0)
+    
+    def test_outside_requests_use_primary(self):
+        """Test code outside read_from_replicas(), or after a write, reads the primary"""
+        self.assertEqual(Task.objects.all().db, 'default')
+        with db_router.read_from_replicas():
+            self.assertEqual(Task.objects.all().db, 'replica')
+            self.task.save()
+            self.assertEqual(Task.objects.all().db, 'default')
+    
+    def test_cache_reads_and_writes_stay_on_primary(self):
+        """Test the database cache is read from the primary and filling it does not pin the user"""
+        with CaptureQueriesContext(connections['replica']) as replica:
+            with db_router.read_from_replicas() as state:
+                cache.set('replica-test', 1)
+                self.assertEqual(cache.get('replica-test'), 1)
+                self.assertFalse(state['wrote'])
+        
+        self.assertFalse([q for q in replica.captured_queries if 'django_cache' in q['sql']])
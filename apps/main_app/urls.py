@@ -2,7 +2,12 @@ from django.urls import path
 
 from .views import MyTasksListView, ProjectCreateView, TaskCreateView, UsersListView, UserTasksView, MainView, \
     ProjectDeleteView, ProjectsListView, TaskDeleteView, OneTaskDetailView, ProjectUpdateView, TaskUpdateView, \
-    OneProjectListView, TaskMarkDoneView, LeaveTaskView, ProjectReportView
+    OneProjectListView, TaskMarkDoneView, LeaveTaskView, ProjectReportView, ProjectReportJobView, \
+    TaskBulkUpdateView, JobStatusView, ChangeFeedView, EventStreamView, \
+    MyTasksTableView, ProjectTasksTableView, TaskImportView, TaskImportRejectsView, \
+    ProjectHistoryView, CycleTimeView, CalendarView, CalendarFeedView, ProjectBoardView, ProjectBoardMoveView, \
+    SavedViewCreateView, SavedViewDeleteView, ProjectReportCsvView, PortfolioView, \
+    CapacityView, UserRiskiestTasksView, ProjectRiskiestTasksView
 
 app_name = 'apps.main_app'
 
@@ -10,8 +15,12 @@ urlpatterns = [
     path('', MainView.as_view(), name='main_page'),
 
     path('tasks/', MyTasksListView.as_view(), name='my_tasks'),
+    path('tasks/table/', MyTasksTableView.as_view(), name='my_tasks_table'),
     path('tasks/create', TaskCreateView.as_view(), name='task_create'),
     path('tasks/delete/<int:pk>', TaskDeleteView.as_view(), name='task_delete'),
+    path('tasks/bulk-update/', TaskBulkUpdateView.as_view(), name='task_bulk_update'),
+    path('tasks/import/', TaskImportView.as_view(), name='task_import'),
+    path('tasks/import/<int:job_id>/rejects/', TaskImportRejectsView.as_view(), name='task_import_rejects'),
     path("task/<int:task_id>/edit/", TaskUpdateView.as_view(), name="task_edit"),
     
     path("task/<int:task_id>/mark-done/", TaskMarkDoneView.as_view(), name="task_mark_done"),
@@ -21,8 +30,12 @@ urlpatterns = [
     path("task/<int:task_id>/leave/", LeaveTaskView.as_view(), name="task_leave"),
 
     path('projects/', ProjectsListView.as_view(), name='projects_view'),
+    path('portfolio/', PortfolioView.as_view(), name='portfolio'),
     path('project/create', ProjectCreateView.as_view(), name='project_create'),
     path("project/<int:project_id>/", OneProjectListView.as_view(), name="one_project"),
+    path("project/<int:project_id>/tasks/", ProjectTasksTableView.as_view(), name="project_tasks_table"),
+    path("project/<int:project_id>/board/", ProjectBoardView.as_view(), name="project_board"),
+    path("project/<int:project_id>/board/move/", ProjectBoardMoveView.as_view(), name="project_board_move"),
     path("project/<int:project_id>/edit/", ProjectUpdateView.as_view(), name="project_edit"),
     path("project/<int:project_id>/delete/", ProjectDeleteView.as_view(), name="project_delete"),
     
@@ -30,9 +43,27 @@ urlpatterns = [
     "project/<int:project_id>/report/",
     ProjectReportView.as_view(),
     name="project_report"),
+    path("project/<int:project_id>/report.csv", ProjectReportCsvView.as_view(), name="project_report_csv"),
+    path("project/<int:project_id>/report/generate/", ProjectReportJobView.as_view(), name="project_report_generate"),
+    path("project/<int:project_id>/history/", ProjectHistoryView.as_view(), name="project_history"),
+    path("project/<int:project_id>/at-risk/", ProjectRiskiestTasksView.as_view(), name="project_riskiest_tasks"),
+
+    path('views/', SavedViewCreateView.as_view(), name='saved_view_create'),
+    path('views/<int:view_id>/delete/', SavedViewDeleteView.as_view(), name='saved_view_delete'),
+
+    path('calendar/', CalendarView.as_view(), name='calendar'),
+    path('calendar/feed/', CalendarFeedView.as_view(), name='calendar_feed'),
+
+    path('analytics/cycle-time/', CycleTimeView.as_view(), name='cycle_time'),
+    path('analytics/capacity/', CapacityView.as_view(), name='capacity'),
+
+    path('jobs/<int:job_id>/', JobStatusView.as_view(), name='job_status'),
+    path('changes/', ChangeFeedView.as_view(), name='change_feed'),
+    path('events/', EventStreamView.as_view(), name='event_stream'),
 
     path('users/', UsersListView.as_view(), name='users_list'),
-    path('users/<int:user_id>', UserTasksView.as_view(), name='users_tasks')
+    path('users/<int:user_id>', UserTasksView.as_view(), name='users_tasks'),
+    path('users/<int:user_id>/at-risk/', UserRiskiestTasksView.as_view(), name='user_riskiest_tasks'),
 
 
 ]
\ No newline at end of file
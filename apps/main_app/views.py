@@ -1,16 +1,211 @@
+import asyncio
+import hashlib
+import os
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponseRedirect, HttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.middleware.csrf import get_token
+from django.http import FileResponse, Http404, HttpResponseRedirect, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import View, ListView, TemplateView, CreateView, UpdateView, DeleteView, DetailView
 from django.shortcuts import get_object_or_404
-
-from .forms import TaskCreationForm, ProjectCreationForm
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
+
+from .access import accessible_project_ids, visible_archived_tasks, visible_projects, visible_tasks
+from .analytics import cached_cycle_time_report
+from .board import StaleBoard, board_columns, move_card
+from .capacity import capacity_heatmap
+from .events import RESYNC, EventScope, broadcaster, entries_after, format_event, settled_entries
+from .forms import TaskCreationForm, ProjectCreationForm, SavedViewForm
+from .imports import detect_format, save_upload
+from .jobs import enqueue
+from .portfolio import DEFAULT_SORT, PORTFOLIO_SORTS, PRIORITY_COLUMNS, STATUS_COLUMNS, portfolio_rows, with_breakdowns
+from .purge import delete_project
 from .models import *
+from .reports import artifact_is_fresh, cached_project_report, report_cache_key, report_csv
+from .saved_views import MY_TASKS_SORTS, PROJECT_SORTS, page_sorts, saved_view_tasks
+from .schedule import CALENDAR_VIEWS, calendar_feed, calendar_range, calendar_step
+from .snapshots import project_history
 
 User = get_user_model()
 
 
+class ConditionalGetMixin:
+    """
+    Answer GET with 304 Not Modified when nothing the page shows has changed.
+
+    get_change_stamp() returns one aggregate row (latest updated_at values and row
+    counts) over everything the page renders; counts catch deletions that leave
+    no updated_at behind.
+    """
+
+    def get_change_stamp(self):
+        """
+        One aggregate row over everything the page renders, related rows included: latest
+        updated_at values plus row counts, the listed rows' under "count". None (the
+        default) or a zero count: no ETag, the page is just rendered.
+        """
+        return None
+
+    def get(self, request, *args, **kwargs):
+        stamp = self.get_change_stamp()
+        if not stamp or not stamp.get("count"):
+            return super().get(request, *args, **kwargs)
+
+        changed = [value for value in stamp.values() if hasattr(value, "timestamp")]
+        last_modified = int(max(changed).timestamp()) if changed else None
+        # the page also carries the user's name and CSRF token
+        key = "|".join([
+            str(request.user.pk),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+            request.GET.urlencode(),
+            *(f"{name}={value}" for name, value in sorted(stamp.items())),
+        ])
+        etag = quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response.headers["ETag"] = etag
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Cookie"])
+        return response
+
+
+class ListChangeStampMixin(ConditionalGetMixin):
+    # related rows the page renders (e.g. the task's projects): their latest change joins the stamp
+    stamp_related = ()
+
+    def get_change_stamp(self):
+        return self.get_queryset().order_by().aggregate(
+            latest=Max("updated_at"),
+            count=Count("pk", distinct=bool(self.stamp_related)),
+            **{f"{name}_latest": Max(f"{name}__updated_at") for name in self.stamp_related},
+        )
+
+
+class ProjectChangeStampMixin(ConditionalGetMixin):
+    def get_change_stamp(self):
+        return visible_projects(self.request.user).filter(pk=self.kwargs["project_id"]).aggregate(
+            latest=Max("updated_at"),
+            tasks_latest=Max("tasks__updated_at"),
+            count=Count("pk", distinct=True),
+            task_count=Count("tasks", distinct=True),
+        )
+
+
+class VisibleProjectsMixin:
+    """Limit the view's projects to those the user may reach (access.py): anything else is a 404"""
+
+    def get_queryset(self):
+        return visible_projects(self.request.user, super().get_queryset())
+
+
+class VisibleTasksMixin:
+    def get_queryset(self):
+        return visible_tasks(self.request.user, super().get_queryset())
+
+
+class TaskChoicesMixin:
+    """Offer only tasks the user may see in the project form's task picker"""
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        form.fields["tasks"].queryset = visible_tasks(self.request.user)
+        return form
+
+
+class AtomicWriteMixin:
+    """
+    Run POSTs in one transaction: the form save, its M2M rows and the receivers'
+    writes commit together. On SQLite with SQLITE_IMMEDIATE_WRITES the transaction
+    takes the write lock up front (BEGIN IMMEDIATE) and waits for it, rather than
+    failing halfway when another worker holds it.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != "POST":
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class SavedViewMixin:
+    """
+    ?view=<id> opens one of the user's saved views for this page (saved_views.py):
+    its filters and sort replace the query string's, and its tasks come from the cache.
+    The page's task list checks self.saved_view first.
+    """
+    saved_view_project_kwarg = None
+
+    def get_saved_view_project_id(self):
+        return self.kwargs[self.saved_view_project_kwarg] if self.saved_view_project_kwarg else None
+
+    @cached_property
+    def saved_view(self):
+        pk = self.request.GET.get("view", "")
+        if not pk.isdigit():
+            return None
+        return get_object_or_404(
+            SavedView, pk=pk, owner=self.request.user, project_id=self.get_saved_view_project_id(),
+        )
+
+    def get_change_stamp(self):
+        # the saved view cache already knows whether the tasks changed
+        if self.saved_view is not None:
+            return {}
+        return super().get_change_stamp()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["saved_view"] = self.saved_view
+        context["saved_views"] = SavedView.objects.filter(
+            owner=self.request.user, project_id=self.get_saved_view_project_id(),
+        ).order_by("name").values_list("pk", "name")
+        context["saved_view_filters"] = self.get_saved_view_filters()
+        return context
+
+    def get_saved_view_filters(self):
+        """The page's current filters, as the "save view" form posts them"""
+        names = ("status", "priority", "overdue", "sort")
+        if self.saved_view is None:
+            return {name: self.request.GET.get(name, "") for name in names}
+        spec = self.saved_view.spec
+        return {
+            "status": Status(spec["status"]).label if spec.get("status") else "",
+            "priority": Priorities(spec["priority"]).label if spec.get("priority") else "",
+            "overdue": "1" if spec.get("overdue") else "",
+            "sort": spec.get("sort") or "",
+        }
+
+
+class ListTemplateEngineMixin:
+    """Render with the engine picked by settings.LIST_TEMPLATE_ENGINE ("django" or "jinja2")"""
+
+    @property
+    def template_engine(self):
+        return settings.LIST_TEMPLATE_ENGINE
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # every row has a delete form: mask the CSRF token once, not once per {% csrf_token %}
+        context["csrf_token"] = get_token(self.request)
+        return context
+
+
 class MainView(View):
     def get(self, request):
         if request.user.is_authenticated:
@@ -19,50 +214,80 @@ class MainView(View):
             return redirect('authentication:login')
 
 
-class MyTasksListView(LoginRequiredMixin, ListView):
+class MyTasksListView(LoginRequiredMixin, SavedViewMixin, ListChangeStampMixin, ListTemplateEngineMixin, ListView):
     model = Task
     context_object_name = 'tasks'
     template_name = 'main_app/my_task_list.html'
+    stamp_related = ("projects", "assignee")
 
     def get_queryset(self):
+        if self.saved_view is not None:
+            return saved_view_tasks(self.saved_view)
+
         qs = Task.objects.filter(assignee=self.request.user)
 
         # === СОРТУВАННЯ =====================================================
         ordering = self.request.GET.get("sort")
 
-        sortable_fields = ["task_name", "due_date", "priority", "status"]
-
-        if ordering in sortable_fields:
-            qs = qs.order_by(ordering)
-        elif ordering and ordering.startswith("-") and ordering[1:] in sortable_fields:
-            qs = qs.order_by(ordering)
+        if ordering in MY_TASKS_SORTS:
+            qs = qs.order_by(*MY_TASKS_SORTS[ordering])
 
         # === ФІЛЬТРАЦІЯ ======================================================
         status = self.request.GET.get("status")
         priority = self.request.GET.get("priority")
 
+        # labels in the URL; an unknown one parses to None and matches nothing
         if status:
-            qs = qs.filter(status=status)
+            qs = qs.filter(status=Status.parse(status))
 
         if priority:
-            qs = qs.filter(priority=priority)
+            qs = qs.filter(priority=Priorities.parse(priority))
 
-        return qs
+        if self.request.GET.get("overdue"):
+            qs = qs.overdue()
+
+        return qs.select_related("assignee").prefetch_related("projects")
+
+
+class MyTasksTableView(MyTasksListView):
+    """Only the task table of the my-tasks page, swapped in on filter/sort changes"""
+    template_name = 'main_app/partials/my_tasks_table.html'
 
-class OneTaskDetailView(LoginRequiredMixin, DetailView):
+
+class OneTaskDetailView(LoginRequiredMixin, ConditionalGetMixin, VisibleTasksMixin, DetailView):
     model = Task
     context_object_name = 'task'
     template_name = 'main_app/one_task.html'
     pk_url_kwarg = 'task_id'
 
+    def get_change_stamp(self):
+        # the task, its projects and the assignee's other tasks, in one query
+        task_id = self.kwargs['task_id']
+        same_assignee = Task.objects.filter(pk=task_id, assignee__isnull=False).values('assignee')
+        tasks = visible_tasks(self.request.user)
+        return tasks.filter(Q(pk=task_id) | Q(assignee__in=same_assignee)).aggregate(
+            latest=Max('updated_at'),
+            projects_latest=Max("projects__updated_at", filter=Q(pk=task_id)),
+            count=Count('pk', distinct=True),
+            project_count=Count('projects', filter=Q(pk=task_id), distinct=True),
+        )
+
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            # archived tasks keep their id and stay viewable, read-only
+            return get_object_or_404(visible_archived_tasks(self.request.user), pk=self.kwargs['task_id'])
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         task = self.object  # поточна задача
+        context["archived"] = isinstance(task, ArchivedTask)
 
         # знаходимо інші задачі того самого виконавця
         context["other_tasks"] = (
-            Task.objects
+            visible_tasks(self.request.user)
             .filter(assignee=task.assignee)
             .exclude(id=task.id)
             .order_by("due_date")
@@ -70,23 +295,40 @@ class OneTaskDetailView(LoginRequiredMixin, DetailView):
 
         return context
 
-class ProjectsListView(LoginRequiredMixin, ListView):
+class ProjectsListView(LoginRequiredMixin, ListChangeStampMixin, ListView):
     model = Project
     context_object_name = 'projects'
     template_name = 'main_app/projects_list.html'
 
+    def get_queryset(self):
+        qs = visible_projects(self.request.user)
+        if self.request.GET.get("overdue"):
+            qs = qs.with_overdue_tasks()
+        return qs
+
+    def get_deleting(self):
+        return Project.all_objects.deleting().filter(creator=self.request.user).select_related("purge_job")
 
-class OneProjectListView(LoginRequiredMixin, DetailView):
-    model = Project
-    context_object_name = 'project'
-    template_name = 'main_app/one_project.html'
-    pk_url_kwarg = 'project_id'
+    def get_change_stamp(self):
+        # purge progress changes without touching any listed project
+        if self.get_deleting().exists():
+            return {}
+        return super().get_change_stamp()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context["deleting"] = self.get_deleting()
+        return context
+
+
+class ProjectTasksMixin:
+    """Tasks of the project in the URL, filtered and sorted by the query string"""
+
+    def get_tasks(self):
+        if self.saved_view is not None:
+            return saved_view_tasks(self.saved_view)
 
-        project = self.object
-        tasks = Task.objects.filter(projects=project)
+        tasks = Task.objects.filter(projects=self.kwargs["project_id"]).select_related("assignee")
 
         # --- FILTERING ---
         status = self.request.GET.get("status")
@@ -94,63 +336,121 @@ class OneProjectListView(LoginRequiredMixin, DetailView):
         sort = self.request.GET.get("sort")
 
         if status:
-            tasks = tasks.filter(status=status)
-            
+            tasks = tasks.filter(status=Status.parse(status))
 
         if priority:
-            tasks = tasks.filter(priority=priority)
+            tasks = tasks.filter(priority=Priorities.parse(priority))
 
-        # --- SORTING ---
-        valid_sorts = [
-            "task_name",
-            "due_date",
-            "status",
-            "priority",
-            "assignee__first_name",
-        ]
+        if self.request.GET.get("overdue"):
+            tasks = tasks.overdue()
 
         # --- SORTING ---
-        if sort:
-
-            # PRIORITY sorting (custom)
-            if sort == "priority":
-                order = {"Urgent": 1, "High": 2, "Medium": 3, "Low": 4}
-                tasks = sorted(tasks, key=lambda t: order.get(t.priority, 999))
-
-            elif sort == "-priority":
-                order = {"Urgent": 4, "High": 3, "Medium": 2, "Low": 1}
-                tasks = sorted(tasks, key=lambda t: order.get(t.priority, 0))
-
-            # STATUS sorting (custom)
-            elif sort == "status":
-                order = {
-                    "Done": 1,
-                    "In progress": 2,
-                    "To do": 3,
-                    "Backlog": 4,
-                }
-                tasks = sorted(tasks, key=lambda t: order.get(t.status, 999))
-
-            elif sort == "-status":
-                order = {
-                    "Done": 4,
-                    "In progress": 3,
-                    "To do": 2,
-                    "Backlog": 1,
-                }
-                tasks = sorted(tasks, key=lambda t: order.get(t.status, 0))
-
-            # NORMAL DJANGO SORT
-            else:
-                base = sort.lstrip("-")
-                valid_sorts = ["task_name", "due_date", "assignee__first_name"]
-                if base in valid_sorts:
-                    tasks = tasks.order_by(sort)
-
-        context["tasks"] = tasks
+        if sort in PROJECT_SORTS:
+            tasks = tasks.order_by(*PROJECT_SORTS[sort])
+
+        return tasks
+
+
+class OneProjectListView(
+    LoginRequiredMixin, SavedViewMixin, ProjectChangeStampMixin, ProjectTasksMixin, ListTemplateEngineMixin,
+    VisibleProjectsMixin, DetailView,
+):
+    model = Project
+    context_object_name = 'project'
+    template_name = 'main_app/one_project.html'
+    pk_url_kwarg = 'project_id'
+    saved_view_project_kwarg = 'project_id'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["tasks"] = self.get_tasks()
+        return context
+
+
+class ProjectTasksTableView(
+    LoginRequiredMixin, SavedViewMixin, ProjectChangeStampMixin, ProjectTasksMixin, ListTemplateEngineMixin,
+    TemplateView,
+):
+    """Only the task list of a project page, swapped in on filter/sort changes"""
+    template_name = 'main_app/partials/project_tasks.html'
+    saved_view_project_kwarg = 'project_id'
+
+    def get_context_data(self, **kwargs):
+        if not visible_projects(self.request.user).filter(pk=self.kwargs["project_id"]).exists():
+            raise Http404("No project found matching the query")
+        context = super().get_context_data(**kwargs)
+        context["project_id"] = self.kwargs["project_id"]
+        context["tasks"] = self.get_tasks()
         return context
 
-class ProjectCreateView(LoginRequiredMixin, CreateView):
+class ProjectBoardView(LoginRequiredMixin, VisibleProjectsMixin, DetailView):
+    """The project's kanban board: a column per status, cards in the order people dragged them to"""
+    model = Project
+    context_object_name = 'project'
+    template_name = 'main_app/project_board.html'
+    pk_url_kwarg = 'project_id'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["columns"] = board_columns(self.object)
+        return context
+
+
+class ProjectBoardMoveView(LoginRequiredMixin, AtomicWriteMixin, View):
+    """Move a card: task_id, status (label), and the ids of the cards it now sits between, if any"""
+
+    def post(self, request, project_id):
+        project = get_object_or_404(visible_projects(request.user), id=project_id)
+        ids = [request.POST.get(name, "") for name in ("task_id", "before", "after")]
+        if not ids[0] or any(pk and not pk.isdigit() for pk in ids):
+            return JsonResponse({"error": "Invalid task id"}, status=400)
+        task_id, before, after = (int(pk) if pk else None for pk in ids)
+        status = Status.parse(request.POST.get("status", ""))
+        if status is None:
+            return JsonResponse({"error": "Invalid status"}, status=400)
+        task = get_object_or_404(Task.objects.filter(projects=project), id=task_id)
+
+        try:
+            rank = move_card(project, task, status, before, after)
+        except StaleBoard as error:
+            return JsonResponse({"error": str(error)}, status=409)
+        return JsonResponse({"task_id": task.id, "status": status.label, "rank": rank})
+
+
+class SavedViewCreateView(LoginRequiredMixin, View):
+    """Save the posted filters and sort under a name, for my tasks or for ?project=<id>; same name replaces"""
+
+    def post(self, request):
+        project = request.POST.get("project", "")
+        if project:
+            project = get_object_or_404(visible_projects(request.user), pk=project if project.isdigit() else 0)
+        project_id = project.pk if project else None
+
+        data = request.POST.copy()
+        if data.get("sort") not in page_sorts(project_id):
+            # a sort the page ignores shows the default order, and saves as it
+            data["sort"] = ""
+        form = SavedViewForm(data, project_id=project_id)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        saved_view, _ = SavedView.objects.update_or_create(
+            owner=request.user, project_id=project_id, name=form.cleaned_data["name"],
+            defaults={"spec": form.spec()},
+        )
+        return redirect(saved_view_url(saved_view))
+
+
+class SavedViewDeleteView(LoginRequiredMixin, View):
+    def post(self, request, view_id):
+        saved_view = get_object_or_404(SavedView, pk=view_id, owner=request.user)
+        saved_view.delete()
+        if saved_view.project_id is None:
+            return redirect("main_app:my_tasks")
+        return redirect("main_app:one_project", project_id=saved_view.project_id)
+
+
+class ProjectCreateView(LoginRequiredMixin, AtomicWriteMixin, TaskChoicesMixin, CreateView):
     model = Project
     form_class = ProjectCreationForm
     template_name = "main_app/project_create.html"
@@ -161,7 +461,7 @@ class ProjectCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class TaskCreateView(LoginRequiredMixin, CreateView):
+class TaskCreateView(LoginRequiredMixin, AtomicWriteMixin, CreateView):
     model = Task
     form_class = TaskCreationForm
     template_name = "main_app/task_create.html"
@@ -173,7 +473,7 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class ProjectUpdateView(LoginRequiredMixin, UpdateView):
+class ProjectUpdateView(LoginRequiredMixin, AtomicWriteMixin, TaskChoicesMixin, VisibleProjectsMixin, UpdateView):
     model = Project
     form_class = ProjectCreationForm
     template_name = 'main_app/project_edit.html'
@@ -183,7 +483,7 @@ class ProjectUpdateView(LoginRequiredMixin, UpdateView):
         return reverse_lazy("main_app:one_project", kwargs={"project_id": self.object.id})
 
 
-class TaskUpdateView(LoginRequiredMixin, UpdateView):
+class TaskUpdateView(LoginRequiredMixin, AtomicWriteMixin, VisibleTasksMixin, UpdateView):
     model = Task
     form_class = TaskCreationForm
     template_name = 'main_app/task_edit.html'
@@ -192,14 +492,24 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse_lazy("main_app:one_task", kwargs={"task_id": self.object.id})
 
-class ProjectDeleteView(LoginRequiredMixin, DeleteView):
+class ProjectDeleteView(LoginRequiredMixin, AtomicWriteMixin, DeleteView):
     model = Project
     pk_url_kwarg = 'project_id'
     template_name = "main_app/project_confirm_delete.html"
     success_url = reverse_lazy("main_app:projects_view")
 
+    def get_queryset(self):
+        # collaborators work in the project; only its creator removes it
+        queryset = super().get_queryset()
+        return queryset if self.request.user.is_superuser else queryset.filter(creator=self.request.user)
+
+    def form_valid(self, form):
+        # hide it now, purge its links in the background (see purge.py)
+        delete_project(self.object, user=self.request.user)
+        return HttpResponseRedirect(self.get_success_url())
+
 
-class TaskDeleteView(LoginRequiredMixin, DeleteView):
+class TaskDeleteView(LoginRequiredMixin, AtomicWriteMixin, VisibleTasksMixin, DeleteView):
     model = Task
     success_url = reverse_lazy('main_app:my_tasks')
 
@@ -208,14 +518,18 @@ class UsersListView(LoginRequiredMixin, ListView):
     context_object_name = 'users'
     template_name = 'main_app/users_list.html'
 
-class UserTasksView(LoginRequiredMixin, ListView):
+class UserTasksView(LoginRequiredMixin, ListChangeStampMixin, ListView):
     model = Task
     context_object_name = 'tasks'
     template_name = 'main_app/user_tasks.html'
+    stamp_related = ("assignee",)
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        return Task.objects.filter(assignee_id=user_id).select_related('assignee')
+        qs = visible_tasks(self.request.user).filter(assignee_id=user_id).select_related('assignee')
+        if self.request.GET.get("overdue"):
+            qs = qs.overdue()
+        return qs
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -226,22 +540,59 @@ class UserTasksView(LoginRequiredMixin, ListView):
 
         return context
     
-class TaskMarkDoneView(LoginRequiredMixin, View):
+class RiskiestTasksMixin:
+    """Open tasks by their last deadline-risk score (risk.py), highest first"""
+    template_name = "main_app/riskiest_tasks.html"
+
+    def riskiest(self, tasks):
+        return (
+            tasks.filter(risk_score__isnull=False)
+            .exclude(status=Status.DONE)
+            .select_related("assignee")
+            .order_by("-risk_score", "pk")[:settings.RISKIEST_TASKS_LIMIT]
+        )
+
+
+class UserRiskiestTasksView(LoginRequiredMixin, RiskiestTasksMixin, TemplateView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user = get_object_or_404(User, id=self.kwargs["user_id"])
+        context.update({
+            "tasks": self.riskiest(visible_tasks(self.request.user).filter(assignee=user)),
+            "heading": f"{user.first_name} {user.last_name}".strip() or user.email,
+            "back_url": reverse("main_app:users_tasks", args=[user.id]),
+        })
+        return context
+
+
+class ProjectRiskiestTasksView(LoginRequiredMixin, RiskiestTasksMixin, TemplateView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        project = get_object_or_404(visible_projects(self.request.user), id=self.kwargs["project_id"])
+        context.update({
+            "tasks": self.riskiest(project.tasks.all()),
+            "heading": project.project_name,
+            "back_url": reverse("main_app:one_project", args=[project.id]),
+        })
+        return context
+
+
+class TaskMarkDoneView(LoginRequiredMixin, AtomicWriteMixin, View):
     def post(self, request, task_id):
-        task = get_object_or_404(Task, id=task_id)
+        task = get_object_or_404(visible_tasks(request.user), id=task_id)
 
         # Дозволити змінювати тільки виконавцю або автору
         if task.assignee != request.user and task.creator != request.user:
             return HttpResponse("Forbidden", status=403)
 
-        task.status = "Done"
+        task.status = Status.DONE
         task.save()
 
         return redirect('main_app:one_task', task_id=task.id)
     
-class LeaveTaskView(LoginRequiredMixin, View):
+class LeaveTaskView(LoginRequiredMixin, AtomicWriteMixin, View):
     def post(self, request, task_id):
-        task = get_object_or_404(Task, id=task_id)
+        task = get_object_or_404(visible_tasks(request.user), id=task_id)
         user = request.user
 
         # Якщо юзер є асайні — знімаємо його
@@ -255,56 +606,390 @@ class LeaveTaskView(LoginRequiredMixin, View):
         task.save()
         return redirect("main_app:my_tasks")
     
-class ProjectReportView(LoginRequiredMixin, DetailView):
+class ProjectReportView(
+    LoginRequiredMixin, ProjectChangeStampMixin, ListTemplateEngineMixin, VisibleProjectsMixin, DetailView,
+):
     model = Project
     template_name = "main_app/project_report.html"
     context_object_name = "project"
     pk_url_kwarg = "project_id"
 
+    def get_change_stamp(self):
+        # the page shows the cached report: a rebuild landing changes it with no task changing
+        report = cache.get(report_cache_key(self.kwargs["project_id"]))
+        return {**super().get_change_stamp(), "report": report and report["generated_at"]}
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        report, stale = cached_project_report(self.object)
+        context.update(report)
+        context["report_stale"] = stale
+        return context
+
+
+class ProjectReportCsvView(LoginRequiredMixin, View):
+    """The report as CSV: the nightly export (pregenerate_reports --csv) while fresh, else from the report page's data"""
+
+    def get(self, request, project_id):
+        project = get_object_or_404(visible_projects(request.user), id=project_id)
+        artifact = ReportArtifact.objects.filter(project=project).exclude(csv="").first()
+        if artifact is not None and artifact_is_fresh(artifact, project.id):
+            content = artifact.csv
+        else:
+            content = report_csv(cached_project_report(project)[0])
+        response = HttpResponse(content, content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="project-{project.id}-report.csv"'
+        return response
+
+
+class ProjectHistoryView(LoginRequiredMixin, View):
+    """Daily snapshots of a project for burndown / throughput charts: ?days=<n>, default a year"""
+
+    def get(self, request, project_id):
+        project = get_object_or_404(visible_projects(request.user), id=project_id)
+        try:
+            days = min(int(request.GET.get("days", 365)), settings.PROJECT_HISTORY_MAX_DAYS)
+        except ValueError:
+            return JsonResponse({"error": "days must be an integer"}, status=400)
+
+        response = JsonResponse(
+            {"project_id": project.id, "days": project_history(project.id, days)}, encoder=DjangoJSONEncoder,
+        )
+        # snapshots are written once a day
+        patch_cache_control(response, private=True, max_age=settings.PROJECT_HISTORY_MAX_AGE)
+        return response
+
 
-        project = self.object
-        tasks = Task.objects.filter(projects=project)
-
-        # ===========================
-        # 1. TOP 3 BY DEADLINE
-        # ===========================
-        top_by_deadline = tasks.exclude(due_date=None).order_by("due_date")[:3]
-
-        # ===========================
-        # 2. TOP 3 BY PRIORITY (custom ordering)
-        # ===========================
-        priority_order = {"Urgent": 1, "High": 2, "Medium": 3, "Low": 4}
-
-        top_by_priority = sorted(
-            tasks,
-            key=lambda t: priority_order.get(t.priority, 999)
-        )[:3]
-
-        # ===========================
-        # 3. OVERDUE TASKS
-        # ===========================
-        from django.utils import timezone
-        now = timezone.now()
-
-        overdue_tasks = tasks.filter(
-            due_date__lt=now
-        ).exclude(
-            status="Done"
-        ).order_by("due_date")
-
-        # ===========================
-        # 4. TOTAL DONE TASKS
-        # ===========================
-        total_done = tasks.filter(status="Done").count()
-
-        # ===========================
-        # Add to context
-        # ===========================
-        context["top_by_deadline"] = top_by_deadline
-        context["top_by_priority"] = top_by_priority
-        context["overdue_tasks"] = overdue_tasks
-        context["total_done"] = total_done
+class CycleTimeView(LoginRequiredMixin, TemplateView):
+    template_name = "main_app/cycle_time.html"
+    day_options = [30, 90, 180, 365]
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        days = self.request.GET.get("days", "90")
+        days = int(days) if days.isdigit() and int(days) in self.day_options else 90
+        # percentiles over the tasks this user may see, assignees included
+        report = cached_cycle_time_report(days, self.request.user)
+        if not self.request.user.is_superuser:
+            # a task seen as its collaborator can belong to a project the user cannot open
+            project_ids = accessible_project_ids(self.request.user)
+            report = {**report, "projects": [row for row in report["projects"] if row["id"] in project_ids]}
+        context.update(report)
+        context["day_options"] = self.day_options
+        context["sections"] = [
+            ("project", "Project", report["projects"]),
+            ("assignee", "Assignee", report["assignees"]),
+        ]
         return context
+
+
+class PortfolioView(LoginRequiredMixin, ConditionalGetMixin, ListView):
+    """Every visible project with its task metrics (portfolio.py), sortable by any of them with ?sort="""
+    context_object_name = "rows"
+    template_name = "main_app/portfolio.html"
+
+    def get_projects(self):
+        return visible_projects(self.request.user)
+
+    def get_sort(self):
+        sort = self.request.GET.get("sort", DEFAULT_SORT)
+        return sort if sort in PORTFOLIO_SORTS else DEFAULT_SORT
+
+    def get_queryset(self):
+        return portfolio_rows(self.get_projects(), self.get_sort())
+
+    def get_paginate_by(self, queryset):
+        return settings.PORTFOLIO_PAGE_SIZE
+
+    def get_paginator(self, queryset, *args, **kwargs):
+        paginator = super().get_paginator(queryset, *args, **kwargs)
+        # one row per project: count the projects, not the grouped join
+        paginator.count = self.get_projects().count()
+        return paginator
+
+    def get_change_stamp(self):
+        return self.get_projects().aggregate(
+            latest=Max("updated_at"),
+            tasks_latest=Max("tasks__updated_at"),
+            count=Count("pk", distinct=True),
+            task_count=Count("tasks", distinct=True),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["rows"] = with_breakdowns(list(context["rows"]))
+        context["sort"] = self.get_sort()
+        context["status_columns"] = [(status.label, name) for name, status in STATUS_COLUMNS]
+        context["priority_columns"] = [(priority.label, name) for name, priority in PRIORITY_COLUMNS]
+        return context
+
+
+class CapacityView(LoginRequiredMixin, TemplateView):
+    """Open work per assignee per week (capacity.py); ?weeks= sets the horizon, ?project= narrows it"""
+    template_name = "main_app/capacity.html"
+    week_options = [4, 8, 13, 26, 52]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        weeks = self.request.GET.get("weeks", "13")
+        weeks = int(weeks) if weeks.isdigit() and int(weeks) in self.week_options else 13
+        tasks = visible_tasks(self.request.user)
+        project = self.request.GET.get("project", "")
+        if project.isdigit():
+            tasks = tasks.filter(projects=project)
+
+        heatmap = capacity_heatmap(weeks, tasks=tasks)
+        context.update({
+            "weeks": weeks,
+            "week_options": self.week_options,
+            "projects": visible_projects(self.request.user).order_by("project_name").values_list("pk", "project_name"),
+            "selected_project": project,
+            "heatmap": heatmap,
+            # the matrix goes to the page as JSON: the script draws the cells, not the template
+            "heatmap_data": {
+                "weeks": heatmap["weeks"],
+                "assignees": heatmap["assignees"],
+                "load": heatmap["load"].tolist(),
+                "count": heatmap["count"].tolist(),
+                "full": settings.CAPACITY_WEEKLY_LOAD,
+            },
+        })
+        return context
+
+
+class CalendarMixin:
+    """?view=month|week|timeline, ?date=<YYYY-MM-DD> inside the page, optional ?project=<id> and ?mine=1"""
+
+    def get_calendar_page(self):
+        view = self.request.GET.get("view")
+        if view not in CALENDAR_VIEWS:
+            view = "month"
+        try:
+            anchor = date.fromisoformat(self.request.GET.get("date", ""))
+        except ValueError:
+            anchor = timezone.localdate()
+        return view, anchor
+
+    def get_calendar_tasks(self):
+        tasks = visible_tasks(self.request.user)
+        project = self.request.GET.get("project", "")
+        if project.isdigit():
+            tasks = tasks.filter(projects=project)
+        if self.request.GET.get("mine"):
+            tasks = tasks.filter(assignee=self.request.user)
+        return tasks
+
+
+class CalendarView(LoginRequiredMixin, CalendarMixin, TemplateView):
+    template_name = "main_app/calendar.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        view, anchor = self.get_calendar_page()
+        start, end = calendar_range(view, anchor)
+        context.update({
+            "view": view,
+            "views": list(CALENDAR_VIEWS),
+            "anchor": anchor,
+            "start": start,
+            "last_day": end - timedelta(days=1),
+            "previous": calendar_step(view, anchor, -1),
+            "next": calendar_step(view, anchor, 1),
+            "projects": visible_projects(self.request.user).order_by("project_name").values_list("pk", "project_name"),
+            "selected_project": self.request.GET.get("project", ""),
+        })
+        return context
+
+
+class CalendarFeedView(LoginRequiredMixin, CalendarMixin, View):
+    """The tasks of one calendar page as JSON, bucketed by day (see schedule.py)"""
+
+    def get(self, request):
+        view, anchor = self.get_calendar_page()
+        return JsonResponse(calendar_feed(view, anchor, self.get_calendar_tasks()), encoder=DjangoJSONEncoder)
+
+
+class ProjectReportJobView(LoginRequiredMixin, View):
+    """Queue the report build and answer right away with the job to poll"""
+
+    def post(self, request, project_id):
+        project = get_object_or_404(visible_projects(request.user), id=project_id)
+        job = enqueue("project_report", {"project_id": project.id}, priority=5, user=request.user)
+        return job_accepted_response(job)
+
+
+class TaskBulkUpdateView(LoginRequiredMixin, View):
+    def post(self, request):
+        task_ids = [int(pk) for pk in request.POST.getlist("task_ids") if pk.isdigit()]
+        # tasks out of the user's reach are dropped, not updated
+        task_ids = list(visible_tasks(request.user).filter(pk__in=task_ids).values_list("pk", flat=True))
+        # labels ("Done") as in the forms; the job gets the codes
+        status = request.POST.get("status") or None
+        priority = request.POST.get("priority") or None
+
+        if not task_ids:
+            return JsonResponse({"error": "No tasks selected"}, status=400)
+        if status and Status.parse(status) is None:
+            return JsonResponse({"error": "Invalid status"}, status=400)
+        if priority and Priorities.parse(priority) is None:
+            return JsonResponse({"error": "Invalid priority"}, status=400)
+
+        job = enqueue(
+            "bulk_update_tasks",
+            {
+                "task_ids": task_ids,
+                "status": status and Status.parse(status),
+                "priority": priority and Priorities.parse(priority),
+            },
+            user=request.user,
+        )
+        return job_accepted_response(job)
+
+
+class TaskImportView(LoginRequiredMixin, View):
+    """Queue an import of an uploaded CSV / JSON Lines file of tasks (see imports.py)"""
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return JsonResponse({"error": "No file uploaded"}, status=400)
+        try:
+            fmt = detect_format(upload.name)
+        except ValueError as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+        # a retry would insert the rows committed before the failure a second time
+        job = enqueue(
+            "import_tasks",
+            {"upload": save_upload(upload), "format": fmt, "user_id": request.user.pk},
+            user=request.user,
+            max_attempts=1,
+        )
+        return job_accepted_response(job)
+
+
+class TaskImportRejectsView(LoginRequiredMixin, View):
+    def get(self, request, job_id):
+        job = get_object_or_404(Job, id=job_id, name="import_tasks", created_by=request.user)
+        rejects = (job.result or {}).get("rejects")
+        if not rejects or not default_storage.exists(rejects):
+            raise Http404("No rejected rows")
+        return FileResponse(default_storage.open(rejects, "rb"), as_attachment=True, filename=os.path.basename(rejects))
+
+
+class JobStatusView(LoginRequiredMixin, View):
+    def get(self, request, job_id):
+        job = get_object_or_404(Job, id=job_id, created_by=request.user)
+        return JsonResponse({
+            "id": job.id,
+            "name": job.name,
+            "status": job.status,
+            "attempts": job.attempts,
+            "result": job.result,
+            "progress": job.progress,
+            "error": job.last_error.strip().splitlines()[-1] if job.last_error else None,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }, encoder=DjangoJSONEncoder)
+
+
+class ChangeFeedView(LoginRequiredMixin, View):
+    """The Task/Project changes the user can see (EventScope) after ?since=<seq>, oldest first"""
+
+    def get(self, request):
+        try:
+            since = int(request.GET.get("since", 0))
+            limit = min(int(request.GET.get("limit", settings.CHANGE_FEED_PAGE_SIZE)), settings.CHANGE_FEED_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({"error": "since and limit must be integers"}, status=400)
+
+        entries = settled_entries().filter(seq__gt=since).order_by("seq")
+        entries = list(entries.only("seq", "kind", "object_id", "action", "data")[:limit + 1])
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        scope = EventScope.for_user(request.user)
+
+        return JsonResponse(
+            {
+                # past the hidden entries too, so the next page does not read them again
+                "last_seq": entries[-1].seq if entries else since,
+                "has_more": has_more,
+                "changes": [
+                    (entry.seq, entry.kind, entry.object_id, entry.action, entry.data)
+                    for entry in entries if scope.allows(entry)
+                ],
+            },
+            encoder=DjangoJSONEncoder,
+            json_dumps_params={"separators": (",", ":")},
+        )
+
+
+class EventStreamView(View):
+    """
+    Server-Sent Events stream of task/project changes the user can see.
+
+    Needs the ASGI server (config/asgi.py). Reconnecting browsers send
+    Last-Event-ID and first get what they missed from the change log, up to
+    CHANGE_FEED_PAGE_SIZE entries; past that they get "resync" and reload.
+    """
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse("Unauthorized", status=401)
+
+        scope = await sync_to_async(EventScope.for_user)(user)
+        last_event_id = request.headers.get("Last-Event-ID", "")
+        since = int(last_event_id) if last_event_id.isdigit() else None
+
+        response = StreamingHttpResponse(self.stream(scope, since), content_type="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, scope, since):
+        # subscribe before reading the missed entries: whatever is committed in
+        # between arrives live, and the seq check drops what the replay already sent
+        subscription = broadcaster.subscribe()
+        last_seq = 0
+        try:
+            yield "retry: 3000\n\n"
+            if since is not None:
+                await subscription.started.wait()
+                missed = await sync_to_async(entries_after)(since)
+                for entry in missed:
+                    last_seq = entry.seq
+                    if scope.allows(entry):
+                        yield format_event(entry)
+                if len(missed) == settings.CHANGE_FEED_PAGE_SIZE:
+                    # more were missed than one replay holds: the client reloads instead
+                    yield "event: resync\ndata: {}\n\n"
+
+            while True:
+                try:
+                    entry = await asyncio.wait_for(subscription.get(), timeout=settings.EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if entry is RESYNC:
+                    yield "event: resync\ndata: {}\n\n"
+                elif entry.seq > last_seq and scope.allows(entry):
+                    yield format_event(entry)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+
+def job_accepted_response(job):
+    return JsonResponse(
+        {"job_id": job.id, "status": job.status, "status_url": reverse("main_app:job_status", args=[job.id])},
+        status=202,
+    )
+
+
+def saved_view_url(saved_view):
+    if saved_view.project_id is None:
+        page = reverse("main_app:my_tasks")
+    else:
+        page = reverse("main_app:one_project", args=[saved_view.project_id])
+    return f"{page}?view={saved_view.pk}"
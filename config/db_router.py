@@ -0,0 +1,120 @@
+"""
+Read replica routing.
+
+Reads go to the aliases in settings.DATABASE_REPLICAS only inside
+read_from_replicas() — ReplicaPinningMiddleware enters it for GET/HEAD
+requests; everything else (writes, POST requests, workers, management
+commands) uses the primary ("default"). After a request that writes, the
+user is pinned to the primary for REPLICA_PIN_SECONDS so they read their own
+writes even if the replicas lag behind. A replica that cannot be connected to
+is skipped for REPLICA_RETRY_SECONDS and reads fall back to the primary.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.connection import ConnectionDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "db_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# the cache table (DatabaseCache), written on reads too
+CACHE_APP = "django_cache"
+
+# always read from the primary: a lagging replica must not log users out or serve old cache entries
+PRIMARY_ONLY_APPS = {"sessions", CACHE_APP}
+
+# {"replicas": bool, "wrote": bool} for the current request / block
+_routing = ContextVar("db_routing", default=None)
+
+# alias -> time.monotonic() until which the replica is considered down
+_down_until = {}
+
+
+@contextmanager
+def read_from_replicas(enabled=True):
+    """Send reads in this block to a replica (enabled=False pins them to the primary)"""
+    state = {"replicas": enabled, "wrote": False}
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def replica_is_available(alias):
+    if _down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except (ConnectionDoesNotExist, DatabaseError):
+        logger.warning("Replica %s is unavailable, reading from the primary", alias, exc_info=True)
+        _down_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+        return False
+    return True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if not state or not state["replicas"] or state["wrote"]:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        # inside a transaction on the primary, read what it has written
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if replica_is_available(alias)]
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        # filling the cache is not a change the user must read back: no pin to the primary
+        if state is not None and model._meta.app_label != CACHE_APP:
+            state["wrote"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema from the primary
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Route GET/HEAD reads to replicas unless the user wrote something in the last few seconds"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        use_replicas = (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and pinned_until < time.time()
+        )
+
+        with read_from_replicas(use_replicas) as state:
+            response = self.get_response(request)
+
+        if settings.DATABASE_REPLICAS and (state["wrote"] or request.method not in SAFE_METHODS):
+            pin = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, f"{time.time() + pin:.0f}", max_age=pin, httponly=True, samesite="Lax")
+        return response
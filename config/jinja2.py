@@ -0,0 +1,54 @@
+"""
+Jinja2 environment for the optional Jinja2 template backend.
+
+Templates live in templates/jinja2/ and mirror the Django ones they replace;
+views render them when LIST_TEMPLATE_ENGINE = "jinja2". The helpers below
+stand in for the Django tags and filters those templates use.
+"""
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.timezone import template_localtime
+from jinja2 import Environment, pass_context
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args, kwargs=kwargs or None)
+
+
+@pass_context
+def querystring(context, **params):
+    """Current query string with `params` replaced, like Django's {% querystring %}"""
+    query = context["request"].GET.copy()
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return "?" + query.urlencode() if query else ""
+
+
+def date(value, arg=None):
+    # Django templates convert datetimes to the current time zone before filtering
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def localtime(value):
+    """What {{ value }} prints for a date/datetime in Django templates"""
+    return localize(template_localtime(value))
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        "static": static,
+        "url": url,
+        "querystring": querystring,
+    })
+    env.filters.update({
+        "date": date,
+        "linebreaks": defaultfilters.linebreaks_filter,
+        "localize": localtime,
+    })
+    return env
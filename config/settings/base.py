@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.db_router.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -71,18 +72,107 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        # optional engine for the task list and report pages, see LIST_TEMPLATE_ENGINE
+        'NAME': 'jinja2',
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'templates', 'jinja2')],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'config.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+            ],
+        },
+    },
 ]
 
+# Engine ("django" or "jinja2") for the my-tasks, project and report pages and their fragments
+LIST_TEMPLATE_ENGINE = os.getenv("LIST_TEMPLATE_ENGINE", "django")
+
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite profile for small deployments, run on every new connection (SQLITE_PROFILE=default turns it off):
+# WAL lets readers work while a writer commits, synchronous=NORMAL only fsyncs at checkpoints (safe in
+# WAL mode; a power cut can lose the last commits, never corrupt the file), reads go through mmap and a
+# 64 MB page cache, temp B-trees stay in memory, and a busy connection waits up to 5 s for the lock
+# instead of failing with "database is locked". `manage.py bench_sqlite` compares both profiles.
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'production')
+# journal_mode=WAL is stored in the database file and outlives the connection, so it is opt-in: set
+# SQLITE_WAL=True for a deployment's own database. Without it, runs against the committed dev db.sqlite
+# leave the file as it was, with no -wal/-shm files beside it. synchronous=NORMAL is only safe under
+# WAL, so it goes with it; the other pragmas last one connection and always apply.
+SQLITE_WAL = os.getenv('SQLITE_WAL', 'False') == 'True'
+SQLITE_WAL_PRAGMAS = ('journal_mode', 'synchronous')
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative: KiB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,  # ms
+}
+# the journal mode and sync level belong to the writer; a read-only connection cannot set them
+SQLITE_READ_ONLY_PRAGMAS = ('mmap_size', 'cache_size', 'temp_store', 'busy_timeout')
+# Transactions (atomic blocks, and POSTs to the write views) start with BEGIN IMMEDIATE: one that
+# reads then writes takes the write lock up front and waits for it. Under WAL a deferred one fails
+# at once with "database is locked" when another writer got there first; the busy timeout does not
+# apply to that upgrade. SQLITE_IMMEDIATE_WRITES=False goes back to deferred transactions.
+SQLITE_IMMEDIATE_WRITES = os.getenv('SQLITE_IMMEDIATE_WRITES', 'True') == 'True'
+
+
+def sqlite_options(read_only=False, wal=SQLITE_WAL):
+    if SQLITE_PROFILE != 'production':
+        return {}
+    pragmas = {
+        name: value for name, value in SQLITE_PRAGMAS.items()
+        if (not read_only or name in SQLITE_READ_ONLY_PRAGMAS) and (wal or name not in SQLITE_WAL_PRAGMAS)
+    }
+    options = {'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())}
+    if SQLITE_IMMEDIATE_WRITES and not read_only:
+        options['transaction_mode'] = 'IMMEDIATE'
+    return options
+
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': 'db.sqlite',
+        'OPTIONS': sqlite_options(),
+    }
+}
+
+# Read replicas (config/db_router.py): aliases in DATABASES that GET/HEAD requests read from.
+# Locally, SQLITE_REPLICA=replica.sqlite opens a copy of db.sqlite read-only as "replica"
+# (`make sqlite-replica` refreshes the copy).
+DATABASE_REPLICAS = []
+if os.getenv('SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{os.getenv('SQLITE_REPLICA')}?mode=ro",
+        'OPTIONS': sqlite_options(read_only=True),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+# after a write, the user reads from the primary for this long (replication lag budget)
+REPLICA_PIN_SECONDS = 5
+# an unreachable replica is skipped for this long before it is tried again
+REPLICA_RETRY_SECONDS = 30
+
+# One cache for every process (web, events, workers): report refreshes, saved-view generations and the
+# access ids written by one must be seen by the others, which per-process memory caches never are.
+# The table comes from `manage.py createcachetable`; it is always read from the primary (config/db_router.py).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
     }
 }
 
@@ -138,3 +228,69 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = reverse_lazy('authentication:login')
 LOGIN_REDIRECT_URL = "/tasks/"
 
+
+# Background job queue (apps/main_app/jobs.py, run with `manage.py run_workers`)
+# Recount Project.task_count in a job instead of inside the request that changed Project.tasks.
+JOB_QUEUE_ASYNC_COUNTERS = os.getenv("JOB_QUEUE_ASYNC_COUNTERS", "False") == "True"
+JOB_QUEUE_POLL_INTERVAL = 1.0
+# Running jobs with no heartbeat (jobs.report_progress) for this many seconds are re-queued by
+# `run_workers` (on start, then every half of this while idle), or failed once out of max_attempts.
+JOB_QUEUE_STALE_AFTER = 600
+
+# Change feed (/changes/?since=<seq>)
+CHANGE_FEED_PAGE_SIZE = 500
+# Only serve entries at least this old, in the feed and to the /events/ poller and replays. On PostgreSQL
+# a sequence number can become visible after a higher one (concurrent commits); a short settle delay
+# keeps readers from skipping it.
+CHANGE_FEED_SETTLE_SECONDS = 0
+
+# Live events (/events/, Server-Sent Events, served by the ASGI app in config/asgi.py)
+EVENTS_POLL_INTERVAL = 1.0
+# events buffered per connection before the client is told to resync instead
+EVENTS_BUFFER_SIZE = 100
+EVENTS_HEARTBEAT = 15
+
+# Uploaded files (task imports and their reject files)
+MEDIA_ROOT = BASE_DIR / "media"
+
+# Task import (`manage.py import_tasks`, POST /tasks/import/): rows per INSERT batch / transaction
+IMPORT_BATCH_SIZE = 1000
+IMPORT_UPLOAD_DIR = "imports"
+
+# Project history (`manage.py snapshot_projects`, /project/<id>/history/)
+PROJECT_HISTORY_MAX_DAYS = 3 * 365
+PROJECT_HISTORY_MAX_AGE = 300
+
+# Project reports (/project/<id>/report/, stale-while-revalidate): served from the cache while younger than
+# REPORT_FRESH_SECONDS; for REPORT_STALE_SECONDS more still served while one job rebuilds them. A rebuild
+# whose job was lost is queued again after REPORT_REFRESH_LOCK_SECONDS.
+REPORT_FRESH_SECONDS = 60
+REPORT_STALE_SECONDS = 600
+REPORT_REFRESH_LOCK_SECONDS = 120
+# Reports stored by `manage.py pregenerate_reports` (nightly) are served until a project change, or this age
+REPORT_ARTIFACT_MAX_AGE = 24 * 3600
+
+# Cycle-time analytics (/analytics/cycle-time/) are recomputed at most this often
+ANALYTICS_CACHE_SECONDS = 300
+
+# Priority points (Low 1 ... Urgent 4) one assignee is expected to clear in a week; fuller weeks show red
+# on the capacity heatmap (/analytics/capacity/)
+CAPACITY_WEEKLY_LOAD = 20
+
+# Projects per page on /portfolio/
+PORTFOLIO_PAGE_SIZE = 50
+
+# Tasks listed on the riskiest-tasks pages of a user or a project (scores from `manage.py score_tasks`)
+RISKIEST_TASKS_LIMIT = 50
+
+# Per-user cache of accessible project ids (apps/main_app/access.py); also dropped on membership changes
+ACCESS_CACHE_SECONDS = 600
+
+# Saved views (apps/main_app/saved_views.py): cached task lists are dropped on any task change, or after this
+SAVED_VIEW_CACHE_SECONDS = 300
+
+# Kanban board (apps/main_app/board.py): a column is re-ranked once a card's rank key is longer than this
+BOARD_RANK_MAX_LENGTH = 24
+
+# Done tasks untouched for this many days are moved to the archive by `manage.py archive_tasks`
+ARCHIVE_DONE_AFTER_DAYS = 90
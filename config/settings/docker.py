@@ -9,4 +9,15 @@ DATABASES = {
         "HOST": "db",
         "PORT": 5432,
     }
-}
\ No newline at end of file
+}
+
+DATABASE_REPLICAS = []
+if os.getenv("POSTGRES_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("POSTGRES_REPLICA_HOST"),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS = ["replica"]
+
+CHANGE_FEED_SETTLE_SECONDS = 2
@@ -7,6 +7,52 @@ ALLOWED_HOSTS = ["*", "13.60.12.128", "localhost"]
 STATIC_URL = "/static/"
 STATIC_ROOT = "/static"
 
+# collectstatic writes hashed file names (styles.3f2a9c1e4b7d.css) plus .gz/.br siblings;
+# nginx serves them with far-future immutable caching (see nginx.conf)
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "config.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
+# compiled templates are kept in memory for the life of the process
+# (cached loaders, no debug context processor); restart to pick up template changes
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [os.path.join(BASE_DIR, "templates")],
+        "OPTIONS": {
+            "loaders": [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+    {
+        "NAME": "jinja2",
+        "BACKEND": "django.template.backends.jinja2.Jinja2",
+        "DIRS": [os.path.join(BASE_DIR, "templates", "jinja2")],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            "environment": "config.jinja2.environment",
+            "auto_reload": False,
+            "context_processors": [
+                "django.contrib.auth.context_processors.auth",
+            ],
+        },
+    },
+]
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/media"
 
@@ -0,0 +1,51 @@
+"""
+Static files storage for production.
+
+collectstatic writes content-hashed copies of every file (ManifestStaticFilesStorage)
+and, next to each text asset, a gzip and (when the Brotli package is installed)
+a brotli-compressed sibling, so nginx can serve them with `gzip_static` /
+`brotli_static` without compressing on every request.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    compress_extensions = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml')
+    # below this size the compressed file saves less than the extra request headers cost
+    min_compress_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(self.compress_extensions):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as source:
+            content = source.read()
+        if len(content) < self.min_compress_size:
+            return
+
+        # mtime=0 keeps the .gz byte-identical between builds
+        self._write_sibling(f"{name}.gz", gzip.compress(content, compresslevel=9, mtime=0), len(content))
+        if brotli is not None:
+            self._write_sibling(f"{name}.br", brotli.compress(content), len(content))
+
+    def _write_sibling(self, name, compressed, original_size):
+        if len(compressed) >= original_size:
+            return
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(compressed))
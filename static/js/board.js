@@ -0,0 +1,67 @@
+// Drag and drop on the kanban board (ProjectBoardView). A drop posts the
+// card's new column and the ids of the cards now above and below it; the
+// server ranks the card between those two (board.py). If they are no longer
+// neighbours there (someone else moved them), the board is reloaded.
+(function () {
+    const board = document.getElementById("board");
+    if (!board) return;
+
+    let dragged = null;
+
+    function cardAfter(list, y) {
+        // the first card whose middle is below the pointer
+        const cards = list.querySelectorAll(".board-card:not(.dragging)");
+        for (const card of cards) {
+            const box = card.getBoundingClientRect();
+            if (y < box.top + box.height / 2) return card;
+        }
+        return null;
+    }
+
+    function updateCounts() {
+        board.querySelectorAll(".board-column").forEach(function (column) {
+            column.querySelector(".board-count").textContent = column.querySelectorAll(".board-card").length;
+        });
+    }
+
+    board.addEventListener("dragstart", function (event) {
+        dragged = event.target.closest(".board-card");
+        if (!dragged) return;
+        dragged.classList.add("dragging");
+        event.dataTransfer.effectAllowed = "move";
+    });
+
+    board.addEventListener("dragover", function (event) {
+        const list = event.target.closest(".board-cards");
+        if (!dragged || !list) return;
+        event.preventDefault();
+        list.insertBefore(dragged, cardAfter(list, event.clientY));
+    });
+
+    board.addEventListener("dragend", function () {
+        if (!dragged) return;
+        const card = dragged;
+        dragged = null;
+        card.classList.remove("dragging");
+        updateCounts();
+
+        const before = card.previousElementSibling;
+        const after = card.nextElementSibling;
+        const body = new URLSearchParams({
+            task_id: card.dataset.taskId,
+            status: card.closest(".board-column").dataset.status,
+            before: before ? before.dataset.taskId : "",
+            after: after ? after.dataset.taskId : "",
+        });
+        fetch(board.dataset.moveUrl, {
+            method: "POST",
+            credentials: "same-origin",
+            headers: { "X-CSRFToken": board.dataset.csrfToken },
+            body: body,
+        }).then(function (response) {
+            if (!response.ok) throw new Error(response.status);
+        }).catch(function () {
+            window.location.reload();
+        });
+    });
+})();
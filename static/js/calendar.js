@@ -0,0 +1,126 @@
+// Renders the calendar page from its JSON feed (CalendarFeedView): one
+// request per page, tasks already bucketed by day and capped per day by the
+// server, so only the visible rows ever reach the browser.
+(function () {
+    const root = document.getElementById("calendar");
+    if (!root) return;
+
+    const WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"];
+
+    function el(tag, className, text) {
+        const node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined) node.textContent = text;
+        return node;
+    }
+
+    function eachDay(start, end, callback) {
+        const day = new Date(start + "T00:00:00Z");
+        const last = new Date(end + "T00:00:00Z");
+        for (; day < last; day.setUTCDate(day.getUTCDate() + 1)) {
+            callback(day.toISOString().slice(0, 10), day);
+        }
+    }
+
+    function taskLink(row) {
+        // row: [id, task_name, status, priority, due_date, assignee]
+        const link = el("a", "calendar-task status-" + row[2].toLowerCase().replace(/ /g, "-"), row[1]);
+        link.href = root.dataset.taskUrl.replace("/0/", "/" + row[0] + "/");
+        link.title = row[1] + " — " + row[2] + ", " + row[3] + (row[5] ? ", " + row[5] : "");
+        return link;
+    }
+
+    function moreLink(bucket, day) {
+        const hidden = bucket.count - bucket.tasks.length;
+        if (hidden <= 0) return null;
+        const link = el("a", "calendar-more", "+" + hidden + " more");
+        link.href = root.dataset.dayUrl.replace("date=", "date=" + day);
+        return link;
+    }
+
+    function renderGrid(feed) {
+        const grid = el("div", "calendar-grid");
+        WEEKDAYS.forEach(function (name) {
+            grid.appendChild(el("div", "calendar-weekday", name));
+        });
+        const today = new Date().toISOString().slice(0, 10);
+        eachDay(feed.start, feed.end, function (day, date) {
+            const cell = el("div", "calendar-day" + (day === today ? " today" : ""));
+            cell.appendChild(el("div", "calendar-date", String(date.getUTCDate())));
+            const bucket = feed.days[day];
+            if (bucket) {
+                bucket.tasks.forEach(function (row) {
+                    cell.appendChild(taskLink(row));
+                });
+                const more = moreLink(bucket, day);
+                if (more) cell.appendChild(more);
+            }
+            grid.appendChild(cell);
+        });
+        return grid;
+    }
+
+    function renderTimeline(feed) {
+        // one lane per assignee, one column per day
+        const days = [];
+        eachDay(feed.start, feed.end, function (day) {
+            days.push(day);
+        });
+        const lanes = new Map();
+        days.forEach(function (day, column) {
+            const bucket = feed.days[day];
+            if (!bucket) return;
+            bucket.tasks.forEach(function (row) {
+                const name = row[5] || "Unassigned";
+                if (!lanes.has(name)) lanes.set(name, days.map(function () { return []; }));
+                lanes.get(name)[column].push(row);
+            });
+        });
+
+        const table = el("table", "calendar-timeline");
+        const head = el("tr");
+        head.appendChild(el("th", "", "Assignee"));
+        days.forEach(function (day) {
+            head.appendChild(el("th", "", day.slice(8)));
+        });
+        table.appendChild(head);
+        Array.from(lanes.keys()).sort().forEach(function (name) {
+            const row = el("tr");
+            row.appendChild(el("th", "", name));
+            lanes.get(name).forEach(function (tasks) {
+                const cell = el("td");
+                tasks.forEach(function (task) {
+                    cell.appendChild(taskLink(task));
+                });
+                row.appendChild(cell);
+            });
+            table.appendChild(row);
+        });
+        const counts = el("tr", "calendar-counts");
+        counts.appendChild(el("th", "", "Total"));
+        days.forEach(function (day) {
+            const bucket = feed.days[day];
+            const cell = el("td");
+            if (bucket) {
+                cell.appendChild(el("span", "", String(bucket.count)));
+                const more = moreLink(bucket, day);
+                if (more) cell.appendChild(more);
+            }
+            counts.appendChild(cell);
+        });
+        table.appendChild(counts);
+        return table;
+    }
+
+    fetch(root.dataset.feedUrl, { credentials: "same-origin" })
+        .then(function (response) {
+            if (!response.ok) throw new Error(response.status);
+            return response.json();
+        })
+        .then(function (feed) {
+            root.replaceChildren(feed.view === "timeline" ? renderTimeline(feed) : renderGrid(feed));
+        })
+        .catch(function () {
+            root.replaceChildren(el("p", "empty", "The calendar could not be loaded."));
+        });
+})();
@@ -0,0 +1,49 @@
+// Draws the capacity heatmap (CapacityView) from the matrix embedded in the
+// page: one row per assignee, one cell per week. The rows are built as one
+// HTML string and inserted at once, so thousands of assignees render in a
+// single layout pass.
+(function () {
+    const root = document.getElementById("capacity");
+    const source = document.getElementById("capacity-data");
+    if (!root || !source) return;
+
+    const data = JSON.parse(source.textContent);
+
+    function escape(text) {
+        return String(text).replace(/[&<>"']/g, function (c) {
+            return "&#" + c.charCodeAt(0) + ";";
+        });
+    }
+
+    function heat(load) {
+        // 0 (empty) .. 5 (full), 6 past full
+        if (!load) return 0;
+        if (load > data.full) return 6;
+        return Math.max(1, Math.ceil(5 * load / data.full));
+    }
+
+    const head = ["<thead><tr><th>Assignee</th>"];
+    data.weeks.forEach(function (week) {
+        const date = new Date(week + "T00:00:00Z");
+        head.push("<th>" + date.toLocaleDateString(undefined, { day: "numeric", month: "short", timeZone: "UTC" }) + "</th>");
+    });
+    head.push("</tr></thead>");
+
+    const body = ["<tbody>"];
+    data.assignees.forEach(function (assignee, i) {
+        const link = root.dataset.userUrl.replace(/0$/, assignee[0]);
+        body.push("<tr><th><a href=\"" + link + "\">" + escape(assignee[1]) + "</a></th>");
+        const load = data.load[i];
+        const count = data.count[i];
+        for (let j = 0; j < load.length; j++) {
+            body.push(
+                "<td class=\"heat-" + heat(load[j]) + "\" title=\"" + count[j] + " task(s), " + load[j] + " point(s)\">" +
+                (load[j] || "") + "</td>"
+            );
+        }
+        body.push("</tr>");
+    });
+    body.push("</tbody>");
+
+    root.innerHTML = "<table class=\"capacity-table\">" + head.join("") + body.join("") + "</table>";
+})();
@@ -0,0 +1,27 @@
+document.addEventListener("DOMContentLoaded", function() {
+    const modal = document.getElementById("confirmModal");
+    const confirmYes = document.getElementById("confirmYes");
+    const confirmNo = document.getElementById("confirmNo");
+    let formToSubmit = null;  // тут зберігатимемо форму
+
+    document.querySelectorAll(".delete-button").forEach(btn => {
+        btn.addEventListener("click", function(e) {
+            e.preventDefault();  // зупиняємо стандартну відправку форми
+            modal.style.display = "block";  // показуємо модалку
+            formToSubmit = btn.closest("form");  // зберігаємо конкретну форму
+        });
+    });
+
+    confirmNo.addEventListener("click", () => {
+        modal.style.display = "none"; // ховаємо модалку
+        formToSubmit = null; // очищаємо
+    });
+
+    confirmYes.addEventListener("click", () => {
+        if (formToSubmit) {
+            formToSubmit.submit(); // відправляємо саме ту форму
+        }
+        modal.style.display = "none";
+        formToSubmit = null;
+    });
+});
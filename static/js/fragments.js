@@ -0,0 +1,58 @@
+// Filter forms with data-fragment-target, and sort links inside an element
+// with data-fragment-url, reload only that element: the fragment endpoint
+// renders just the task list for the current query string.
+(function () {
+    function load(target, query) {
+        return fetch(target.dataset.fragmentUrl + query, { credentials: "same-origin" })
+            .then(function (response) {
+                if (!response.ok) throw new Error(response.status);
+                return response.text();
+            })
+            .then(function (html) {
+                target.innerHTML = html;
+                history.replaceState(null, "", query || window.location.pathname);
+            });
+    }
+
+    document.addEventListener("change", function (event) {
+        const form = event.target.closest("form[data-fragment-target]");
+        if (!form) return;
+
+        const params = new URLSearchParams();
+        new FormData(form).forEach(function (value, name) {
+            if (value) params.set(name, value);
+        });
+        // filters keep the current sort order
+        const sort = new URLSearchParams(window.location.search).get("sort");
+        if (sort) params.set("sort", sort);
+
+        const query = params.toString() ? "?" + params : "";
+        const target = document.getElementById(form.dataset.fragmentTarget);
+        load(target, query).catch(function () {
+            form.submit();
+        });
+    });
+
+    document.addEventListener("click", function (event) {
+        const link = event.target.closest("[data-fragment-url] a[href^='?']");
+        if (!link) return;
+
+        event.preventDefault();
+        const query = link.getAttribute("href");
+        load(link.closest("[data-fragment-url]"), query).catch(function () {
+            window.location = query;
+        });
+    });
+
+    // "save view" forms post the page's current filters: after a filter change
+    // they are the ones in the address bar, not those the page was rendered with
+    document.addEventListener("submit", function (event) {
+        const form = event.target.closest("form[data-saves-query]");
+        if (!form) return;
+        const params = new URLSearchParams(window.location.search);
+        if (params.has("view")) return;
+        form.querySelectorAll("input[data-filter]").forEach(function (input) {
+            input.value = params.get(input.name) || "";
+        });
+    });
+})();
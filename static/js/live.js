@@ -0,0 +1,18 @@
+// Pages with a #live-notice element listen to /events/ (Server-Sent Events)
+// and offer a reload once something the user can see has changed.
+(function () {
+    const notice = document.getElementById("live-notice");
+    if (!notice || !window.EventSource) return;
+
+    const source = new EventSource(notice.dataset.liveEvents);
+    const show = function () {
+        notice.hidden = false;
+    };
+    ["task", "project", "resync"].forEach(function (kind) {
+        source.addEventListener(kind, show);
+    });
+
+    notice.addEventListener("click", function () {
+        window.location.reload();
+    });
+})();
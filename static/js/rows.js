@@ -0,0 +1,11 @@
+// Rows and cards with data-href open their page on click.
+// Delegated from the document so rows swapped in later work too.
+document.addEventListener("click", function (event) {
+    // buttons inside forms (delete, mark done, ...) keep their own behaviour
+    if (event.target.closest("form")) return;
+
+    const row = event.target.closest("[data-href]");
+    if (row) {
+        window.location = row.dataset.href;
+    }
+});